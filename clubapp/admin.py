@@ -1,9 +1,29 @@
 from django.contrib import admin
-from .models import Member, PVTransaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.utils import timezone
 
+from . import search
+from .member_totals import PAISA
+from .models import Dividend, Member, PVTransaction, get_pv_value_for_year
 
-from django.contrib import admin
-from .models import Member
+
+# ---------------------------------------------------------
+#   CHANGELISTS
+# ---------------------------------------------------------
+# Every changelist is a fixed number of queries however many rows it
+# shows: members come in through list_select_related, and transaction
+# values are computed by the database from one price per request (the
+# value of 1 PV this year is the same for every row), so they can also be
+# sorted on. Transaction and dividend searches go through the FTS5 index
+# (search.py); the member search also covers email, phone and address,
+# which the index does not hold.
+
+
+class MemberSearchMixin:
+    member_field = ""
+
+    def get_search_results(self, request, queryset, search_term):
+        return search.filter_members(queryset, search_term, member_field=self.member_field), False
 
 
 @admin.register(Member)
@@ -31,10 +51,50 @@ class MemberAdmin(admin.ModelAdmin):
     readonly_fields = ('member_code', 'password', 'join_date')
 
 
+MONEY_FIELD = DecimalField(max_digits=16, decimal_places=2)
+
 
 @admin.register(PVTransaction)
-class PVTransactionAdmin(admin.ModelAdmin):
+class PVTransactionAdmin(MemberSearchMixin, admin.ModelAdmin):
     # no 'note' here anymore
     list_display = ("member", "pv_units", "purchase_date", "current_value_per_pv", "current_total_value")
+    list_select_related = ("member",)
     search_fields = ("member__member_code", "member__full_name")
     list_filter = ("purchase_date",)
+    autocomplete_fields = ("member",)
+    member_field = "member"
+
+    def get_queryset(self, request):
+        # The price is a Decimal to the paisa, so units x price is exact;
+        # both columns show and sort on what the database computed. SQLite
+        # drops trailing zeros from computed decimals, so they are put back
+        # to the paisa for display.
+        price = get_pv_value_for_year(timezone.now().year)
+        return super().get_queryset(request).annotate(
+            value_per_pv=Value(price, output_field=MONEY_FIELD),
+            total_value=ExpressionWrapper(F("pv_units") * Value(price), output_field=MONEY_FIELD),
+        )
+
+    @admin.display(description="Current value per PV", ordering="value_per_pv")
+    def current_value_per_pv(self, obj):
+        return obj.value_per_pv.quantize(PAISA)
+
+    @admin.display(description="Current total value", ordering="total_value")
+    def current_total_value(self, obj):
+        return obj.total_value.quantize(PAISA)
+
+
+@admin.register(Dividend)
+class DividendAdmin(MemberSearchMixin, admin.ModelAdmin):
+    list_display = ("member", "member_name", "amount", "note", "run")
+    list_select_related = ("member", "run")
+    search_fields = ("member__member_code", "member__full_name")
+    list_filter = ("run",)
+    autocomplete_fields = ("member",)
+    # Rows written by a distribution run are reversed with the run.
+    readonly_fields = ("run",)
+    member_field = "member"
+
+    @admin.display(description="Member name", ordering="member__full_name")
+    def member_name(self, obj):
+        return obj.member.full_name
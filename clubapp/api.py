@@ -0,0 +1,201 @@
+import hashlib
+from decimal import Decimal, ROUND_HALF_UP
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+from . import caching, money, projections
+from .batch_valuation import growth_curve
+from .models import Dividend, Member, PVTransaction
+from .views import _dashboard_rows
+
+
+# ---------------------------------------------------------
+#   MEMBER PORTFOLIO JSON API (v1)
+# ---------------------------------------------------------
+#
+# Read-only JSON for the logged-in member (same session login as
+# member_dashboard), under /api/v1/member/:
+#
+#   (summary)       totals and current value
+#   transactions/   the dashboard rows: buy, current and projected value
+#   projections/    projected value of each transaction, yearly from its
+#                   purchase year
+#   dividends/      dividends received
+#
+# ?fields=a,b keeps only those fields (400 for unknown ones) and
+# ?compact=1 sends lists as {"fields": [...], "results": [[...], ...]}.
+# Money is sent as decimal strings, dates as ISO 8601.
+#
+# Every response carries an ETag built from the member's data_version,
+# the valuation month, the rate schedule and the query, all of which
+# come from one indexed query on the member row. A request whose
+# If-None-Match still matches gets 304 before anything is valued or
+# loaded. Valuations come from the same cache entries as the dashboard.
+
+API_VERSION = "v1"
+PAISA = Decimal("0.01")
+
+JSON_PARAMS = {"separators": (",", ":")}
+
+
+def _error(message, status):
+    return JsonResponse({"error": message}, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def _money(value):
+    return str(Decimal(value).quantize(PAISA, rounding=ROUND_HALF_UP))
+
+
+def _revalidate(response, etag):
+    # Clients may keep a copy but must check the tag before using it.
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _selected_fields(request, available):
+    requested = request.GET.get("fields")
+    if not requested:
+        return list(available)
+    fields = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown or not fields:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown) or '(none)'}. Available: {', '.join(available)}.")
+    return fields
+
+
+def member_endpoint(fields, many=True):
+    """
+    Wraps a view ``view(member_id, version)`` that returns the full rows
+    (``many``) or one dict, with the login check, conditional GET and
+    field selection described above.
+    """
+    def decorator(view):
+        @require_safe
+        @wraps(view)
+        def wrapper(request):
+            mid = request.session.get("member_id")
+            if not mid:
+                return _error("Not logged in.", 401)
+            version = Member.objects.filter(pk=mid).values_list("data_version", flat=True).first()
+            if version is None:
+                return _error("Member not found.", 404)
+            try:
+                selected = _selected_fields(request, fields)
+            except ValueError as e:
+                return _error(str(e), 400)
+            compact = many and request.GET.get("compact") == "1"
+
+            key = caching.member_key(f"api-{API_VERSION}-{view.__name__}", mid, version, ",".join(selected), compact)
+            etag = quote_etag(hashlib.sha1(key.encode()).hexdigest()[:20])
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return _revalidate(not_modified, etag)
+
+            data = view(mid, version)
+            payload = {"version": version, "valuation_month": caching.valuation_month()}
+            if not many:
+                payload["result"] = {name: data[name] for name in selected}
+            elif compact:
+                payload["fields"] = selected
+                payload["results"] = [[row[name] for name in selected] for row in data]
+            else:
+                payload["results"] = [{name: row[name] for name in selected} for row in data]
+
+            return _revalidate(JsonResponse(payload, json_dumps_params=JSON_PARAMS), etag)
+        return wrapper
+    return decorator
+
+
+def _cached_dashboard_rows(mid, version):
+    return caching.get_or_set(
+        caching.member_key("dashboard", mid, version),
+        lambda: _dashboard_rows(Member(pk=mid)),
+    )
+
+
+@member_endpoint((
+    "member_code", "full_name", "email", "join_date", "total_pv_units",
+    "total_invested", "total_dividends", "current_value",
+), many=False)
+def member_summary(mid, version):
+    member = Member.objects.get(pk=mid)
+    _, overall_total_value = _cached_dashboard_rows(mid, version)
+    return {
+        "member_code": member.member_code,
+        "full_name": member.full_name,
+        "email": member.email,
+        "join_date": member.join_date,
+        "total_pv_units": member.total_pv_units,
+        "total_invested": _money(member.total_invested),
+        "total_dividends": _money(member.total_dividends),
+        "current_value": _money(overall_total_value),
+    }
+
+
+@member_endpoint(("id", "date", "purchase_year", "pv_units", "buy_value", "current_value", "projected_value"))
+def member_transactions(mid, version):
+    dashboard_data, _ = _cached_dashboard_rows(mid, version)
+    return [
+        {
+            **row,
+            "buy_value": _money(row["buy_value"]),
+            "current_value": _money(row["current_value"]),
+            "projected_value": _money(row["projected_value"]),
+        }
+        for row in dashboard_data
+    ]
+
+
+@member_endpoint(("id", "purchase_year", "pv_units", "values"))
+def member_projections(mid, version):
+    # growth_curve() is per purchase year and shared by every member, so a
+    # transaction's projection is its curve scaled by units.
+    txs = PVTransaction.objects.filter(member_id=mid).order_by("-purchase_date").values_list(
+        "id", "pv_units", "purchase_date"
+    )
+    return [
+        {
+            "id": pk,
+            "purchase_year": purchase_date.year,
+            "pv_units": units,
+            "values": [str(money.to_decimal(units * v)) for v in growth_curve(purchase_date.year)],
+        }
+        for pk, units, purchase_date in txs
+    ]
+
+
+@member_endpoint(("id", "amount", "note", "run"))
+def member_dividends(mid, version):
+    rows = Dividend.objects.filter(member_id=mid).order_by("-id").values_list("id", "amount", "note", "run_id")
+    return [
+        {"id": pk, "amount": _money(amount), "note": note, "run": run_id}
+        for pk, amount, note, run_id in rows
+    ]
+
+
+# ---------------------------------------------------------
+#   WHAT-IF PROJECTION (public)
+# ---------------------------------------------------------
+#
+# /api/v1/projection/?amount=&start_year=&years=&top_up=YEAR:AMOUNT...
+# backs the calculator on the landing page and the project value page
+# (projections.py). It needs no login and touches no database, and the
+# same query always gets the same answer until the rate schedule changes,
+# so browsers and any proxy in front may keep it for
+# PV_PROJECTION_CACHE_SECONDS.
+
+@require_safe
+def projection(request):
+    try:
+        args = projections.parse(request.GET)
+    except ValueError as e:
+        return _error(str(e), 400)
+    response = JsonResponse(projections.project(*args), json_dumps_params=JSON_PARAMS)
+    response["Cache-Control"] = f"public, max-age={settings.PV_PROJECTION_CACHE_SECONDS}"
+    return response
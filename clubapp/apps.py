@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ClubappConfig(AppConfig):
     name = 'clubapp'
+
+    def ready(self):
+        from . import db_routing, instrumentation, signals  # noqa: F401
+        from .valuation import warm_tables
+        warm_tables()
@@ -0,0 +1,225 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import money, rates, valuation
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the python engine needs nothing extra.
+    np = None
+
+
+# ---------------------------------------------------------
+#   BATCH VALUATION: ONE CALL FOR MANY TRANSACTIONS
+# ---------------------------------------------------------
+#
+# Transactions are loaded once as columns (units, purchase month index,
+# purchase-year base price, ...) and every valuation is done for all rows
+# in one call. settings.PV_VALUATION_ENGINE picks the backend:
+#
+#   "python"  plain lists over the factor tables in valuation.py (default)
+#   "numpy"   vectorized arrays; falls back to "python" if NumPy is missing
+#
+# Both return fixed-point values (money.py) that agree to the integer; the
+# scalar functions in views.py remain the reference for both. Fixed-point
+# products overflow int64, so the NumPy engine keeps its integers in
+# object arrays: the loops still run inside NumPy, on Python ints.
+
+PROJECTION_YEARS = 10
+
+# Array copies of the valuation.py factor tables, keyed by factor function.
+_np_tables = {}
+
+
+def projection_rate(year_offset):
+    """Yearly rate (in %) for the n-th projected year, from the rate schedule."""
+    return rates.get().rate(year_offset)
+
+
+@lru_cache(maxsize=None)
+def _yearly_factors(years):
+    schedule = rates.get()
+    factors = [money.SCALE]
+    for i in range(1, years + 1):
+        factors.append(money.mul(factors[-1], schedule.growth(i)))
+    return tuple(factors)
+
+
+@lru_cache(maxsize=None)
+def growth_curve(purchase_year, years=PROJECTION_YEARS):
+    """
+    Projected fixed-point value of 1 PV bought in ``purchase_year``, one
+    point per year from the purchase year onward. Multiply by units for a
+    transaction.
+    """
+    price = valuation.base_price_fixed(purchase_year)
+    return tuple(money.mul(price, f) for f in _yearly_factors(years))
+
+
+@rates.on_change
+def _reset_tables():
+    _np_tables.clear()
+    _yearly_factors.cache_clear()
+    growth_curve.cache_clear()
+
+
+class TransactionColumns:
+    """
+    Column view of a set of PVTransaction rows.
+
+    ``purchase_month`` / ``buy_value`` use the raw purchase date (dashboard
+    logic); ``effective_month`` / ``effective_value`` use the date clamped to
+    the project start (overview logic).
+    """
+
+    def __init__(self, ids, pv_units, purchase_dates):
+        self.ids = list(ids)
+        self.pv_units = list(pv_units)
+        self.purchase_dates = [d.date() if isinstance(d, datetime) else d for d in purchase_dates]
+
+        self.purchase_month = []
+        self.buy_value = []
+        self.effective_month = []
+        self.effective_value = []
+        for units, p_date in zip(self.pv_units, self.purchase_dates):
+            eff = valuation.get_effective_date(p_date)
+            self.purchase_month.append(valuation.month_index(p_date.year, p_date.month))
+            self.buy_value.append(units * valuation.base_price_fixed(p_date.year))
+            self.effective_month.append(valuation.month_index(eff.year, eff.month))
+            self.effective_value.append(units * valuation.base_price_fixed(eff.year))
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        rows = list(queryset.values_list("id", "pv_units", "purchase_date"))
+        if not rows:
+            return cls([], [], [])
+        return cls(*zip(*rows))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class PythonEngine:
+    name = "python"
+
+    def current_values(self, cols, today=None):
+        if today is None:
+            today = timezone.now().date()
+        return [
+            valuation.current_value(units, p_date, today=today)
+            for units, p_date in zip(cols.pv_units, cols.purchase_dates)
+        ]
+
+    def values_at(self, cols, year, month):
+        target = valuation.month_index(year, month)
+        values = []
+        for start, start_value in zip(cols.effective_month, cols.effective_value):
+            months = target - start
+            values.append(None if months < 0 else money.mul(start_value, valuation.geometric_factor(months)))
+        return values
+
+    def projections(self, cols, years=PROJECTION_YEARS):
+        factors = _yearly_factors(years)
+        return [[money.mul(buy, f) for f in factors] for buy in cols.buy_value]
+
+
+def _np_mul(a, b):
+    # money.mul for arrays of non-negative values (all valuations are).
+    return (a * b * 2 + money.SCALE) // (2 * money.SCALE)
+
+
+class NumpyEngine:
+    name = "numpy"
+
+    def _arrays(self, cols):
+        arrays = getattr(cols, "_np", None)
+        if arrays is None:
+            arrays = cols._np = {
+                "purchase_month": np.asarray(cols.purchase_month, dtype=np.int64),
+                "buy_value": np.asarray(cols.buy_value, dtype=object),
+                "effective_month": np.asarray(cols.effective_month, dtype=np.int64),
+                "effective_value": np.asarray(cols.effective_value, dtype=object),
+            }
+        return arrays
+
+    def _table(self, factor, months):
+        table = _np_tables.get(factor)
+        if table is None or len(table) <= months:
+            size = max(months, valuation.TABLE_MONTHS)
+            factor(size)
+            table = _np_tables[factor] = np.asarray([factor(m) for m in range(size + 1)], dtype=object)
+        return table
+
+    def current_values(self, cols, today=None):
+        if today is None:
+            today = timezone.now().date()
+        a = self._arrays(cols)
+        months = np.clip(valuation.month_index(today.year, today.month) - a["purchase_month"], 0, None)
+        if not len(months):
+            return []
+        table = self._table(valuation.nominal_factor, int(months.max()))
+        return _np_mul(a["buy_value"], table[months]).tolist()
+
+    def values_at(self, cols, year, month):
+        a = self._arrays(cols)
+        months = valuation.month_index(year, month) - a["effective_month"]
+        if not len(months):
+            return []
+        held = months >= 0
+        table = self._table(valuation.geometric_factor, max(int(months.max()), 0))
+        values = _np_mul(a["effective_value"], table[np.where(held, months, 0)])
+        return [v if h else None for v, h in zip(values.tolist(), held.tolist())]
+
+    def projections(self, cols, years=PROJECTION_YEARS):
+        factors = np.asarray(_yearly_factors(years), dtype=object)
+        return _np_mul(self._arrays(cols)["buy_value"][:, np.newaxis], factors[np.newaxis, :]).tolist()
+
+
+def year_grids(purchases_by_member, year, engine=None):
+    """
+    ``valuation.year_grid`` for many members at once: ``{member_id:
+    [(pv_units, purchases)]}`` (effective dates, see
+    ``valuation.effective_purchases``) to ``{member_id: 12 cells}``, with
+    each month valued for every transaction in one engine call.
+    """
+    if engine is None:
+        engine = get_engine()
+    # Values only depend on the start month, so a member's purchases in
+    # the same month are valued as one row.
+    buckets = {}
+    for member_id, purchases in purchases_by_member.items():
+        for pv_units, p_date in purchases:
+            key = (member_id, p_date.year, p_date.month)
+            buckets[key] = buckets.get(key, 0) + pv_units
+    owners = [member_id for member_id, _, _ in buckets]
+    units = list(buckets.values())
+    cols = TransactionColumns(range(len(units)), units, [date(y, m, 1) for _, y, m in buckets])
+
+    grids = {member_id: [None] * 12 for member_id in purchases_by_member}
+    for month in range(1, 13):
+        held = {}
+        for owner, pv_units, value in zip(owners, units, engine.values_at(cols, year, month)):
+            if value is not None:
+                pv, total = held.get(owner, (0, 0))
+                held[owner] = (pv + pv_units, total + value)
+        for owner, cell in held.items():
+            grids[owner][month - 1] = cell
+    return grids
+
+
+ENGINES = {
+    "python": PythonEngine,
+    "numpy": NumpyEngine,
+}
+
+
+def get_engine(name=None):
+    """Returns the engine named by ``name`` or settings.PV_VALUATION_ENGINE."""
+    if name is None:
+        name = getattr(settings, "PV_VALUATION_ENGINE", "python")
+    if name == "numpy" and np is None:
+        name = "python"
+    return ENGINES[name]()
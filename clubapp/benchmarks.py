@@ -0,0 +1,358 @@
+import asyncio
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, include, path, reverse
+from django.utils import timezone
+
+from . import synthetic, urls, valuation, views
+from .batch_valuation import ENGINES, TransactionColumns
+from .models import Dividend, DividendRun, Member, PVTransaction
+
+
+# ---------------------------------------------------------
+#   BENCHMARK SUITE
+# ---------------------------------------------------------
+#
+# Grows a synthetic data set through each requested scale (members) and
+# at each one times:
+#   * the valuation functions: the reference loops in views.py, the table
+#     lookups in valuation.py and the batch engines;
+#   * every URL in clubapp/urls.py with a GET through the test client:
+#     cold (empty cache) wall time, query count and peak Python memory,
+#     then warm wall times over ``repeat`` runs.
+# run_suite() works on the current database and only adds rows; the
+# run_benchmarks command points it at a throwaway database.
+
+VALUATION_SAMPLE = 2000
+
+# Route kwargs, filled from the sample objects picked for each scale.
+URL_KWARGS = {
+    "edit_member": "member",
+    "delete_member": "member",
+    "buy_pv_edit": "transaction",
+    "buy_pv_delete": "transaction",
+    "member_certificate": "transaction",
+    "member_certificate_pdf": "transaction",
+    "dividend_edit": "dividend",
+    "dividend_delete": "dividend",
+    "dividend_run_detail": "dividend_run",
+}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def environment(seed, repeat):
+    return {
+        "git_revision": _git_revision(),
+        "generated_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "database_vendor": connection.vendor,
+        "valuation_engine": settings.PV_VALUATION_ENGINE,
+        "cache_backend": settings.CACHES["default"]["BACKEND"],
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def _timed(fn, calls):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    return {"calls": calls, "total_ms": round(elapsed * 1000, 3), "us_per_call": round(elapsed * 1e6 / max(calls, 1), 3)}
+
+
+def valuation_benchmarks():
+    today = timezone.now().date()
+    sample = list(PVTransaction.objects.order_by("id").values_list("pv_units", "purchase_date")[:VALUATION_SAMPLE])
+    n = len(sample)
+    results = {
+        "views.calculate_pv_value_at_date": _timed(
+            lambda: [views.calculate_pv_value_at_date(u, d, today.year, today.month) for u, d in sample], n),
+        "views.calculate_current_value": _timed(
+            lambda: [views.calculate_current_value(u, d) for u, d in sample], n),
+        "views.calculate_pv_rate": _timed(
+            lambda: [views.calculate_pv_rate(2026 + i % 20) for i in range(n)], n),
+        "valuation.get_effective_date": _timed(
+            lambda: [valuation.get_effective_date(d) for _, d in sample], n),
+        "valuation.value_at_date": _timed(
+            lambda: [valuation.value_at_date(u, d, today.year, today.month) for u, d in sample], n),
+        "valuation.current_value": _timed(
+            lambda: [valuation.current_value(u, d, today=today) for u, d in sample], n),
+    }
+    cols = TransactionColumns.from_queryset(PVTransaction.objects.all())
+    for name, engine in ENGINES.items():
+        results[f"engine.{name}.current_values"] = _timed(lambda: engine().current_values(cols, today=today), len(cols))
+        results[f"engine.{name}.projections"] = _timed(lambda: engine().projections(cols), len(cols))
+    return results
+
+
+def _consume(response):
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+        response.close()
+
+
+def _client(member):
+    # A fresh client and session per request: the logout routes flush the
+    # session, which would leave every later page logged out.
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = _session_keys([member])[0]
+    return client
+
+
+def _get(member, url):
+    client = _client(member)
+    started = time.perf_counter()
+    response = client.get(url)
+    _consume(response)
+    return response.status_code, time.perf_counter() - started
+
+
+def url_benchmarks(repeat):
+    # The member with the most purchases among the first thousand: a heavy
+    # but stable choice for the per-member pages.
+    member = max(Member.objects.order_by("id")[:1000], key=lambda m: (m.total_pv_units, -m.pk))
+    objects = {
+        "member": member,
+        "transaction": PVTransaction.objects.filter(member=member).order_by("id").first(),
+        "dividend": Dividend.objects.order_by("id").first(),
+        "dividend_run": DividendRun.objects.order_by("id").first(),
+    }
+    results = {}
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern):
+            continue
+        obj = objects.get(URL_KWARGS.get(pattern.name))
+        if pattern.name in URL_KWARGS and obj is None:
+            results[pattern.name] = {"skipped": f"no {URL_KWARGS[pattern.name]} in the data set"}
+            continue
+        url = reverse(pattern.name, kwargs={"pk": obj.pk} if obj is not None else None)
+
+        cache.clear()
+        client = _client(member)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            _consume(response)
+            cold = time.perf_counter() - started
+        # Read now: the next request's request_started clears the log the
+        # context slices lazily.
+        query_count = len(queries)
+
+        cache.clear()
+        client = _client(member)
+        tracemalloc.start()
+        _consume(client.get(url))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        warm = [_get(member, url)[1] for _ in range(repeat)]
+        results[pattern.name] = {
+            "url": url,
+            "status": response.status_code,
+            "cold_ms": round(cold * 1000, 3),
+            "queries": query_count,
+            "peak_kb": round(peak / 1024, 1),
+            "warm_median_ms": round(statistics.median(warm) * 1000, 3) if warm else None,
+            "warm_min_ms": round(min(warm) * 1000, 3) if warm else None,
+        }
+    return results
+
+
+def run_suite(scales, repeat=5, seed=42, log=None):
+    """
+    Benchmarks each scale in ascending order, adding synthetic members to
+    reach it (scales at or below the current member count run as is).
+    Returns the JSON-ready results.
+    """
+    log = log or (lambda message: None)
+    now = timezone.now()
+    results = {"environment": environment(seed, repeat), "scales": {}}
+    existing = Member.objects.count()
+    with tempfile.TemporaryDirectory() as certificate_dir, override_settings(PV_CERTIFICATE_DIR=certificate_dir):
+        for scale in sorted(set(scales)):
+            started = time.perf_counter()
+            if scale > existing:
+                synthetic.generate(scale - existing, seed=seed, start=existing, now=now)
+                existing = scale
+            generated = time.perf_counter() - started
+            log(f"{scale} members generated in {generated:.1f}s")
+
+            entry = {
+                "members": Member.objects.count(),
+                "transactions": PVTransaction.objects.count(),
+                "dividends": Dividend.objects.count(),
+                "generate_seconds": round(generated, 3),
+            }
+            entry["valuation"] = valuation_benchmarks()
+            log(f"{scale}: valuation functions timed")
+            entry["urls"] = url_benchmarks(repeat)
+            log(f"{scale}: {len(entry['urls'])} URLs timed")
+            results["scales"][str(scale)] = entry
+    return results
+
+
+# ---------------------------------------------------------
+#   SYNC VS ASYNC MEMBER PAGES
+# ---------------------------------------------------------
+#
+# Each page is requested three ways, from an empty cache each time:
+#   wsgi        the sync view through the WSGI handler, one request at a
+#               time (one sync worker thread);
+#   asgi-sync   the sync view through the ASGI handler, ``concurrency``
+#               requests in flight;
+#   asgi-async  the async view through the ASGI handler, likewise.
+# Dashboard requests cycle through ``sessions`` members; overview requests
+# walk its pages. Both versions of each page are routed side by side by a
+# temporary URLconf. SQLite answers in-process, so there is little waiting
+# for async to overlap; ``query_latency`` adds a sleep before each query to
+# stand in for the round trip to a database server.
+
+ASYNC_PAGES = {
+    "member_dashboard": (views.member_dashboard, views.member_dashboard_async),
+    "member_pv_overview": (views.member_pv_overview, views.member_pv_overview_async),
+}
+
+
+def _comparison_urlconf():
+    patterns = []
+    for name, (sync_view, async_view) in ASYNC_PAGES.items():
+        patterns.append(path(f"bench/sync/{name}/", sync_view))
+        patterns.append(path(f"bench/async/{name}/", async_view))
+    # A class, not a module: ROOT_URLCONF only needs a hashable object with urlpatterns.
+    return type("ComparisonURLConf", (), {"urlpatterns": patterns + [path("", include(settings.ROOT_URLCONF))]})
+
+
+def _session_keys(members):
+    keys = []
+    for member in members:
+        session = SessionStore()
+        session["member_id"] = member.pk
+        session["admin_user"] = True
+        session.create()
+        keys.append(session.session_key)
+    return keys
+
+
+def _latency_summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+    }
+
+
+def _run_wsgi(targets):
+    client = Client()
+    latencies = []
+    started = time.perf_counter()
+    for url, session_key in targets:
+        client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        t = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - t)
+        assert response.status_code == 200, (url, response.status_code)
+    return _latency_summary(latencies, time.perf_counter() - started)
+
+
+async def _run_asgi(targets, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def fetch(url, session_key):
+        async with limit:
+            client = AsyncClient()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            t = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - t)
+            assert response.status_code == 200, (url, response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(url, key) for url, key in targets))
+    return _latency_summary(latencies, time.perf_counter() - started)
+
+
+def _query_delay(seconds):
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+    return delay
+
+
+def async_comparison(requests=200, concurrency=20, sessions=50, query_latency=0.0):
+    """Throughput and latency of each page in each mode; see above."""
+    members = list(Member.objects.filter(total_pv_units__gt=0).order_by("id")[:sessions])
+    keys = _session_keys(members)
+    pages = max(1, Member.objects.count() // views.OVERVIEW_PAGE_SIZE)
+    results = {
+        "requests": requests, "concurrency": concurrency, "sessions": len(keys),
+        "query_latency_ms": query_latency * 1000, "pages": {},
+    }
+
+    delay = _query_delay(query_latency)
+
+    def add_delay(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    if query_latency:
+        connection_created.connect(add_delay)
+        for conn in connections.all(initialized_only=True):
+            add_delay(None, conn)
+    try:
+        _compare_pages(results, requests, concurrency, keys, pages)
+    finally:
+        connection_created.disconnect(add_delay)
+        for conn in connections.all(initialized_only=True):
+            if delay in conn.execute_wrappers:
+                conn.execute_wrappers.remove(delay)
+    return results
+
+
+def _compare_pages(results, requests, concurrency, keys, pages):
+    # Slow-query warnings would only report time spent waiting for the GIL.
+    with override_settings(ROOT_URLCONF=_comparison_urlconf(), PV_SLOW_QUERY_MS=float("inf")):
+        for name in ASYNC_PAGES:
+            def targets(kind):
+                for i in range(requests):
+                    url = f"/bench/{kind}/{name}/"
+                    if name == "member_pv_overview":
+                        url += f"?page={i % pages + 1}"
+                    yield url, keys[i % len(keys)]
+
+            entry = {}
+            cache.clear()
+            entry["wsgi"] = _run_wsgi(targets("sync"))
+            cache.clear()
+            entry["asgi-sync"] = asyncio.run(_run_asgi(targets("sync"), concurrency))
+            cache.clear()
+            entry["asgi-async"] = asyncio.run(_run_asgi(targets("async"), concurrency))
+            results["pages"][name] = entry
@@ -0,0 +1,246 @@
+import csv
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DatabaseError, connections, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import member_totals, search
+from .models import Dividend, Member, PVMonthlySnapshot, PVTransaction, generate_random_password
+
+
+# ---------------------------------------------------------
+#   STREAMING CSV IMPORT
+# ---------------------------------------------------------
+#
+# Rows are read lazily and handled ``chunk_size`` at a time: each chunk is
+# validated with one lookup query, written with bulk_create in its own
+# transaction; then the touched members' totals are incremented and their
+# snapshots invalidated. Bad rows are reported and skipped; only the first
+# MAX_REPORTED_REJECTS are kept so memory stays flat.
+#
+# Expected columns (header row required, extra columns ignored):
+#   members       full_name, email, phone_number, address
+#   transactions  member_code, pv_units, purchase_date (optional)
+#   dividends     member_code, amount, note (optional)
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_REJECTS = 1000
+
+
+class RowError(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.rejected = 0
+        self.rejects = []  # (line number, message), capped
+        self.chunk_rejected = set()
+
+    def reject(self, line, message):
+        self.rejected += 1
+        self.chunk_rejected.add(line)
+        if len(self.rejects) < MAX_REPORTED_REJECTS:
+            self.rejects.append((line, message))
+
+
+def _required(row, field):
+    value = (row.get(field) or "").strip()
+    if not value:
+        raise RowError(f"{field} is required.")
+    return value
+
+
+def _parse_purchase_date(value):
+    """Optional backdated purchase date (YYYY-MM-DD or ISO datetime)."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise RowError(f"purchase_date {value!r} is not a valid date.")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    if parsed > timezone.now():
+        raise RowError("purchase_date cannot be in the future.")
+    return parsed
+
+
+def _member_ids(rows):
+    codes = {(row.get("member_code") or "").strip() for _, row in rows}
+    return dict(Member.objects.filter(member_code__in=codes).values_list("member_code", "id"))
+
+
+def _refresh_members(deltas):
+    """
+    Applies the chunk's total increments and drops the touched members'
+    snapshots, so member_pv_overview values them live until the next
+    ``build_pv_snapshots`` run. Rebuilding every touched member's full
+    snapshot history per chunk would dominate the import.
+    """
+    if not deltas:
+        return
+    member_totals.add_many(deltas)
+    member_ids = list(deltas)
+    PVMonthlySnapshot.objects.filter(member_id__in=member_ids).delete()
+    Member.objects.filter(pk__in=member_ids).update(snapshots_through=None)
+
+
+def set_auto_datetimes(model, field_name, pairs):
+    """
+    Writes ``(obj, value)`` pairs to an auto_now_add field, which
+    bulk_create always overrides; one executemany instead of bulk_update's
+    slow CASE expression.
+    """
+    connection = connections[router.db_for_write(model)]
+    field = model._meta.get_field(field_name)
+    qn = connection.ops.quote_name
+    sql = f"UPDATE {qn(model._meta.db_table)} SET {qn(field.column)} = %s WHERE {qn('id')} = %s"
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(field.get_db_prep_value(value, connection), obj.pk) for obj, value in pairs])
+    for obj, value in pairs:
+        setattr(obj, field.attname, value)
+
+
+def _import_members(rows, result):
+    emails = {(row.get("email") or "").strip() for _, row in rows}
+    taken = set(Member.objects.filter(email__in=emails).values_list("email", flat=True))
+
+    members = []
+    for line, row in rows:
+        try:
+            full_name = _required(row, "full_name")
+            email = _required(row, "email")
+            try:
+                validate_email(email)
+            except ValidationError:
+                raise RowError(f"{email!r} is not a valid email.")
+            if email in taken:
+                raise RowError(f"Email {email} already exists.")
+        except RowError as e:
+            result.reject(line, str(e))
+            continue
+        taken.add(email)
+        members.append(Member(
+            full_name=full_name,
+            email=email,
+            phone_number=(row.get("phone_number") or "").strip(),
+            address=(row.get("address") or "").strip(),
+            password=generate_random_password(8),
+        ))
+
+    Member.assign_codes(members)
+    Member.objects.bulk_create(members)
+    search.index_members(members)
+    return len(members), {}
+
+
+def _import_transactions(rows, result):
+    member_ids = _member_ids(rows)
+
+    txs = []
+    backdated = []
+    for line, row in rows:
+        try:
+            code = _required(row, "member_code")
+            if code not in member_ids:
+                raise RowError(f"Unknown member_code {code}.")
+            try:
+                units = int(_required(row, "pv_units"))
+            except ValueError:
+                raise RowError("pv_units must be a whole number.")
+            if units <= 0:
+                raise RowError("pv_units must be positive.")
+            purchase_date = _parse_purchase_date(row.get("purchase_date"))
+        except RowError as e:
+            result.reject(line, str(e))
+            continue
+        tx = PVTransaction(member_id=member_ids[code], pv_units=units)
+        txs.append(tx)
+        if purchase_date is not None:
+            backdated.append((tx, purchase_date))
+
+    PVTransaction.objects.bulk_create(txs)
+    if backdated:
+        set_auto_datetimes(PVTransaction, "purchase_date", backdated)
+
+    deltas = {}
+    for tx in txs:
+        units, invested, dividends = deltas.get(tx.member_id, (0, Decimal("0.00"), Decimal("0.00")))
+        deltas[tx.member_id] = (
+            units + tx.pv_units, invested + member_totals.invested_value(tx.pv_units, tx.purchase_date), dividends
+        )
+    return len(txs), deltas
+
+
+def _import_dividends(rows, result):
+    member_ids = _member_ids(rows)
+
+    dividends = []
+    for line, row in rows:
+        try:
+            code = _required(row, "member_code")
+            if code not in member_ids:
+                raise RowError(f"Unknown member_code {code}.")
+            try:
+                amount = Decimal(_required(row, "amount"))
+            except InvalidOperation:
+                raise RowError("amount must be a number.")
+            if not amount.is_finite() or amount.as_tuple().exponent < -2 or abs(amount) >= Decimal("1e10"):
+                raise RowError("amount must have at most 10 digits and 2 decimals.")
+        except RowError as e:
+            result.reject(line, str(e))
+            continue
+        dividends.append(Dividend(member_id=member_ids[code], amount=amount, note=(row.get("note") or "").strip()))
+
+    Dividend.objects.bulk_create(dividends)
+
+    deltas = {}
+    for d in dividends:
+        units, invested, total = deltas.get(d.member_id, (0, Decimal("0.00"), Decimal("0.00")))
+        deltas[d.member_id] = (units, invested, total + d.amount)
+    return len(dividends), deltas
+
+
+IMPORTERS = {
+    "members": _import_members,
+    "transactions": _import_transactions,
+    "dividends": _import_dividends,
+}
+
+
+def import_csv(kind, lines, chunk_size=CHUNK_SIZE):
+    """
+    Imports ``kind`` rows from an iterable of CSV text lines (an open text
+    file works). Returns an ImportResult; rejected rows never abort the run.
+    """
+    importer = IMPORTERS[kind]
+    result = ImportResult()
+    reader = csv.DictReader(lines)
+    numbered = ((reader.line_num, row) for row in reader)
+
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+        result.chunk_rejected = set()
+        try:
+            with transaction.atomic():
+                created, deltas = importer(chunk, result)
+                _refresh_members(deltas)
+        except DatabaseError as e:
+            for line, _ in chunk:
+                if line not in result.chunk_rejected:
+                    result.reject(line, f"Chunk rolled back: {e}")
+            continue
+        result.created += created
+    return result
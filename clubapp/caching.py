@@ -0,0 +1,75 @@
+from datetime import datetime, time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import rates
+
+
+# ---------------------------------------------------------
+#   VERSIONED CACHE FOR COMPUTED VIEWS
+# ---------------------------------------------------------
+#
+# Keys name what they depend on, so nothing is ever deleted explicitly:
+#
+#   <name>:<valuation month>:<schedule>:m<member id>:v<Member.data_version>:<parts>
+#
+# data_version is bumped (by signals.py / member_totals.py) on every write
+# to the member, its transactions or its dividends, the valuation month
+# ("2026-10") changes at month rollover, when current values move on, and
+# the schedule fingerprint changes with the rate schedule (rates.py). Any
+# change makes the old entries unreachable; they expire at the end of the
+# month. Works with any Django cache backend (locmem and file-based on a
+# single box).
+
+_MISSING = object()
+
+
+def valuation_month(now=None):
+    """The month current valuations are computed for, e.g. "2026-10"."""
+    now = timezone.localtime(now)
+    return f"{now.year}-{now.month:02d}"
+
+
+def seconds_to_rollover(now=None):
+    """Seconds until the next month starts (local time), at least 1."""
+    now = timezone.localtime(now)
+    year, month = (now.year + 1, 1) if now.month == 12 else (now.year, now.month + 1)
+    rollover = timezone.make_aware(datetime.combine(datetime(year, month, 1), time.min))
+    return max(1, int((rollover - now).total_seconds()))
+
+
+def global_key(name, *parts, now=None):
+    return ":".join([name, valuation_month(now), rates.get().fingerprint, *map(str, parts)])
+
+
+def member_key(name, member_id, version, *parts, now=None):
+    return global_key(name, f"m{member_id}", f"v{version}", *parts, now=now)
+
+
+def get_or_set(key, compute, timeout=None):
+    """Cached value for ``key``, computing and storing it on a miss."""
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value, seconds_to_rollover() if timeout is None else timeout)
+    return value
+
+
+def get_many_or_set(keys, compute, timeout=None):
+    """
+    ``keys`` maps ids to cache keys; ``compute(missing_ids)`` returns
+    ``{id: value}`` for the ids not in the cache. One get_many and at most
+    one set_many round trip. Returns ``{id: value}`` for every id.
+    """
+    found = cache.get_many(list(keys.values()))
+    values = {pk: found[key] for pk, key in keys.items() if key in found}
+    missing = [pk for pk in keys if pk not in values]
+    if missing:
+        computed = compute(missing)
+        cache.set_many(
+            {keys[pk]: computed[pk] for pk in missing},
+            seconds_to_rollover() if timeout is None else timeout,
+        )
+        values.update(computed)
+    return values
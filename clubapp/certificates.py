@@ -0,0 +1,168 @@
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import money, pdf
+from .valuation import base_price_fixed
+
+
+# ---------------------------------------------------------
+#   PDF CERTIFICATES
+# ---------------------------------------------------------
+#
+# One PDF per PVTransaction, stored under settings.PV_CERTIFICATE_DIR at a
+# path derived from the SHA-256 of everything printed on it (plus
+# LAYOUT_VERSION). An unchanged certificate is never rendered twice; editing
+# the member or the transaction changes the hash, so the next download
+# renders a fresh file. The issue date printed is the purchase date, which
+# keeps the content fixed. Rendering needs only the field dict, so
+# render_many() can fan out to worker processes that never touch the
+# database. A name or address the PDF fonts cannot show (pdf.py) has no
+# PDF; the member gets the HTML certificate instead.
+
+LAYOUT_VERSION = 1  # bump when the drawing below changes
+
+NAVY = (15, 60, 138)
+GOLD = (201, 164, 79)
+GREY = (107, 114, 128)
+INK = (17, 24, 39)
+PAPER = (255, 252, 245)
+
+
+def certificate_dir():
+    return getattr(settings, "PV_CERTIFICATE_DIR", os.path.join(settings.MEDIA_ROOT, "certificates"))
+
+
+def certificate_fields(tx):
+    """Everything printed on ``tx``'s certificate (``tx.member`` is used)."""
+    member = tx.member
+    buy_value = tx.pv_units * base_price_fixed(tx.purchase_date.year)
+    return {
+        "transaction_id": tx.pk,
+        "member_id": member.pk,
+        "member_code": member.member_code,
+        "full_name": member.full_name,
+        "address": member.address,
+        "pv_units": tx.pv_units,
+        "issued_on": timezone.localdate(tx.purchase_date).isoformat(),
+        "buy_pv_value": money.to_text(buy_value),
+    }
+
+
+def pdf_supported(fields):
+    return all(pdf.supports(fields[name]) for name in ("member_code", "full_name", "address"))
+
+
+def content_hash(fields):
+    payload = json.dumps({"layout": LAYOUT_VERSION, **fields}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def certificate_path(fields, directory=None):
+    digest = content_hash(fields)
+    return os.path.join(directory or certificate_dir(), digest[:2], f"{digest}.pdf")
+
+
+def render_pdf(fields):
+    page = pdf.Page()
+    width, height = page.width, page.height
+    centre = width / 2
+
+    page.rect(0, 0, width, height, line_width=0, color=PAPER, fill=PAPER)
+    page.rect(24, 24, width - 48, height - 48, line_width=5, color=NAVY)
+    page.rect(34, 34, width - 68, height - 68, line_width=1, color=GOLD)
+
+    page.text(centre, height - 90, "OFFICIAL MEMBER DOCUMENT", size=11, color=GREY, align="center")
+    page.line(centre - 150, height - 102, centre + 150, height - 102, line_width=2, color=GOLD)
+    page.text(centre, height - 150, "Certificate", size=40, bold=True, color=NAVY, align="center")
+    page.text(centre, height - 178, "of Authenticity", size=16, color=GOLD, align="center")
+
+    page.text(centre, height - 220, "This is to certify that", size=13, color=GREY, align="center")
+    page.text(centre, height - 256, fields["full_name"], size=28, bold=True, color=INK, align="center")
+    page.line(centre - 200, height - 266, centre + 200, height - 266, color=(229, 231, 235))
+    page.text(centre, height - 290, "has been officially verified as a registered member.", size=13,
+              color=GREY, align="center")
+
+    page.text(centre - 160, height - 335, "MEMBER ID", size=9, color=GREY, align="center")
+    page.text(centre - 160, height - 355, fields["member_code"], size=15, bold=True, color=NAVY, align="center")
+    page.text(centre + 160, height - 335, "REGISTERED ADDRESS", size=9, color=GREY, align="center")
+    page.text(centre + 160, height - 355, fields["address"] or "-", size=12, color=NAVY, align="center")
+
+    page.rect(centre - 150, 120, 300, 70, line_width=2, color=GOLD)
+    page.text(centre, 168, "ORIGINAL PV VALUE", size=10, color=(133, 77, 14), align="center")
+    page.text(centre, 138, f"{fields['buy_pv_value']} PV", size=22, bold=True, color=NAVY, align="center")
+
+    page.text(70, 78, f"ISSUED ON: {fields['issued_on']}", size=9, color=GREY)
+    page.text(70, 64, f"REF: {fields['member_code']}-{fields['member_id']:04d}-T{fields['transaction_id']}",
+              size=9, color=GREY)
+    page.line(width - 250, 80, width - 70, 80, color=GREY)
+    page.text(width - 160, 64, "Authorized Signature", size=9, color=GREY, align="center")
+
+    return page.to_bytes(title=f"Certificate {fields['member_code']} T{fields['transaction_id']}")
+
+
+def write_certificate(fields, directory=None):
+    """
+    Renders ``fields`` to its content-addressed path unless it exists and
+    returns ``(path, rendered)``. Files appear atomically, so concurrent
+    writers of the same certificate are harmless.
+    """
+    path = certificate_path(fields, directory)
+    if os.path.exists(path):
+        return path, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(render_pdf(fields))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path, True
+
+
+def certificate_for(tx):
+    """Path of ``tx``'s PDF, rendering it on first use."""
+    return write_certificate(certificate_fields(tx))[0]
+
+
+def render_many(field_dicts, workers=None, directory=None, batch_size=500):
+    """
+    Writes certificates for an iterable of field dicts in a process pool
+    (``workers`` processes, all CPUs by default; 1 renders in-process),
+    ``batch_size`` at a time so memory stays flat. Certificates already on
+    disk, and those the PDF fonts cannot print, are skipped without leaving
+    this process. Returns ``(rendered, already_cached, html_only)``.
+    """
+    directory = directory or certificate_dir()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    rendered = cached = html_only = 0
+    try:
+        batch = []
+        for fields in itertools.chain(field_dicts, [None]):
+            if fields is not None:
+                if not pdf_supported(fields):
+                    html_only += 1
+                elif os.path.exists(certificate_path(fields, directory)):
+                    cached += 1
+                else:
+                    batch.append(fields)
+                if len(batch) < batch_size:
+                    continue
+            if pool is None:
+                results = (write_certificate(f, directory) for f in batch)
+            else:
+                results = pool.map(write_certificate, batch, [directory] * len(batch), chunksize=16)
+            rendered += sum(done for _, done in results)
+            batch = []
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return rendered, cached, html_only
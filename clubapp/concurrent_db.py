@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+# ---------------------------------------------------------
+#   DATABASE WORK FROM ASYNC VIEWS
+# ---------------------------------------------------------
+#
+# Django's async ORM methods (aget, afirst, ...) all run on one thread per
+# request, so awaiting two of them with asyncio.gather() still runs them
+# one after the other. in_thread() runs a sync callable in the shared pool
+# instead; each pool thread has its own connection, so independent queries
+# really overlap, and valuation and rendering stay off the event loop.
+# Connections are opened and closed around each call the way Django does
+# around a request, so CONN_MAX_AGE applies to pool threads too.
+
+
+def _call(fn, args):
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+def in_thread(fn, *args):
+    """Awaitable running ``fn(*args)`` in a pool thread, concurrently with other calls."""
+    return sync_to_async(_call, thread_sensitive=False)(fn, args)
@@ -0,0 +1,250 @@
+import contextvars
+import fnmatch
+import sqlite3
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# ---------------------------------------------------------
+#   READ REPLICA ROUTING
+# ---------------------------------------------------------
+#
+# Reporting pages (the overview grid and its exports, the admin lists) only
+# read, and on a busy day they are what holds the SQLite file while
+# purchases wait to write. With a second database configured under
+# settings.PV_REPLICA_ALIAS (a streamed replica, or a snapshot file kept
+# fresh by the refresh_replica command), ReplicaRoutingMiddleware marks
+# GET/HEAD requests to the views named in PV_REPLICA_VIEWS (fnmatch
+# patterns on the URL name), and ReplicaRouter sends their reads of
+# PV_REPLICA_APPS models there. Everything else, and every write, stays on
+# the primary; sessions and auth are always read from the primary, so a
+# stale replica cannot log anyone out.
+#
+# A replica is behind the primary by up to a refresh. To keep a user from
+# missing their own change, any unsafe request (a form post) sets a short
+# cookie that keeps that browser on the primary for
+# PV_REPLICA_PIN_SECONDS.
+#
+# Without a replica configured (PV_REPLICA_ALIAS unset or not in
+# DATABASES) the router and middleware change nothing.
+
+PIN_COOKIE = "pv_primary"
+
+_route = contextvars.ContextVar("clubapp_replica_route", default=None)
+
+
+def replica_alias():
+    """The replica's alias when one is configured, else None."""
+    alias = getattr(settings, "PV_REPLICA_ALIAS", None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def routes_to_replica(view_name):
+    return any(fnmatch.fnmatchcase(view_name, pattern) for pattern in settings.PV_REPLICA_VIEWS)
+
+
+class _Route:
+    __slots__ = ("alias",)
+
+    def __init__(self):
+        self.alias = None
+
+
+class ReplicaRoutingMiddleware:
+    """Marks reporting requests for ReplicaRouter; see the notes above."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        route = _Route()
+        token = _route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+        return self._pin(request, _keep_route(response, route))
+
+    async def __acall__(self, request):
+        # Pool threads started by the view (concurrent_db.in_thread) inherit
+        # the context, so their reads are routed too.
+        route = _Route()
+        token = _route.set(route)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _route.reset(token)
+        return self._pin(request, _keep_route(response, route))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = _route.get()
+        alias = replica_alias()
+        if (
+            route is not None and alias and request.method in ("GET", "HEAD")
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match is not None
+            and routes_to_replica(request.resolver_match.view_name)
+        ):
+            route.alias = alias
+
+    def _pin(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS") and replica_alias():
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.PV_REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
+
+
+def _keep_route(response, route):
+    # A streaming body (the overview CSV export) runs its queries while the
+    # server iterates it, after the view has returned, so each chunk is
+    # produced with the request's route set again.
+    if not route.alias or not getattr(response, "streaming", False):
+        return response
+    if response.is_async:
+        response.streaming_content = _routed_async(response.streaming_content, route)
+    else:
+        response.streaming_content = _routed(response.streaming_content, route)
+    return response
+
+
+def _routed(content, route):
+    iterator = iter(content)
+    while True:
+        token = _route.set(route)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _route.reset(token)
+        yield chunk
+
+
+async def _routed_async(content, route):
+    iterator = aiter(content)
+    while True:
+        token = _route.set(route)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _route.reset(token)
+        yield chunk
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        if route is not None and route.alias and model._meta.app_label in settings.PV_REPLICA_APPS:
+            return route.alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit: left to Django, saving an object read from the replica
+        # would write to the replica.
+        return DEFAULT_DB_ALIAS if replica_alias() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = replica_alias()
+        if alias and {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema with its data (refresh_replica).
+        if db == replica_alias():
+            return False
+        return None
+
+
+def refresh_replica(alias=None, source=DEFAULT_DB_ALIAS):
+    """
+    Copies the ``source`` SQLite database into the replica's file with
+    SQLite's online backup, which readers of the source never wait for.
+    Returns the number of pages copied.
+    """
+    alias = alias or replica_alias()
+    if not alias:
+        raise ValueError("No replica database is configured (settings.PV_REPLICA_ALIAS).")
+    src = connections[source]
+    if src.in_atomic_block:
+        # The backup would wait forever on the connection's own write lock.
+        raise ValueError("The replica cannot be refreshed inside a transaction on the source.")
+    connections[alias].close()  # reopened, on the new copy, at the next query
+    src.ensure_connection()
+    target = sqlite3.connect(str(connections[alias].settings_dict["NAME"]))
+    pages = [0]
+
+    def progress(status, remaining, total):
+        pages[0] = total
+
+    try:
+        src.connection.backup(target, progress=progress)
+    finally:
+        target.close()
+    return pages[0]
+
+
+# ---------------------------------------------------------
+#   SQLITE CONNECTION PROFILE
+# ---------------------------------------------------------
+#
+# settings.PV_SQLITE_PRAGMAS is applied to every new SQLite connection.
+# The defaults: a larger page cache and temp tables in memory. Databases
+# in WAL mode also get PV_SQLITE_WAL_PRAGMAS: synchronous=NORMAL, which
+# with WAL is still crash-safe and skips an fsync per commit, but with a
+# rollback journal can corrupt the file on power loss, so it is never
+# applied there. Together with CONN_MAX_AGE (persistent connections) and
+# IMMEDIATE transactions in DATABASES, a burst of purchases queues on the
+# busy timeout instead of failing with "database is locked".
+#
+# WAL itself, so readers and the writer no longer block each other, is a
+# property of the database file rather than the connection: setting it
+# per connection would rewrite any database a command merely opens (a
+# checked-in development database included). It is enabled once per
+# deployment with `manage.py enable_wal` (enable_wal() below).
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, "PV_SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.execute("PRAGMA journal_mode")
+        if cursor.fetchone()[0].lower() == "wal":
+            _apply_wal_pragmas(cursor)
+
+
+def _apply_wal_pragmas(cursor):
+    for name, value in getattr(settings, "PV_SQLITE_WAL_PRAGMAS", {}).items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def enable_wal(alias=DEFAULT_DB_ALIAS):
+    """Switches the ``alias`` SQLite database file to WAL; returns the journal mode now in effect."""
+    connection = connections[alias]
+    if connection.vendor != "sqlite":
+        raise ValueError(f"Database {alias!r} is not SQLite.")
+    if connection.in_atomic_block:
+        raise ValueError("The journal mode cannot be changed inside a transaction.")
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = WAL")
+        mode = cursor.fetchone()[0]
+        if mode.lower() == "wal":
+            _apply_wal_pragmas(cursor)
+        return mode
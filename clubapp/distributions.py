@@ -0,0 +1,147 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import member_totals, money
+from .batch_valuation import TransactionColumns, get_engine
+from .models import Dividend, DividendRun, PVTransaction
+
+
+# ---------------------------------------------------------
+#   PROPORTIONAL DIVIDEND DISTRIBUTION RUNS
+# ---------------------------------------------------------
+#
+# A DividendRun splits a payout pool across every member in proportion to
+# what they held at the end of the record date: PV units, or current value
+# (the dashboard's valuation, as of that date). Shares are computed in whole
+# paise with integer arithmetic and the largest-remainder method, so they
+# always add up to the pool exactly and the same run always gives the same
+# split; leftover paise go to the largest remainders, ties to the lower
+# member id.
+#
+# preview() only reads. commit() writes every Dividend with bulk_create and
+# applies all member totals in one executemany, inside one transaction; it
+# is a few queries whatever the member count. rollback() deletes the run's
+# rows and reverses the totals by what is actually in them, so a row edited
+# after the commit is undone correctly.
+
+BATCH_SIZE = 2000
+PREVIEW_ROWS = 20
+
+
+class DistributionError(Exception):
+    pass
+
+
+def _cutoff(record_date):
+    """Start of the day after ``record_date``: holdings are end of day."""
+    return timezone.make_aware(datetime.combine(record_date + timedelta(days=1), time.min))
+
+
+def holdings(record_date, basis):
+    """``{member_id: weight}``: units held, or value held in paise."""
+    purchases = PVTransaction.objects.filter(purchase_date__lt=_cutoff(record_date))
+    if basis == DividendRun.BASIS_UNITS:
+        rows = purchases.values("member_id").annotate(units=Sum("pv_units")).order_by().values_list(
+            "member_id", "units"
+        )
+        return {member_id: units for member_id, units in rows if units}
+
+    rows = list(purchases.values_list("member_id", "id", "pv_units", "purchase_date"))
+    if not rows:
+        return {}
+    member_ids, *columns = zip(*rows)
+    values = get_engine().current_values(TransactionColumns(*columns), today=record_date)
+    weights = {}
+    for member_id, value in zip(member_ids, values):
+        weights[member_id] = weights.get(member_id, 0) + value
+    return {member_id: money.paise(value) for member_id, value in weights.items() if value > 0}
+
+
+def allocate(pool, weights):
+    """``{member_id: Decimal share}`` of ``pool`` by ``weights``; members getting 0.00 are left out."""
+    pool_paise = int(Decimal(pool) * 100)
+    total = sum(weights.values())
+    if pool_paise <= 0 or total <= 0:
+        return {}
+    shares, remainders = {}, []
+    for member_id, weight in weights.items():
+        shares[member_id], remainder = divmod(pool_paise * weight, total)
+        remainders.append((-remainder, member_id))
+    leftover = pool_paise - sum(shares.values())
+    for _, member_id in sorted(remainders)[:leftover]:
+        shares[member_id] += 1
+    return {member_id: Decimal(paise) / 100 for member_id, paise in shares.items() if paise}
+
+
+def preview(run):
+    """Summary of what committing ``run`` would write now."""
+    weights = holdings(run.record_date, run.basis)
+    shares = allocate(run.pool, weights)
+    amounts = sorted(shares.values())
+    largest = sorted(shares.items(), key=lambda item: (-item[1], item[0]))[:PREVIEW_ROWS]
+    return {
+        "member_count": len(shares),
+        "eligible_count": len(weights),
+        "total": sum(amounts, Decimal("0.00")),
+        "smallest": amounts[0] if amounts else None,
+        "largest": amounts[-1] if amounts else None,
+        "median": amounts[len(amounts) // 2] if amounts else None,
+        "top": largest,
+    }
+
+
+def dividend_note(run):
+    return run.note or f"Distribution #{run.pk} ({run.record_date:%d %b %Y})"
+
+
+def commit(run):
+    """Writes ``run``'s dividends and updates member totals, all or nothing."""
+    with transaction.atomic():
+        # Compare-and-set on the status: a second commit of the same run
+        # (double submit, two admins) matches no row and stops here.
+        claimed = DividendRun.objects.filter(pk=run.pk, status=DividendRun.PREVIEW).update(
+            status=DividendRun.COMMITTED, committed_at=timezone.now()
+        )
+        if not claimed:
+            raise DistributionError("Only a run in preview can be committed.")
+        shares = allocate(run.pool, holdings(run.record_date, run.basis))
+        if not shares:
+            raise DistributionError("No member held anything on the record date.")
+
+        note = dividend_note(run)
+        Dividend.objects.bulk_create(
+            (Dividend(member_id=member_id, amount=amount, note=note, run=run) for member_id, amount in shares.items()),
+            batch_size=BATCH_SIZE,
+        )
+        member_totals.add_many({member_id: (0, 0, amount) for member_id, amount in shares.items()})
+
+        total = sum(shares.values(), Decimal("0.00"))
+        DividendRun.objects.filter(pk=run.pk).update(member_count=len(shares), distributed=total)
+    run.refresh_from_db()
+    return run
+
+
+def rollback(run):
+    """Deletes ``run``'s dividends and reverses them in member totals."""
+    with transaction.atomic():
+        claimed = DividendRun.objects.filter(pk=run.pk, status=DividendRun.COMMITTED).update(
+            status=DividendRun.ROLLED_BACK, rolled_back_at=timezone.now()
+        )
+        if not claimed:
+            raise DistributionError("Only a committed run can be rolled back.")
+        deltas = {}
+        for member_id, amount in Dividend.objects.filter(run=run).values_list("member_id", "amount"):
+            deltas[member_id] = (0, 0, deltas.get(member_id, (0, 0, 0))[2] - amount)
+        # Raw DELETE: a queryset delete() would fire post_delete, and with it
+        # a totals UPDATE, once per row.
+        connection = connections[router.db_for_write(Dividend)]
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {qn(Dividend._meta.db_table)} WHERE {qn('run_id')} = %s", [run.pk])
+        member_totals.add_many(deltas)
+    run.refresh_from_db()
+    return run
@@ -0,0 +1,107 @@
+import csv
+import tempfile
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, StreamingHttpResponse
+
+from . import money, snapshots
+from .valuation import get_effective_date
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl is optional; only the xlsx export needs it.
+    Workbook = None
+
+
+# ---------------------------------------------------------
+#   PV OVERVIEW EXPORT
+# ---------------------------------------------------------
+#
+# The member_pv_overview grid for every matching member, one row per
+# member. Members are read with QuerySet.iterator() and valued
+# EXPORT_CHUNK_SIZE at a time (one snapshot query and one transaction
+# query per chunk), so memory stays flat however many members match.
+# CSV is streamed as it is produced; XLSX is written row by row with
+# openpyxl's write-only workbook to a temporary file, then streamed.
+
+EXPORT_CHUNK_SIZE = 500
+FORMATS = ("csv", "xlsx")
+MONTH_LABELS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def header_row():
+    row = ["Member Code", "Full Name", "Join Date", "Total PV"]
+    for label in MONTH_LABELS:
+        row += [f"{label} PV", f"{label} Value"]
+    return row + ["Year-end PV", "Year-end Value"]
+
+
+def overview_rows(members_qs, year, chunk_size=None):
+    """
+    Yields the header and then one list per member: the same cells the
+    HTML grid shows, with blanks where it shows "-" and unformatted values.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    yield header_row()
+    members = members_qs.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(members, chunk_size))
+        if not chunk:
+            break
+        grids = snapshots.grids_for(chunk, year)
+        for member in chunk:
+            yield _member_row(member, grids[member.id], year)
+
+
+def _member_row(member, grid, year):
+    raw_date = member.join_date.date() if hasattr(member.join_date, "date") else member.join_date
+    effective_join = get_effective_date(raw_date)
+    join_month_score = (effective_join.year * 12) + effective_join.month
+
+    row = [member.member_code, member.full_name, effective_join.isoformat(), member.total_pv_units]
+    year_end = ["", ""]
+    for m_idx, cell in enumerate(grid, start=1):
+        if (year * 12) + m_idx < join_month_score or cell is None:
+            row += ["", ""]
+            continue
+        m_pv, m_val = cell
+        row += [m_pv, money.to_float(m_val)]
+        if m_idx == 12 and m_pv:
+            year_end = [m_pv, money.to_float(m_val)]
+    return row + year_end
+
+
+class _Echo:
+    """File-like object whose write() returns the line for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(members_qs, year):
+    writer = csv.writer(_Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in overview_rows(members_qs, year)),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = f'attachment; filename="pv_overview_{year}.csv"'
+    return response
+
+
+def xlsx_response(members_qs, year):
+    if Workbook is None:
+        raise ImproperlyConfigured("XLSX export requires openpyxl.")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(f"PV {year}")
+    for row in overview_rows(members_qs, year):
+        sheet.append(row)
+    tmp = tempfile.TemporaryFile()
+    workbook.save(tmp)
+    tmp.seek(0)
+    return FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=f"pv_overview_{year}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
@@ -0,0 +1,252 @@
+import bisect
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+#   REQUEST METRICS
+# ---------------------------------------------------------
+#
+# RequestMetricsMiddleware times every request and files it under its URL
+# name, together with the number and total time of the SQL queries it ran
+# and the time spent rendering templates. Queries are counted by an execute
+# wrapper installed on each connection as it opens; templates by the
+# TimedDjangoTemplates backend. Both look up the request being measured in
+# a context variable, so outside a request they cost one lookup.
+#
+# Latencies go into a fixed log-scale histogram (buckets 20% apart), so
+# recording is a bisect and a few additions, memory is constant per view
+# and percentiles are accurate to a bucket. Each process aggregates in
+# memory and merges its counts into the cache every
+# PV_METRICS_FLUSH_SECONDS; with a shared cache (PV_CACHE_DIR) the admin
+# panel sees all workers. Two workers flushing at the same instant can lose
+# one interval of counts, which is fine for monitoring.
+#
+# Queries slower than PV_SLOW_QUERY_MS are logged to "clubapp.instrumentation"
+# at WARNING with the view name and SQL.
+
+BUCKETS = [round(0.5 * 1.2 ** i, 3) for i in range(66)]  # upper bounds in ms, 0.5 ms .. ~80 s
+CACHE_KEY = "request-metrics:v1"
+UNRESOLVED = "<unresolved>"
+
+_current = contextvars.ContextVar("clubapp_request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("view", "queries", "query_ms", "template_ms")
+
+    def __init__(self, view=UNRESOLVED):
+        self.view = view
+        self.queries = 0
+        self.query_ms = 0.0
+        self.template_ms = 0.0
+
+
+def _empty_stats():
+    return {
+        "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+        "queries": 0, "query_ms": 0.0, "template_ms": 0.0,
+        "histogram": [0] * (len(BUCKETS) + 1),
+    }
+
+
+def _merge(into, stats):
+    for field in ("count", "errors", "total_ms", "queries", "query_ms", "template_ms"):
+        into[field] += stats[field]
+    into["max_ms"] = max(into["max_ms"], stats["max_ms"])
+    into["histogram"] = [a + b for a, b in zip(into["histogram"], stats["histogram"])]
+
+
+def percentile(stats, fraction):
+    """Upper bound (ms) of the bucket holding the ``fraction`` quantile, capped at the maximum seen."""
+    if not stats["count"]:
+        return None
+    rank = fraction * stats["count"]
+    seen = 0
+    for i, n in enumerate(stats["histogram"]):
+        seen += n
+        if seen >= rank and n:
+            bound = BUCKETS[i] if i < len(BUCKETS) else stats["max_ms"]
+            return min(bound, stats["max_ms"])
+    return stats["max_ms"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, view, elapsed_ms, metrics, status_code):
+        with self._lock:
+            stats = self._pending.get(view)
+            if stats is None:
+                stats = self._pending[view] = _empty_stats()
+            stats["count"] += 1
+            stats["errors"] += status_code >= 500
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["queries"] += metrics.queries
+            stats["query_ms"] += metrics.query_ms
+            stats["template_ms"] += metrics.template_ms
+            stats["histogram"][bisect.bisect_left(BUCKETS, elapsed_ms)] += 1
+            due = time.monotonic() - self._last_flush >= settings.PV_METRICS_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Merges this process's counts into the cache."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        stored = cache.get(CACHE_KEY) or {}
+        for view, stats in pending.items():
+            if view in stored:
+                _merge(stored[view], stats)
+            else:
+                stored[view] = stats
+        cache.set(CACHE_KEY, stored, None)
+
+    def collected(self):
+        """``{view name: stats}`` over every process since the last reset."""
+        self.flush()
+        return cache.get(CACHE_KEY) or {}
+
+    def reset(self):
+        with self._lock:
+            self._pending = {}
+        cache.delete(CACHE_KEY)
+
+
+registry = MetricsRegistry()
+
+
+def summary():
+    """Rows for the admin panel, slowest p95 first."""
+    rows = []
+    for view, stats in registry.collected().items():
+        count = stats["count"]
+        rows.append({
+            "view": view,
+            "count": count,
+            "errors": stats["errors"],
+            "p50": percentile(stats, 0.50),
+            "p95": percentile(stats, 0.95),
+            "p99": percentile(stats, 0.99),
+            "max": stats["max_ms"],
+            "mean_ms": stats["total_ms"] / count,
+            "queries": stats["queries"] / count,
+            "query_ms": stats["query_ms"] / count,
+            "template_ms": stats["template_ms"] / count,
+        })
+    rows.sort(key=lambda row: (-row["p95"], row["view"]))
+    return rows
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        metrics.queries += 1
+        metrics.query_ms += elapsed
+        if elapsed >= settings.PV_SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed, metrics.view, sql)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Fires again whenever the same connection object reconnects.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class RequestMetricsMiddleware:
+    """Times each request; see the notes at the top of this module."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.PV_METRICS_ENABLED:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        registry.record(metrics.view, (time.perf_counter() - started) * 1000, metrics, response.status_code)
+        return response
+
+    async def __acall__(self, request):
+        # Pool threads started by the view (concurrent_db.in_thread) inherit
+        # the context, so their queries are counted too.
+        if not settings.PV_METRICS_ENABLED:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        registry.record(metrics.view, (time.perf_counter() - started) * 1000, metrics, response.status_code)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Name the request before the view runs, for the slow-query log.
+        metrics = _current.get()
+        if metrics is not None and request.resolver_match is not None:
+            metrics.view = request.resolver_match.view_name
+
+
+class _TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing each top-level render for
+    RequestMetricsMiddleware. Queries run by lazy querysets while rendering
+    count towards both template and query time.
+    """
+
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from clubapp import benchmarks, synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the sync and async member_dashboard / member_pv_overview under "
+        "the WSGI and ASGI handlers, on synthetic data in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=2000, help="Synthetic members to generate.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per page and mode.")
+        parser.add_argument("--concurrency", type=int, default=20, help="ASGI requests in flight.")
+        parser.add_argument(
+            "--query-latency", type=float, default=0.0,
+            help="Milliseconds to sleep before each query, standing in for a database server's round trip.",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Synthetic data seed.")
+        parser.add_argument("--output", help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            synthetic.generate(options["members"], seed=options["seed"])
+            results = benchmarks.async_comparison(
+                options["requests"], options["concurrency"], query_latency=options["query_latency"] / 1000
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+        for page, modes in results["pages"].items():
+            for mode, r in modes.items():
+                self.stdout.write(
+                    f"{page:<20} {mode:<11} {r['requests_per_second']:>8.1f} req/s  "
+                    f"p50 {r['p50_ms']:>8.1f} ms  p95 {r['p95_ms']:>8.1f} ms"
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['requests']} requests per page and mode, {options['concurrency']} in flight under ASGI."
+        ))
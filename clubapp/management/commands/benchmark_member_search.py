@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from clubapp import search
+from clubapp.models import Member, generate_random_password
+
+
+FIRST_NAMES = [
+    "Aarav", "Anil", "Anjali", "Arjun", "Deepa", "Divya", "Gopal", "Kavya", "Lakshmi", "Manoj",
+    "Meera", "Nikhil", "Priya", "Rahul", "Ravi", "Sanjay", "Sneha", "Suresh", "Vidya", "Vijay",
+]
+LAST_NAMES = [
+    "Iyer", "Kumar", "Menon", "Nair", "Pillai", "Rao", "Reddy", "Sharma", "Shetty", "Varma",
+    "Warrier", "Kurup", "Panicker", "Thomas", "Joseph", "George", "Mathew", "Krishnan", "Das", "Bhat",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Times member search through the FTS5 index against the old icontains "
+        "filter, as a paginated list page runs it (first page + count). With "
+        "--members, synthetic members are added first and rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=0, help="Synthetic members to add for the run.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query.")
+        parser.add_argument("queries", nargs="*", help="Search strings (default: a few names and codes).")
+
+    def handle(self, *args, **options):
+        if not search.is_available(Member.objects.db):
+            raise CommandError("The member search index is missing; run migrate on SQLite with FTS5.")
+
+        with transaction.atomic():
+            if options["members"]:
+                self._seed(options["members"])
+            total = Member.objects.count()
+            queries = options["queries"] or ["Priya", "nai", "Kavya Me", "M0042", "12345", "zzz"]
+
+            self.stdout.write(f"{total} members, {options['repeat']} runs per query (median / p95 ms)")
+            self.stdout.write(f"{'query':<12} {'matches':>8} {'fts5':>16} {'icontains':>16}")
+            for query in queries:
+                fts_qs = search.filter_members(Member.objects.order_by("-join_date"), query)
+                like_qs = Member.objects.order_by("-join_date").filter(
+                    Q(full_name__icontains=query) | Q(member_code__icontains=query)
+                )
+                fts = self._time(fts_qs, options["repeat"])
+                like = self._time(like_qs, options["repeat"])
+                self.stdout.write(f"{query:<12} {fts_qs.count():>8} {fts:>16} {like:>16}")
+
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        rng = random.Random(42)
+        started = time.perf_counter()
+        for start in range(0, count, 5000):
+            members = [
+                Member(
+                    full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    email=f"bench{n}@example.invalid",
+                    password=generate_random_password(8),
+                )
+                for n in range(start, min(start + 5000, count))
+            ]
+            Member.assign_codes(members)
+            Member.objects.bulk_create(members)
+            search.index_members(members)
+        self.stdout.write(f"Added {count} synthetic members in {time.perf_counter() - started:.1f}s.")
+
+    def _time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset[:10])
+            queryset.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        return f"{statistics.median(timings):.2f} / {p95:.2f}"
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clubapp import snapshots, valuation
+from clubapp.models import Member
+
+
+class Command(BaseCommand):
+    help = "Rebuilds PVMonthlySnapshot rows for every member (or the given member codes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("member_codes", nargs="*", help="Only rebuild these members (e.g. M0001).")
+        parser.add_argument(
+            "--years-ahead", type=int, default=None,
+            help="Build through December of this many years after the current year "
+                 "(default: settings.PV_SNAPSHOT_YEARS_AHEAD).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Members per transaction.")
+
+    def handle(self, *args, **options):
+        members = Member.objects.order_by("id")
+        if options["member_codes"]:
+            members = members.filter(member_code__in=options["member_codes"])
+
+        through = None
+        if options["years_ahead"] is not None:
+            today = timezone.now().date()
+            through = valuation.month_index(today.year + options["years_ahead"], 12)
+
+        started = time.perf_counter()
+        written = snapshots.rebuild_all(members, through=through, batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} snapshot rows for {members.count()} members in {elapsed:.2f}s."
+        ))
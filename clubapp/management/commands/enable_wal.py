@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from clubapp import db_routing
+
+
+class Command(BaseCommand):
+    help = (
+        "Switches a SQLite database file to WAL journaling. The mode is stored in the file, "
+        "so run it once when deploying (see clubapp/db_routing.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias (default: default).")
+
+    def handle(self, *args, **options):
+        try:
+            mode = db_routing.enable_wal(options["database"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if mode.lower() != "wal":
+            raise CommandError(f"SQLite kept journal_mode={mode} for {options['database']!r}.")
+        self.stdout.write(self.style.SUCCESS(f"Database {options['database']!r} uses journal_mode=wal."))
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from clubapp import statements
+from clubapp.models import Member
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes year-end statements (HTML or PDF) for every member, in a process "
+        "pool. Reruns skip statements already in the year's manifest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("member_codes", nargs="*", help="Only these members (e.g. M0001).")
+        parser.add_argument("--year", type=int, default=None, help="Statement year (default: last year).")
+        parser.add_argument("--format", choices=statements.FORMATS, default="pdf")
+        parser.add_argument(
+            "--output", default=None, help="Output directory (default: settings.PV_STATEMENT_DIR)."
+        )
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs).")
+        parser.add_argument("--chunk-size", type=int, default=statements.CHUNK_SIZE, help="Members per chunk.")
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore the manifest and write every statement again."
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        year = options["year"] or timezone.now().year - 1
+        directory = options["output"] or settings.PV_STATEMENT_DIR
+
+        members = Member.objects.all()
+        if options["member_codes"]:
+            members = members.filter(member_code__in=options["member_codes"])
+        total = members.count()
+
+        def progress(written, skipped):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {written + skipped}/{total}")
+
+        started = time.perf_counter()
+        written, skipped = statements.generate(
+            members, year, fmt=options["format"], directory=directory, workers=options["workers"],
+            chunk_size=options["chunk_size"], restart=options["restart"], progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+
+        rate = written / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} {year} statements ({skipped} already done) in {elapsed:.2f}s, {rate:,.0f}/s "
+            f"into {statements.year_directory(directory, year)}."
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from clubapp import synthetic
+from clubapp.models import Member
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds reproducible synthetic members with purchases and dividends. "
+        "Runs continue numbering after the synthetic members already present."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=1000, help="Members to add.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+
+    def handle(self, *args, **options):
+        start = Member.objects.filter(email__startswith="synthetic", email__endswith="@example.invalid").count()
+        started = time.perf_counter()
+        members, txs, dividends = synthetic.generate(options["members"], seed=options["seed"], start=start)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Added {members} members, {txs} transactions and {dividends} dividends in {elapsed:.1f}s."
+        ))
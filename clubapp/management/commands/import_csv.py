@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from clubapp import bulk_import
+
+
+class Command(BaseCommand):
+    help = "Streams members, PV transactions or dividends from a CSV file into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(bulk_import.IMPORTERS))
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--chunk-size", type=int, default=bulk_import.CHUNK_SIZE,
+                            help="Rows per batch transaction.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with open(options["path"], newline="", encoding="utf-8-sig") as f:
+            result = bulk_import.import_csv(options["kind"], f, chunk_size=options["chunk_size"])
+        elapsed = time.perf_counter() - started
+
+        for line, message in result.rejects:
+            self.stderr.write(f"line {line}: {message}")
+        if result.rejected > len(result.rejects):
+            self.stderr.write(f"... and {result.rejected - len(result.rejects)} more rejected rows")
+
+        rate = result.created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} {options['kind']} ({result.rejected} rejected) "
+            f"in {elapsed:.2f}s, {rate:,.0f} rows/s."
+        ))
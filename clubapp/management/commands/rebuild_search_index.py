@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+
+from clubapp import search
+
+
+class Command(BaseCommand):
+    help = "Refills the member search index from the Member table."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            count = search.rebuild_index()
+        except OperationalError as e:
+            raise CommandError(f"{e} Run migrate on SQLite with FTS5 support.")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} members in {elapsed:.2f}s."))
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime, time as day_start
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from clubapp import certificates
+from clubapp.models import PVTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders PDF certificates for every transaction whose certificate is "
+        "not on disk yet, in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("member_codes", nargs="*", help="Only these members (e.g. M0001).")
+        parser.add_argument("--since", help="Only transactions purchased on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Certificates handed out per round.")
+
+    def handle(self, *args, **options):
+        txs = PVTransaction.objects.select_related("member").order_by("id")
+        if options["member_codes"]:
+            txs = txs.filter(member__member_code__in=options["member_codes"])
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError(f"--since {options['since']!r} is not a date (YYYY-MM-DD).")
+            txs = txs.filter(purchase_date__gte=timezone.make_aware(datetime.combine(since, day_start.min)))
+
+        started = time.perf_counter()
+        fields = (certificates.certificate_fields(tx) for tx in txs.iterator(chunk_size=options["batch_size"]))
+        rendered, cached, html_only = certificates.render_many(
+            fields, workers=options["workers"], batch_size=options["batch_size"]
+        )
+        elapsed = time.perf_counter() - started
+
+        rate = rendered / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} certificates ({cached} already on disk) in {elapsed:.2f}s, {rate:,.0f}/s "
+            f"into {certificates.certificate_dir()}."
+        ))
+        if html_only:
+            self.stdout.write(self.style.WARNING(
+                f"{html_only} certificates have text the PDF fonts cannot show; those members get the HTML version."
+            ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clubapp import member_totals
+from clubapp.models import Member
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes Member.total_pv_units / total_invested / total_dividends "
+        "from the ledgers and repairs any that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("member_codes", nargs="*", help="Only check these members (e.g. M0001).")
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only report drift; exit with an error instead of repairing.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Members per transaction.")
+
+    def handle(self, *args, **options):
+        members = Member.objects.order_by("id")
+        if options["member_codes"]:
+            members = members.filter(member_code__in=options["member_codes"])
+
+        started = time.perf_counter()
+        drifted = member_totals.repair(members, fix=not options["check"], batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+
+        if options["check"] and drifted:
+            raise CommandError(f"{len(drifted)} member(s) have stale totals: ids {drifted[:20]}")
+        verb = "Checked" if options["check"] else f"Repaired {len(drifted)} of"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {members.count()} members in {elapsed:.2f}s."))
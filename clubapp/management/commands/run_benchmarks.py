@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from clubapp import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the valuation functions and every clubapp URL on synthetic data "
+        "at each scale, in a throwaway test database, and saves the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales", type=int, nargs="+", default=[1000, 10000, 100000], help="Member counts to benchmark."
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Warm runs per URL.")
+        parser.add_argument("--seed", type=int, default=42, help="Synthetic data seed.")
+        parser.add_argument("--output", help="JSON file to write (default: benchmark-<timestamp>.json).")
+
+    def handle(self, *args, **options):
+        output = options["output"] or f"benchmark-{timezone.now():%Y%m%d-%H%M%S}.json"
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = benchmarks.run_suite(
+                options["scales"], repeat=options["repeat"], seed=options["seed"], log=self.stdout.write
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+        for scale, entry in results["scales"].items():
+            slowest = sorted(
+                ((name, r["cold_ms"]) for name, r in entry["urls"].items() if "cold_ms" in r),
+                key=lambda item: -item[1],
+            )[:3]
+            summary = ", ".join(f"{name} {ms:.0f} ms" for name, ms in slowest)
+            self.stdout.write(f"{scale} members: slowest cold URLs {summary}")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}."))
@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import F, Sum
+
+from . import money, valuation
+from .models import Dividend, Member, PVTransaction
+
+
+# ---------------------------------------------------------
+#   DENORMALIZED MEMBER TOTALS
+# ---------------------------------------------------------
+#
+# Member.total_pv_units, total_invested and total_dividends are adjusted
+# with F() expressions in the same transaction as the write that changes
+# them, so concurrent writers never lose an update. Each purchase adds its
+# buy value (units x purchase-year base price) rounded to the paisa
+# (money.py).
+# Every adjustment also bumps Member.data_version.
+
+PAISA = Decimal("0.01")
+
+
+def invested_value(pv_units, purchase_date):
+    return money.to_decimal(pv_units * valuation.base_price_fixed(purchase_date.year))
+
+
+def add_transaction(member_id, pv_units, purchase_date, sign=1):
+    Member.objects.filter(pk=member_id).update(
+        total_pv_units=F("total_pv_units") + sign * pv_units,
+        total_invested=F("total_invested") + sign * invested_value(pv_units, purchase_date),
+        data_version=F("data_version") + 1,
+    )
+
+
+def add_dividend(member_id, amount, sign=1):
+    Member.objects.filter(pk=member_id).update(
+        total_dividends=F("total_dividends") + sign * Decimal(str(amount)).quantize(PAISA),
+        data_version=F("data_version") + 1,
+    )
+
+
+def add_many(deltas):
+    """
+    Applies ``{member_id: (pv_units, invested, dividends)}`` increments for
+    rows written with bulk_create (which skips the signals) in a single
+    executemany round trip.
+    """
+    if not deltas:
+        return
+    connection = connections[router.db_for_write(Member)]
+    qn = connection.ops.quote_name
+    sql = (
+        f"UPDATE {qn(Member._meta.db_table)} SET "
+        f"{qn('total_pv_units')} = {qn('total_pv_units')} + %s, "
+        f"{qn('total_invested')} = {qn('total_invested')} + %s, "
+        f"{qn('total_dividends')} = {qn('total_dividends')} + %s, "
+        f"{qn('data_version')} = {qn('data_version')} + 1 "
+        f"WHERE {qn('id')} = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            (units, invested, dividends, member_id)
+            for member_id, (units, invested, dividends) in deltas.items()
+        ])
+
+
+def bump_version(member_id):
+    Member.objects.filter(pk=member_id).update(data_version=F("data_version") + 1)
+
+
+def computed_totals(member_ids):
+    """``{member_id: (pv_units, invested, dividends)}`` from the ledgers."""
+    totals = {pk: [0, Decimal("0.00"), Decimal("0.00")] for pk in member_ids}
+    tx_rows = PVTransaction.objects.filter(member_id__in=member_ids).values_list(
+        "member_id", "pv_units", "purchase_date"
+    )
+    for member_id, pv_units, purchase_date in tx_rows:
+        totals[member_id][0] += pv_units
+        totals[member_id][1] += invested_value(pv_units, purchase_date)
+    dividend_rows = (
+        Dividend.objects.filter(member_id__in=member_ids)
+        .values("member_id").order_by()
+        .annotate(total=Sum("amount"))
+        .values_list("member_id", "total")
+    )
+    for member_id, total in dividend_rows:
+        totals[member_id][2] = total.quantize(PAISA)
+    return {pk: tuple(values) for pk, values in totals.items()}
+
+
+def repair(members, fix=True, batch_size=500):
+    """
+    Compares stored totals with the ledgers for ``members`` (a queryset),
+    ``batch_size`` members at a time, and rewrites the ones that drifted
+    when ``fix`` is set. Returns the list of drifted member ids.
+    """
+    drifted = []
+    batch = []
+    for member in members.only("id", "total_pv_units", "total_invested", "total_dividends").iterator(chunk_size=batch_size):
+        batch.append(member)
+        if len(batch) >= batch_size:
+            drifted.extend(_repair_batch(batch, fix))
+            batch = []
+    if batch:
+        drifted.extend(_repair_batch(batch, fix))
+    return drifted
+
+
+@transaction.atomic
+def _repair_batch(members, fix):
+    expected = computed_totals([m.pk for m in members])
+    drifted = []
+    for member in members:
+        stored = (member.total_pv_units, member.total_invested, member.total_dividends)
+        if stored != expected[member.pk]:
+            drifted.append(member.pk)
+            member.total_pv_units, member.total_invested, member.total_dividends = expected[member.pk]
+            member.data_version = F("data_version") + 1
+    if fix and drifted:
+        drifted_ids = set(drifted)
+        Member.objects.bulk_update(
+            [m for m in members if m.pk in drifted_ids],
+            ["total_pv_units", "total_invested", "total_dividends", "data_version"],
+        )
+    return drifted
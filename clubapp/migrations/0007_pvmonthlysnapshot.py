@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-16 22:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0006_dividend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='snapshots_through',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='PVMonthlySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('pv_units', models.PositiveIntegerField()),
+                ('value', models.FloatField()),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pv_snapshots', to='clubapp.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'month'], name='snapshot_year_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('member', 'year', 'month'), name='unique_member_snapshot_month')],
+            },
+        ),
+    ]
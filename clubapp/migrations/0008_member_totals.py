@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0007_pvmonthlysnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='total_dividends',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='total_invested',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='total_pv_units',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0008_member_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-16 23:40
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_member_code_sequence(apps, schema_editor):
+    # Codes used to be derived from the row id (M{id:04d}); continue after
+    # the highest id or code already handed out.
+    Member = apps.get_model('clubapp', 'Member')
+    Sequence = apps.get_model('clubapp', 'Sequence')
+    highest = Member.objects.aggregate(models.Max('id'))['id__max'] or 0
+    for code in Member.objects.values_list('member_code', flat=True).iterator():
+        match = re.fullmatch(r'M(\d+)', code or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+    Sequence.objects.update_or_create(name='member_code', defaults={'next_value': highest + 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0009_member_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(seed_member_code_sequence, migrations.RunPython.noop),
+    ]
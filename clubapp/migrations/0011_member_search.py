@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-16 23:55
+
+from django.db import OperationalError, migrations
+
+
+SEARCH_TABLE = "clubapp_member_search"
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases keep searching with icontains.
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "member_code, code_number, full_name, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:  # SQLite built without FTS5
+        return
+    Member = apps.get_model("clubapp", "Member")
+    rows = []
+    for pk, code, full_name in Member.objects.values_list("id", "member_code", "full_name").iterator():
+        digits = "".join(ch for ch in code if ch.isdigit())
+        rows.append((pk, code, f"{digits} {digits.lstrip('0')}" if digits else "", full_name))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, member_code, code_number, full_name) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0010_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0011_member_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['join_date', 'id'], name='member_join_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pvtransaction',
+            index=models.Index(fields=['purchase_date', 'id'], name='pvtx_purchase_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0012_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pvtransaction',
+            index=models.Index(fields=['member', 'purchase_date'], name='pvtx_member_purchase_date_idx'),
+        ),
+    ]
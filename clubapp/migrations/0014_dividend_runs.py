@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-16 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0013_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DividendRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pool', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('record_date', models.DateField()),
+                ('basis', models.CharField(choices=[('units', 'PV units held'), ('value', 'Current value held')], default='units', max_length=10)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('preview', 'Preview'), ('committed', 'Committed'), ('rolled_back', 'Rolled back')], default='preview', max_length=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('committed_at', models.DateTimeField(blank=True, null=True)),
+                ('rolled_back_at', models.DateTimeField(blank=True, null=True)),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('distributed', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dividend',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='dividends', to='clubapp.dividendrun'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_member_totals(apps, schema_editor):
+    # 0008 added the running totals at 0 for members who already had
+    # transactions and dividends; recompute them from the ledgers, as
+    # member_totals.computed_totals() does, with the historical models.
+    from clubapp.member_totals import PAISA, invested_value
+
+    Member = apps.get_model('clubapp', 'Member')
+    PVTransaction = apps.get_model('clubapp', 'PVTransaction')
+    Dividend = apps.get_model('clubapp', 'Dividend')
+
+    totals = {pk: [0, Decimal('0.00'), Decimal('0.00')] for pk in Member.objects.values_list('pk', flat=True)}
+    for member_id, pv_units, purchase_date in PVTransaction.objects.values_list(
+        'member_id', 'pv_units', 'purchase_date'
+    ).iterator():
+        totals[member_id][0] += pv_units
+        totals[member_id][1] += invested_value(pv_units, purchase_date)
+    for member_id, total in (
+        Dividend.objects.values('member_id').order_by().annotate(total=models.Sum('amount'))
+        .values_list('member_id', 'total')
+    ):
+        totals[member_id][2] = total.quantize(PAISA)
+
+    members = []
+    for member in Member.objects.only('id', 'total_pv_units', 'total_invested', 'total_dividends').iterator():
+        expected = tuple(totals[member.pk])
+        if (member.total_pv_units, member.total_invested, member.total_dividends) != expected:
+            member.total_pv_units, member.total_invested, member.total_dividends = expected
+            member.data_version = models.F('data_version') + 1
+            members.append(member)
+    Member.objects.bulk_update(
+        members, ['total_pv_units', 'total_invested', 'total_dividends', 'data_version'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubapp', '0014_dividend_runs'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_member_totals, migrations.RunPython.noop),
+    ]
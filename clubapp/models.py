@@ -1,7 +1,11 @@
 # members/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 import string
 import random
+from decimal import Decimal
+
+from . import money, rates
 
 
 def generate_random_password(length=8):
@@ -9,6 +13,36 @@ def generate_random_password(length=8):
     return ''.join(random.choices(chars, k=length))
 
 
+class Sequence(models.Model):
+    """
+    Named counter handed out in blocks. The UPDATE takes the row (and on
+    SQLite the database) write lock, so concurrent reservations never
+    overlap and a block of any size costs the same.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name} -> {self.next_value}"
+
+    @classmethod
+    def reserve(cls, name, count=1):
+        """Reserves ``count`` numbers and returns the first one."""
+        with transaction.atomic():
+            if not cls.objects.filter(name=name).update(next_value=F("next_value") + count):
+                cls.objects.get_or_create(name=name)
+                cls.objects.filter(name=name).update(next_value=F("next_value") + count)
+            end = cls.objects.filter(name=name).values_list("next_value", flat=True).get()
+        return end - count
+
+
+MEMBER_CODE_SEQUENCE = "member_code"
+
+
+def format_member_code(number):
+    return f"M{number:04d}"  # M0001 ... M9999, M10000, ...
+
+
 class Member(models.Model):
     member_code = models.CharField(max_length=10, unique=True, blank=True)
     full_name = models.CharField(max_length=200)
@@ -23,20 +57,60 @@ class Member(models.Model):
 
     join_date = models.DateTimeField(auto_now_add=True)
 
+    # Running totals maintained by member_totals.py on every PVTransaction /
+    # Dividend write; ``manage.py repair_member_totals`` recomputes them.
+    total_pv_units = models.PositiveIntegerField(default=0, editable=False)
+    total_invested = models.DecimalField(max_digits=16, decimal_places=2, default=0, editable=False)
+    total_dividends = models.DecimalField(max_digits=16, decimal_places=2, default=0, editable=False)
+
+    # Bumped on every change to the member or its ledgers; cache keys for
+    # per-member computed data include it.
+    data_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Last month (1st of month) PVMonthlySnapshot rows are materialized for.
+    # Null until the member's snapshots are first built.
+    snapshots_through = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the member lists (pagination.py).
+            models.Index(fields=["join_date", "id"], name="member_join_date_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.member_code} - {self.full_name}"
 
+    @classmethod
+    def assign_codes(cls, members):
+        """
+        Gives every member without a code the next free code, reserving the
+        whole block in one go (use before ``bulk_create``).
+        """
+        pending = [m for m in members if not m.member_code]
+        if pending:
+            first = Sequence.reserve(MEMBER_CODE_SEQUENCE, len(pending))
+            for offset, member in enumerate(pending):
+                member.member_code = format_member_code(first + offset)
+        return members
+
+    # Written only with F() updates (member_totals.py, snapshots.py); a
+    # plain save() of a loaded member leaves them alone, so it cannot undo
+    # a purchase or dividend committed since the member was read.
+    LEDGER_FIELDS = ("total_pv_units", "total_invested", "total_dividends", "data_version", "snapshots_through")
+
     def save(self, *args, **kwargs):
         # Auto-generate member_code only on create
         if not self.member_code:
-            last = Member.objects.order_by('-id').first()
-            next_number = 1 if not last else last.id + 1
-            self.member_code = f"M{next_number:04d}"  # M0001, M0002, ...
+            Member.assign_codes([self])
 
         # Auto-generate password only on create
         if not self.password:
             self.password = generate_random_password(8)
 
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name not in self.LEDGER_FIELDS
+            ]
         super().save(*args, **kwargs)
 
 
@@ -48,36 +122,19 @@ from django.utils import timezone
 # from .member_models import Member   # example if separated
 
 
-def get_pv_value_for_year(target_year: int, base_year: int = 2026, base_value: float = 100.0) -> float:
+def get_pv_value_for_year(target_year: int) -> Decimal:
     """
-    PV value per 1 PV for a given year, based on your table:
+    PV value per 1 PV for a given year, from the rate schedule (rates.py):
 
       2026: 100 (no increase)
       2027: +8%
       2028: +9%
-      2029: +10%
-      2030: +11%
       ...
-      2036: +17%
-
-    Pattern:
-      - Start with 100 in base_year
-      - For each year after that, multiply by (1 + yearly_rate)
-      - yearly_rate for offset i (1st year after base) = (7 + i) %
+      2033 on: +14%
 
-    This reproduces exactly your screenshot values.
+    This is the entry price of a purchase made that year, to the paisa.
     """
-    value = float(base_value)
-
-    if target_year <= base_year:
-        return round(value, 2)
-
-    years_after = target_year - base_year
-    for i in range(1, years_after + 1):
-        yearly_rate = (7 + i) / 100.0  # 1 -> 8%, 2 -> 9%, ...
-        value *= (1 + yearly_rate)
-
-    return round(value, 2)
+    return rates.get().price_decimal(target_year)
 
 
 class PVTransaction(models.Model):
@@ -86,11 +143,20 @@ class PVTransaction(models.Model):
     purchase_date = models.DateTimeField(auto_now_add=True)
     # note field removed
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of buy_pv_list (pagination.py).
+            models.Index(fields=["purchase_date", "id"], name="pvtx_purchase_date_id_idx"),
+            # One member's ledger in date order: member_dashboard, the
+            # overview grid and snapshot rebuilds.
+            models.Index(fields=["member", "purchase_date"], name="pvtx_member_purchase_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.member.member_code} - {self.pv_units} PV"
 
     @property
-    def current_value_per_pv(self) -> float:
+    def current_value_per_pv(self) -> Decimal:
         """
         Value of 1 PV in the *current year* using the growth table.
         """
@@ -98,18 +164,82 @@ class PVTransaction(models.Model):
         return get_pv_value_for_year(year)
 
     @property
-    def current_total_value(self) -> float:
+    def current_total_value(self) -> Decimal:
         """
-        Total value of this transaction (all PV units) in the *current year*.
+        Total value of this transaction (all PV units) in the *current year*,
+        rounded once from the exact price (money.py).
         """
-        return round(self.pv_units * self.current_value_per_pv, 2)
+        return money.to_decimal(self.pv_units * rates.get().price_fixed(timezone.now().year))
+
+
+
+class DividendRun(models.Model):
+    """
+    One proportional payout of ``pool`` across all members, by PV units or
+    by current value held on ``record_date``. Created as a preview;
+    ``distributions.commit`` writes its Dividend rows and
+    ``distributions.rollback`` removes them again.
+    """
+    BASIS_UNITS = "units"
+    BASIS_VALUE = "value"
+    BASIS_CHOICES = [(BASIS_UNITS, "PV units held"), (BASIS_VALUE, "Current value held")]
+
+    PREVIEW = "preview"
+    COMMITTED = "committed"
+    ROLLED_BACK = "rolled_back"
+    STATUS_CHOICES = [(PREVIEW, "Preview"), (COMMITTED, "Committed"), (ROLLED_BACK, "Rolled back")]
+
+    pool = models.DecimalField(max_digits=16, decimal_places=2)
+    record_date = models.DateField()
+    basis = models.CharField(max_length=10, choices=BASIS_CHOICES, default=BASIS_UNITS)
+    note = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=PREVIEW)
+    created_at = models.DateTimeField(auto_now_add=True)
+    committed_at = models.DateTimeField(null=True, blank=True)
+    rolled_back_at = models.DateTimeField(null=True, blank=True)
+    # Filled in on commit.
+    member_count = models.PositiveIntegerField(default=0)
+    distributed = models.DecimalField(max_digits=16, decimal_places=2, default=0)
 
+    def __str__(self):
+        return f"Run {self.pk}: {self.pool} by {self.basis} on {self.record_date} ({self.status})"
 
 
 class Dividend(models.Model):
+    # The FK index also serves filter(member=...).order_by("-id"): SQLite
+    # index entries end in the rowid, so no composite index is needed.
     member = models.ForeignKey(Member, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     note = models.CharField(max_length=255, blank=True)
+    # Set on rows written by a distribution run; a run with dividends
+    # cannot be deleted, only rolled back.
+    run = models.ForeignKey(DividendRun, null=True, blank=True, on_delete=models.PROTECT, related_name="dividends")
 
     def __str__(self):
         return f"{self.member.member_code} - {self.amount}"
+
+
+
+class PVMonthlySnapshot(models.Model):
+    """
+    Holdings and value of one member in one calendar month, exactly as the
+    member_pv_overview grid shows them. Backfilled by the
+    ``build_pv_snapshots`` command and kept current by ``snapshots.py``
+    whenever a PVTransaction is written.
+    """
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name="pv_snapshots")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    pv_units = models.PositiveIntegerField()
+    value = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["member", "year", "month"], name="unique_member_snapshot_month"),
+        ]
+        indexes = [
+            models.Index(fields=["year", "month"], name="snapshot_year_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.member.member_code} - {self.year}-{self.month:02d}"
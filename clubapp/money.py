@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+
+# ---------------------------------------------------------
+#   FIXED-POINT MONEY
+# ---------------------------------------------------------
+#
+# Valuations are done in integers. Prices, growth factors and every amount
+# derived from them are fixed-point numbers: rupees (or plain factors)
+# times SCALE, so 1 unit is 1e-18 of a rupee.
+#
+#   units x price                 exact
+#   amount x factor  (mul)        rounded half up at 1e-18
+#   sum of amounts                exact (sums of products are unscaled once)
+#
+# The one rounding rule: an amount is rounded to whole paise, half up
+# (away from zero), exactly once, where it is shown or stored (paise() and
+# the converters below). A total is rounded from the exact sum of its
+# rows, so it can differ from the sum of the rounded rows by a paisa, as
+# the float code it replaces did. Nothing is ever rounded twice.
+#
+# Conversion happens only at the edges: to_decimal() for DecimalFields,
+# templates and the API, to_float() for FloatFields and spreadsheets,
+# to_text() for "1,234.56".
+
+SCALE = 10 ** 18
+PAISE_PER_RUPEE = 100
+
+_PAISA_UNITS = SCALE // PAISE_PER_RUPEE
+_HALF_PAISA = _PAISA_UNITS // 2
+_HALF = SCALE // 2
+_PAISA = Decimal("0.01")
+
+
+def round_div(numerator, denominator):
+    """``numerator / denominator`` to the nearest integer, halves away from zero (``denominator`` > 0)."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if 2 * remainder >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def fixed(value):
+    """
+    ``value`` (an int, a Decimal or a decimal string) as a fixed-point
+    integer. Floats go through their shortest repr, so 1.08 is 1.08.
+    """
+    if isinstance(value, int):
+        return value * SCALE
+    sign, digits, exponent = Decimal(str(value) if isinstance(value, float) else value).as_tuple()
+    if not isinstance(exponent, int):
+        raise ValueError(f"{value!r} is not a finite number.")
+    n = int("".join(map(str, digits)) or 0)
+    exponent += 18  # log10(SCALE)
+    n = n * 10 ** exponent if exponent >= 0 else round_div(n, 10 ** -exponent)
+    return -n if sign else n
+
+
+# unscale() and paise() are round_div() spelled out for their fixed
+# divisors; they run once per valuation.
+
+def unscale(product):
+    """
+    A product of two fixed-point numbers, or a sum of such products, back
+    to fixed point. Summing first and reducing once keeps a sum exact.
+    """
+    if product >= 0:
+        return (product + _HALF) // SCALE
+    return -((_HALF - product) // SCALE)
+
+
+def mul(a, b):
+    """Product of two fixed-point numbers."""
+    return unscale(a * b)
+
+
+def paise(amount):
+    """A fixed-point amount in whole paise: the rounding rule above."""
+    if amount >= 0:
+        return (amount + _HALF_PAISA) // _PAISA_UNITS
+    return -((_HALF_PAISA - amount) // _PAISA_UNITS)
+
+
+def from_paise(paise):
+    return paise * _PAISA_UNITS
+
+
+def to_decimal(amount):
+    """Rupees to the paisa, e.g. ``Decimal("1234.50")``."""
+    return Decimal(paise(amount)) * _PAISA
+
+
+def to_float(amount):
+    """Rupees to the paisa as a float, for FloatFields and spreadsheets."""
+    return paise(amount) / PAISE_PER_RUPEE
+
+
+def to_text(amount):
+    """Rupees to the paisa with thousands separators: ``"1,234.50"``."""
+    return f"{to_decimal(amount):,}"
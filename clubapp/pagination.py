@@ -0,0 +1,143 @@
+import asyncio
+
+from django.core import signing
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from .concurrent_db import in_thread
+
+
+# ---------------------------------------------------------
+#   KEYSET (CURSOR) PAGINATION
+# ---------------------------------------------------------
+#
+# Paginator counts the whole result and OFFSETs into it, so late pages of a
+# growing ledger get slower and slower. In cursor mode (?paging=cursor, or
+# any ?cursor=) a page is read with a WHERE on the ordering columns instead,
+# backed by a composite index: no COUNT, and the same cost on every page.
+# Cursors are signed tokens holding the boundary row's key values, so they
+# are opaque to users and cannot be tampered with. The ordering must end in
+# a unique column (id) so that every row has a distinct position.
+
+CURSOR_SALT = "clubapp.pagination"
+
+
+class CursorPage:
+    """A page read by key; template-compatible with the parts of Page we use."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = [(key.lstrip("-"), key.startswith("-")) for key in ordering]
+        self.fields = [queryset.model._meta.get_field(name) for name, _ in self.keys]
+
+    def _encode(self, obj, direction):
+        values = [field.value_to_string(obj) for field in self.fields]
+        return signing.dumps([direction, values], salt=CURSOR_SALT)
+
+    def _decode(self, cursor):
+        direction, values = signing.loads(cursor, salt=CURSOR_SALT)
+        if direction not in ("next", "prev") or len(values) != len(self.fields):
+            raise signing.BadSignature("Cursor does not match this list.")
+        return direction, [field.to_python(value) for field, value in zip(self.fields, values)]
+
+    def _after(self, values, backwards):
+        """Q for rows strictly after ``values`` in the (possibly reversed) ordering."""
+        condition = Q()
+        for i, ((name, descending), value) in enumerate(zip(self.keys, values)):
+            lookup = "lt" if descending != backwards else "gt"
+            equal = {prev_name: prev_value for (prev_name, _), prev_value in zip(self.keys[:i], values[:i])}
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        # Redundant bound on the leading key: the OR above alone makes SQLite
+        # scan the index from the start instead of seeking to the cursor.
+        name, descending = self.keys[0]
+        return Q(**{f"{name}__{'lte' if descending != backwards else 'gte'}": values[0]}) & condition
+
+    def _ordering(self, backwards):
+        return [("-" if descending != backwards else "") + name for name, descending in self.keys]
+
+    def get_page(self, cursor=None):
+        """The page after/before ``cursor``; the first page if it is missing or invalid."""
+        direction, values = "next", None
+        if cursor:
+            try:
+                direction, values = self._decode(cursor)
+            except (signing.BadSignature, ValueError, TypeError):
+                direction, values = "next", None
+        backwards = direction == "prev"
+
+        queryset = self.queryset.order_by(*self._ordering(backwards))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backwards))
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows)
+        has_next = (not backwards and more) or (backwards and values is not None)
+        has_previous = (backwards and more) or (not backwards and values is not None)
+        return CursorPage(
+            rows,
+            next_cursor=self._encode(rows[-1], "next") if has_next else None,
+            previous_cursor=self._encode(rows[0], "prev") if has_previous else None,
+        )
+
+
+def paginate(request, queryset, ordering, per_page):
+    """
+    The page to show for a list view: a CursorPage in cursor mode, else the
+    usual page-number Page. ``ordering`` must end in a unique field.
+    """
+    if request.GET.get("paging") == "cursor" or "cursor" in request.GET:
+        return KeysetPaginator(queryset, ordering, per_page).get_page(request.GET.get("cursor"))
+    return Paginator(queryset.order_by(*ordering), per_page).get_page(request.GET.get("page", 1))
+
+
+async def apaginate(request, queryset, ordering, per_page):
+    """
+    paginate() for async views. A page number is read with its COUNT and
+    its rows queried at the same time; only an out-of-range number costs a
+    second rows query, for the last page.
+    """
+    if request.GET.get("paging") == "cursor" or "cursor" in request.GET:
+        return await in_thread(KeysetPaginator(queryset, ordering, per_page).get_page, request.GET.get("cursor"))
+
+    paginator = Paginator(queryset.order_by(*ordering), per_page)
+    try:
+        number = max(1, int(request.GET.get("page", 1)))
+    except (TypeError, ValueError):
+        number = 1
+
+    def rows_for(n):
+        return list(paginator.object_list[(n - 1) * per_page:n * per_page])
+
+    count, rows = await asyncio.gather(in_thread(paginator.object_list.count), in_thread(rows_for, number))
+    paginator.count = count  # cached_property: stops Page from counting again
+    if number > paginator.num_pages:
+        number = paginator.num_pages
+        rows = await in_thread(rows_for, number)
+    return Page(rows, number, paginator)
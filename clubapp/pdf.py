@@ -0,0 +1,141 @@
+import zlib
+
+
+# ---------------------------------------------------------
+#   MINIMAL PDF WRITER
+# ---------------------------------------------------------
+#
+# Just enough PDF for simple documents: text in the built-in Helvetica
+# fonts (WinAnsi encoding, so no font files are embedded), rectangles and
+# lines. The output depends only on what is drawn, with no timestamps or
+# ids, so the same certificate always produces the same bytes.
+#
+# The fonts only cover Windows-1252 (Latin scripts). Other text, such as a
+# name in Malayalam or Devanagari, raises UnsupportedText instead of
+# printing as "????"; callers offer the HTML version of the document then.
+
+A4_LANDSCAPE = (842, 595)
+A4_PORTRAIT = (595, 842)
+
+# Advance widths (1/1000 em) of characters 32..126 in the standard fonts.
+_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+FONTS = {"F1": ("Helvetica", _HELVETICA), "F2": ("Helvetica-Bold", _HELVETICA_BOLD)}
+
+
+class UnsupportedText(ValueError):
+    """Text the built-in fonts cannot show."""
+
+
+def supports(text):
+    """True when ``text`` can be drawn with the built-in fonts."""
+    try:
+        text.encode("cp1252")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _encode(text):
+    try:
+        return text.encode("cp1252")
+    except UnicodeEncodeError:
+        raise UnsupportedText(f"{text!r} has characters the PDF fonts cannot show; use the HTML version.") from None
+
+
+def text_width(text, size, bold=False):
+    widths = _HELVETICA_BOLD if bold else _HELVETICA
+    return sum(widths[b - 32] if 32 <= b <= 126 else 556 for b in _encode(text)) * size / 1000.0
+
+
+def _escape(text):
+    raw = _encode(text).replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return b"(" + raw + b")"
+
+
+def _rgb(color):
+    return " ".join(f"{c / 255:.3f}" for c in color)
+
+
+class Page:
+    def __init__(self, size=A4_LANDSCAPE):
+        self.width, self.height = size
+        self.ops = []
+
+    def text(self, x, y, text, size=12, bold=False, color=(0, 0, 0), align="left"):
+        """Draws ``text`` with its baseline at ``y``; ``x`` is the left edge or centre."""
+        if align == "center":
+            x -= text_width(text, size, bold) / 2
+        font = "F2" if bold else "F1"
+        self.ops.append(
+            f"BT {_rgb(color)} rg /{font} {size} Tf {x:.2f} {y:.2f} Td ".encode() + _escape(text) + b" Tj ET"
+        )
+
+    def rect(self, x, y, width, height, line_width=1, color=(0, 0, 0), fill=None):
+        op = f"{line_width} w {_rgb(color)} RG "
+        if fill is not None:
+            op += f"{_rgb(fill)} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re B"
+        else:
+            op += f"{x:.2f} {y:.2f} {width:.2f} {height:.2f} re S"
+        self.ops.append(op.encode())
+
+    def line(self, x1, y1, x2, y2, line_width=1, color=(0, 0, 0)):
+        self.ops.append(f"{line_width} w {_rgb(color)} RG {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S".encode())
+
+    def to_bytes(self, title=""):
+        return document([self], title=title)
+
+
+def document(pages, title=""):
+    """PDF bytes for a list of Pages, in order."""
+    first_font = len(pages) * 2 + 3  # after the catalog, page tree and a page + contents per page
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        (
+            f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] "
+            f"/Count {len(pages)} >>"
+        ).encode(),
+    ]
+    for i, page in enumerate(pages):
+        stream = zlib.compress(b"\n".join(page.ops), 9)
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page.width} {page.height}] "
+            f"/Resources << /Font << /F1 {first_font} 0 R /F2 {first_font + 1} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+    for name, (base_font, _) in FONTS.items():
+        objects.append(
+            f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>".encode()
+        )
+    objects.append(b"<< /Title " + _escape(title) + b" >>")
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info {len(objects)} 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
@@ -0,0 +1,144 @@
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.utils import timezone
+
+from . import money, rates
+
+
+# ---------------------------------------------------------
+#   WHAT-IF PROJECTIONS
+# ---------------------------------------------------------
+#
+# What an amount put into PV, plus optional top-ups, would be worth at the
+# end of each year. Money buys PV at the entry price of its year and is
+# worth units x the next year's entry price at each year end, so the
+# schedule's price table (rates.py) is the cumulative growth factor: each
+# row is one lookup and one multiply whatever the horizon, with no
+# year-by-year compounding. All figures are fixed-point (money.py) and
+# rounded to the paisa once, in the result; a row's return is taken from
+# its rounded start and end, so every row adds up as shown.
+#
+# project() is memoized on its normalized arguments, so the landing-page
+# default and other popular inputs cost a dict lookup; the cache is
+# dropped when the schedule changes.
+
+DEFAULT_AMOUNT = 1000
+DEFAULT_YEARS = 10
+MAX_YEARS = 50
+MAX_TOP_UPS = 20
+MAX_AMOUNT = Decimal("1000000000")  # per amount or top-up
+
+
+def year_range():
+    """``(first, last)`` start years the calculator accepts."""
+    schedule = rates.get()
+    return schedule.start_year, schedule.start_year + rates.TABLE_YEARS - MAX_YEARS
+
+
+def default_start_year(today=None):
+    if today is None:
+        today = timezone.now().date()
+    return max(today.year, rates.get().start_year)
+
+
+def _amount(text, name):
+    try:
+        value = Decimal(text.strip().replace(",", ""))
+    except (InvalidOperation, AttributeError):
+        raise ValueError(f"{name} must be a number.")
+    if not value.is_finite() or not 0 < value <= MAX_AMOUNT:
+        raise ValueError(f"{name} must be more than 0 and at most {MAX_AMOUNT:,}.")
+    return money.paise(money.fixed(value))
+
+
+def _year(text, name):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a year.")
+
+
+def parse(params, today=None):
+    """
+    ``project()`` arguments from a query dict: ``amount`` (rupees),
+    ``start_year``, ``years`` and any number of ``top_up=YEAR:AMOUNT``.
+    Missing values take the defaults; bad ones raise ValueError.
+    """
+    first, last = year_range()
+    amount = _amount(params.get("amount") or str(DEFAULT_AMOUNT), "amount")
+    start_year = _year(params.get("start_year") or default_start_year(today), "start_year")
+    if not first <= start_year <= last:
+        raise ValueError(f"start_year must be between {first} and {last}.")
+    years = _year(params.get("years") or DEFAULT_YEARS, "years")
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}.")
+
+    raw = params.getlist("top_up") if hasattr(params, "getlist") else params.get("top_up", [])
+    if len(raw) > MAX_TOP_UPS:
+        raise ValueError(f"At most {MAX_TOP_UPS} top-ups.")
+    top_ups = {}
+    for item in raw:
+        year, sep, value = item.partition(":")
+        if not sep:
+            raise ValueError("Each top_up must be YEAR:AMOUNT.")
+        year = _year(year, "top_up year")
+        if not start_year <= year < start_year + years:
+            raise ValueError(f"top_up years must be between {start_year} and {start_year + years - 1}.")
+        top_ups[year] = top_ups.get(year, 0) + _amount(value, "top_up amount")
+    return amount, start_year, years, tuple(sorted(top_ups.items()))
+
+
+def _rupees(amount):
+    return str(money.to_decimal(amount))
+
+
+@lru_cache(maxsize=4096)
+def project(amount, start_year, years, top_ups=()):
+    """
+    Year-end projection of ``amount`` paise invested at the start of
+    ``start_year`` plus ``top_ups`` (``(year, paise)`` pairs, each at the
+    start of its year) over ``years`` years, as a JSON-ready dict. Treat
+    the result as read-only: it is shared between calls.
+    """
+    schedule = rates.get()
+    added = dict(top_ups)
+    added[start_year] = added.get(start_year, 0) + amount
+
+    units = 0  # fixed-point PV held
+    invested = 0
+    end = 0
+    rows = []
+    for year in range(start_year, start_year + years):
+        top_up = money.from_paise(added.get(year, 0))
+        units += money.round_div(top_up * money.SCALE, schedule.price_fixed(year))
+        invested += top_up
+        start = end + top_up
+        end = money.mul(units, schedule.price_fixed(year + 1))
+        rows.append({
+            "year": year,
+            "rate": schedule.rate_for_year(year),
+            "added": _rupees(top_up),
+            "start": _rupees(start),
+            "return": _rupees(money.from_paise(money.paise(end) - money.paise(start))),
+            "end": _rupees(end),
+        })
+    return {
+        "amount": _rupees(money.from_paise(amount)),
+        "start_year": start_year,
+        "years": years,
+        "top_ups": [[year, _rupees(money.from_paise(paise))] for year, paise in top_ups],
+        "schedule": schedule.fingerprint,
+        "rows": rows,
+        "invested": _rupees(invested),
+        "value": _rupees(end),
+        "gain": _rupees(end - invested),
+    }
+
+
+def default(today=None):
+    """The projection shown before the visitor changes anything."""
+    return project(*parse({}, today=today))
+
+
+rates.on_change(project.cache_clear)
@@ -0,0 +1,140 @@
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import money
+
+
+# ---------------------------------------------------------
+#   PV RATE SCHEDULE
+# ---------------------------------------------------------
+#
+# The one definition of how PV grows. settings.PV_RATE_SCHEDULE gives the
+# price of 1 PV in the start year and the yearly growth rates (in %) in
+# order; the last rate holds for every later year. The default:
+#
+#   2026: 100.00   2027: 108.00 (+8%)   2028: +9%   ...   2033 on: +14%
+#
+# The same list drives both clocks the code prices on: calendar years (the
+# entry price of a purchase year) and membership years (a holding earns the
+# first rate in its first year, the second in its second, ...). Entry prices
+# for the first TABLE_YEARS years are computed once per process, so every
+# lookup is an index; later years cost one pow(). Prices are kept both as
+# floats (the reference loops in views.py, charts) and as exact fixed-point
+# integers (money.py), which every amount of money is computed from.
+#
+# Changing the setting (override_settings in tests) rebuilds the schedule
+# and calls every function registered with on_change(): valuation.py and
+# batch_valuation.py drop the tables they derived from it, and cache keys
+# carry the schedule's fingerprint (caching.py). Data stored under the old
+# rates is not rewritten here; run build_pv_snapshots and
+# repair_member_totals after a change.
+
+TABLE_YEARS = 100
+
+_schedule = None
+_listeners = []
+
+
+class RateSchedule:
+    def __init__(self, start_year, base_price, rates):
+        if not rates:
+            raise ImproperlyConfigured("PV_RATE_SCHEDULE needs at least one rate.")
+        self.start_year = int(start_year)
+        self.start = date(self.start_year, 1, 1)
+        self.base_price = float(base_price)
+        self.rates = tuple(rates)
+        self.max_rate = max(self.rates)
+        self.fingerprint = hashlib.sha1(
+            repr((self.start_year, self.base_price, self.rates)).encode()
+        ).hexdigest()[:10]
+
+        prices = [self.base_price]
+        fixed_prices = [money.fixed(base_price)]
+        for n in range(1, TABLE_YEARS + 1):
+            prices.append(prices[-1] * (1 + self.rate(n) / 100.0))
+            fixed_prices.append(money.mul(fixed_prices[-1], self.growth(n)))
+        self._prices = tuple(prices)
+        self._fixed_prices = tuple(fixed_prices)
+
+    @classmethod
+    def from_settings(cls):
+        config = settings.PV_RATE_SCHEDULE
+        return cls(config["start_year"], config["base_price"], config["rates"])
+
+    def rate(self, year_number):
+        """Rate (in %) for the n-th year (1-based) of the schedule or of a membership."""
+        return self.rates[min(max(year_number, 1), len(self.rates)) - 1]
+
+    def rate_for_year(self, year):
+        """Rate (in %) earned during calendar ``year``: the rise to next year's price."""
+        return self.rate(year - self.start_year + 1)
+
+    def price(self, year):
+        """Price of 1 PV bought in ``year``; the base price up to the start year."""
+        n = year - self.start_year
+        if n <= 0:
+            return self.base_price
+        if n <= TABLE_YEARS:
+            return self._prices[n]
+        return self._prices[TABLE_YEARS] * (1 + self.rates[-1] / 100.0) ** (n - TABLE_YEARS)
+
+    def growth(self, year_number):
+        """Fixed-point factor ``1 + rate / 100`` for the n-th year."""
+        return money.SCALE + money.round_div(money.fixed(self.rate(year_number)), 100)
+
+    def price_fixed(self, year):
+        """Exact fixed-point price of 1 PV bought in ``year`` (see ``price``)."""
+        n = year - self.start_year
+        if n <= 0:
+            return self._fixed_prices[0]
+        if n <= TABLE_YEARS:
+            return self._fixed_prices[n]
+        extra = n - TABLE_YEARS
+        return money.round_div(self._fixed_prices[TABLE_YEARS] * self.growth(n) ** extra, money.SCALE ** extra)
+
+    def price_decimal(self, year):
+        """Decimal price of 1 PV bought in ``year``, to the paisa (what Buy PV charges)."""
+        return money.to_decimal(self.price_fixed(year))
+
+    def steps(self):
+        """``(year, rate)`` for each year the rate changes to the next entry of the list."""
+        return [(self.start_year + n, rate) for n, rate in enumerate(self.rates, start=1)]
+
+    def price_rows(self, years):
+        """``(year, increase %, price)`` for ``years`` years from the start year."""
+        rows = [(self.start_year, None, self.base_price)]
+        for n in range(1, years):
+            rows.append((self.start_year + n, self.rate(n), self.price(self.start_year + n)))
+        return rows
+
+
+def get():
+    """The schedule in effect for this process."""
+    if _schedule is None:
+        reload()
+    return _schedule
+
+
+def reload():
+    """Rebuilds the schedule from settings and tells every listener."""
+    global _schedule
+    _schedule = RateSchedule.from_settings()
+    for callback in _listeners:
+        callback()
+
+
+def on_change(callback):
+    """Registers ``callback()`` to run whenever the schedule is rebuilt."""
+    _listeners.append(callback)
+    return callback
+
+
+@receiver(setting_changed)
+def _schedule_setting_changed(setting, **kwargs):
+    if setting == "PV_RATE_SCHEDULE":
+        reload()
@@ -0,0 +1,114 @@
+import re
+
+from django.db import OperationalError, connections, router, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Member
+
+
+# ---------------------------------------------------------
+#   MEMBER SEARCH INDEX
+# ---------------------------------------------------------
+#
+# An SQLite FTS5 table keyed by member id (rowid) holds each member's code,
+# the code's number and full name. It is kept in sync by the Member signals
+# (and by bulk_import for bulk_create), and ``manage.py rebuild_search_index``
+# refills it. Every search box goes through filter_members(): each word of
+# the query must prefix-match a word of the name or code ("jo sm" finds
+# "John Smith", "M00" and "42" find "M0042"). On databases without the
+# table it falls back to the old icontains filter.
+
+SEARCH_TABLE = "clubapp_member_search"
+
+_TOKEN_RE = re.compile(r"\w+")
+_available = {}
+
+
+def match_expression(query):
+    """FTS5 MATCH string for ``query``, or "" if it has no words."""
+    return " AND ".join(f'"{token}"*' for token in _TOKEN_RE.findall(query))
+
+
+def _code_numbers(member_code):
+    digits = "".join(ch for ch in member_code or "" if ch.isdigit())
+    return f"{digits} {digits.lstrip('0')}" if digits else ""
+
+
+def is_available(using):
+    """True when ``using`` is an SQLite database with the FTS5 table."""
+    if using in _available:
+        return _available[using]
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        _available[using] = False
+        return False
+    with connection.cursor() as cursor:
+        found = SEARCH_TABLE in connection.introspection.table_names(cursor)
+    if found:  # a missing table may still be created by migrate
+        _available[using] = True
+    return found
+
+
+def filter_members(queryset, query, member_field=""):
+    """
+    Narrows ``queryset`` to rows whose member matches ``query``.
+    ``member_field`` is the lookup path to the Member ("member" for
+    PVTransaction and Dividend, "" for Member itself).
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset
+    prefix = f"{member_field}__" if member_field else ""
+    if not is_available(queryset.db):
+        return queryset.filter(
+            Q(**{f"{prefix}full_name__icontains": query}) | Q(**{f"{prefix}member_code__icontains": query})
+        )
+    match = match_expression(query)
+    if not match:
+        return queryset
+    return queryset.filter(**{
+        f"{prefix}id__in": RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match])
+    })
+
+
+def index_members(members):
+    """Adds or refreshes the index rows of saved ``members``."""
+    using = router.db_for_write(Member)
+    if not members or not is_available(using):
+        return
+    rows = [(m.pk, m.member_code, _code_numbers(m.member_code), m.full_name) for m in members]
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, member_code, code_number, full_name) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_member(member_id):
+    using = router.db_for_write(Member)
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [member_id])
+
+
+def rebuild_index(batch_size=2000):
+    """Refills the whole index from Member; returns the number of rows."""
+    using = router.db_for_write(Member)
+    if not is_available(using):
+        raise OperationalError(f"{SEARCH_TABLE} does not exist on database '{using}'.")
+    count = 0
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        batch = []
+        for member in Member.objects.using(using).only("id", "member_code", "full_name").iterator(chunk_size=batch_size):
+            batch.append(member)
+            if len(batch) >= batch_size:
+                index_members(batch)
+                count += len(batch)
+                batch = []
+        index_members(batch)
+    return count + len(batch)
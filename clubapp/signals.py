@@ -0,0 +1,75 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import member_totals, search, snapshots
+from .models import Dividend, Member, PVTransaction
+
+
+# ---------------------------------------------------------
+#   LEDGER WRITES -> SNAPSHOTS AND MEMBER TOTALS
+# ---------------------------------------------------------
+# Covers the buy_pv_* / dividend_* views and the Django admin alike.
+# Deleting a member cascades to its ledger rows; nothing to update then.
+
+@receiver(post_save, sender=Member)
+def member_saved(sender, instance, created, **kwargs):
+    if not created:
+        member_totals.bump_version(instance.pk)
+    search.index_members([instance])
+
+
+@receiver(post_delete, sender=Member)
+def member_deleted(sender, instance, **kwargs):
+    search.remove_member(instance.pk)
+
+
+@receiver(pre_save, sender=PVTransaction)
+def remember_previous_transaction(sender, instance, **kwargs):
+    # buy_pv_edit can change the units and move a transaction to another member.
+    instance._previous = None
+    if instance.pk:
+        instance._previous = (
+            PVTransaction.objects.filter(pk=instance.pk).values_list("member_id", "pv_units").first()
+        )
+
+
+@receiver(post_save, sender=PVTransaction)
+def transaction_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if previous:
+        member_totals.add_transaction(previous[0], previous[1], instance.purchase_date, sign=-1)
+    member_totals.add_transaction(instance.member_id, instance.pv_units, instance.purchase_date)
+
+    snapshots.rebuild_member(instance.member, from_date=instance.purchase_date)
+    if previous and previous[0] != instance.member_id:
+        snapshots.rebuild_member(Member(pk=previous[0]), from_date=instance.purchase_date)
+
+
+@receiver(post_delete, sender=PVTransaction)
+def transaction_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Member):
+        return
+    member_totals.add_transaction(instance.member_id, instance.pv_units, instance.purchase_date, sign=-1)
+    snapshots.rebuild_member(Member(pk=instance.member_id), from_date=instance.purchase_date)
+
+
+@receiver(pre_save, sender=Dividend)
+def remember_previous_dividend(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Dividend.objects.filter(pk=instance.pk).values_list("member_id", "amount").first()
+
+
+@receiver(post_save, sender=Dividend)
+def dividend_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if previous:
+        member_totals.add_dividend(previous[0], previous[1], sign=-1)
+    member_totals.add_dividend(instance.member_id, instance.amount)
+
+
+@receiver(post_delete, sender=Dividend)
+def dividend_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Member):
+        return
+    member_totals.add_dividend(instance.member_id, instance.amount, sign=-1)
@@ -0,0 +1,171 @@
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import batch_valuation, money, valuation
+from .models import Member, PVMonthlySnapshot, PVTransaction
+
+
+# ---------------------------------------------------------
+#   MATERIALIZED MONTHLY SNAPSHOTS
+# ---------------------------------------------------------
+#
+# PVMonthlySnapshot holds the member_pv_overview grid per member and
+# month, from the member's first purchase up to a horizon a few years
+# ahead (settings.PV_SNAPSHOT_YEARS_AHEAD). Writes to PVTransaction
+# recompute only the affected member from the affected month onward;
+# months past a member's ``snapshots_through`` are computed live.
+# Values are stored rounded to the paisa and read back as fixed-point, so a
+# stored month and a live one are the same integer.
+
+
+def month_start(idx):
+    """First day of the month for a ``valuation.month_index`` value."""
+    year, month = divmod(idx - 1, 12)
+    return date(year, month + 1, 1)
+
+
+def snapshot_horizon(today=None):
+    """Month index of the last month snapshots are built through."""
+    if today is None:
+        today = timezone.now().date()
+    years_ahead = getattr(settings, "PV_SNAPSHOT_YEARS_AHEAD", 5)
+    return valuation.month_index(today.year + years_ahead, 12)
+
+
+def is_covered(member, year):
+    """True when the member's snapshots include all of ``year``."""
+    through = member.snapshots_through
+    return through is not None and through >= date(year, 12, 1)
+
+
+def _snapshot_rows(member_id, purchases, first_month, last_month):
+    rows = []
+    holdings = valuation.monthly_holdings(purchases, first_month, last_month)
+    for idx, cell in enumerate(holdings, start=first_month):
+        if cell is None:
+            continue
+        year, month = divmod(idx - 1, 12)
+        rows.append(PVMonthlySnapshot(
+            member_id=member_id, year=year, month=month + 1, pv_units=cell[0], value=money.to_float(cell[1])
+        ))
+    return rows
+
+
+@transaction.atomic
+def rebuild_member(member, from_date=None):
+    """
+    Recomputes one member's snapshots. With ``from_date`` only months from
+    that purchase month onward are rewritten; members whose snapshots were
+    never built are always rebuilt in full.
+    """
+    member = Member.objects.select_for_update().get(pk=member.pk)
+    through = snapshot_horizon()
+    if member.snapshots_through is not None:
+        through = max(through, valuation.month_index(member.snapshots_through.year, member.snapshots_through.month))
+
+    txs = PVTransaction.objects.filter(member=member).values_list("pv_units", "purchase_date")
+    purchases = valuation.effective_purchases(member.join_date, txs)
+
+    stale = PVMonthlySnapshot.objects.filter(member=member)
+    if from_date is not None and member.snapshots_through is not None:
+        start = valuation.get_effective_date(from_date)
+        stale = stale.filter(Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month))
+        first_month = valuation.month_index(start.year, start.month)
+    elif purchases:
+        first_month = min(valuation.month_index(d.year, d.month) for _, d in purchases)
+    else:
+        first_month = through + 1
+    stale.delete()
+
+    PVMonthlySnapshot.objects.bulk_create(_snapshot_rows(member.pk, purchases, first_month, through))
+    Member.objects.filter(pk=member.pk).update(snapshots_through=month_start(through))
+
+
+def rebuild_all(members, through=None, batch_size=500):
+    """
+    Full rebuild for many members, ``batch_size`` members per transaction.
+    Returns the number of snapshot rows written.
+    """
+    if through is None:
+        through = snapshot_horizon()
+    through_date = month_start(through)
+    written = 0
+
+    batch = []
+    for member in members.iterator(chunk_size=batch_size):
+        batch.append(member)
+        if len(batch) >= batch_size:
+            written += _rebuild_batch(batch, through, through_date)
+            batch = []
+    if batch:
+        written += _rebuild_batch(batch, through, through_date)
+    return written
+
+
+@transaction.atomic
+def _rebuild_batch(members, through, through_date):
+    member_ids = [m.pk for m in members]
+    txs_by_member = {}
+    tx_rows = PVTransaction.objects.filter(member_id__in=member_ids).values_list(
+        "member_id", "pv_units", "purchase_date"
+    )
+    for member_id, pv_units, purchase_date in tx_rows:
+        txs_by_member.setdefault(member_id, []).append((pv_units, purchase_date))
+
+    rows = []
+    for member in members:
+        purchases = valuation.effective_purchases(member.join_date, txs_by_member.get(member.pk, []))
+        if purchases:
+            first_month = min(valuation.month_index(d.year, d.month) for _, d in purchases)
+            rows.extend(_snapshot_rows(member.pk, purchases, first_month, through))
+
+    PVMonthlySnapshot.objects.filter(member_id__in=member_ids).delete()
+    PVMonthlySnapshot.objects.bulk_create(rows, batch_size=1000)
+    Member.objects.filter(pk__in=member_ids).update(snapshots_through=through_date)
+    return len(rows)
+
+
+def year_grids(members, year):
+    """
+    ``{member_id: [12 x (pv, value) or None]}`` read from snapshots for
+    members covered through ``year`` (see ``is_covered``).
+    """
+    grids = {m.pk: [None] * 12 for m in members}
+    rows = PVMonthlySnapshot.objects.filter(member_id__in=list(grids), year=year).values_list(
+        "member_id", "month", "pv_units", "value"
+    )
+    for member_id, month, pv_units, value in rows:
+        grids[member_id][month - 1] = (pv_units, money.from_paise(round(value * money.PAISE_PER_RUPEE)))
+    return grids
+
+
+def grids_for(members, year):
+    """
+    ``year_grids`` for covered members plus a live valuation of the rest
+    from one transaction query, through the batch engine
+    (batch_valuation.year_grids); this is what member_pv_overview shows.
+    """
+    covered = [m for m in members if is_covered(m, year)]
+    live = [m for m in members if not is_covered(m, year)]
+
+    grids = {}
+    if covered:
+        grids.update(year_grids(covered, year))
+    if live:
+        tx_by_member = {}
+        tx_rows = (
+            PVTransaction.objects
+            .filter(member__in=live)
+            .order_by("member_id", "purchase_date")
+            .values_list("member_id", "pv_units", "purchase_date")
+        )
+        for member_id, pv_units, purchase_date in tx_rows:
+            tx_by_member.setdefault(member_id, []).append((pv_units, purchase_date))
+        grids.update(batch_valuation.year_grids(
+            {m.id: valuation.effective_purchases(m.join_date, tx_by_member.get(m.id, [])) for m in live}, year
+        ))
+    return grids
@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import django
+from django.template.loader import render_to_string
+
+from . import money, pdf, rates, valuation
+from .models import Dividend, PVTransaction
+
+
+# ---------------------------------------------------------
+#   YEAR-END ANNUAL STATEMENTS
+# ---------------------------------------------------------
+#
+# One statement per member and year: opening and closing holdings
+# (December of the year before and of the year), the month-by-month grid
+# the overview shows (valuation.year_grid, the table form of
+# views.calculate_pv_value_at_date), the year's purchases and the year's
+# dividends. Manual dividends carry no date, so only distribution-run
+# dividends (by record date) can be placed in a year; the lifetime total
+# is printed as well.
+#
+# The calling process reads members CHUNK_SIZE at a time (three queries
+# per chunk) into plain dicts; worker processes value and render them and
+# never touch the database, so the work spreads across cores and the
+# database sees one reader. At most two chunks per worker are in flight,
+# so memory stays flat.
+#
+# Files go to <directory>/<year>/<member code>.<format>, atomically. A
+# member whose name or address the PDF fonts cannot show (pdf.py) gets an
+# .html statement in a PDF run.
+# manifest.jsonl next to them gets one line per finished statement,
+# appended as chunks complete; a rerun skips members whose line matches
+# their current data_version, the rate schedule (rates.py fingerprint)
+# and the format asked for, and whose file is still there, so an
+# interrupted run picks up where it stopped and an edited member, a new
+# schedule or a switch between HTML and PDF is redone.
+
+CHUNK_SIZE = 200
+FORMATS = ("html", "pdf")
+MANIFEST = "manifest.jsonl"
+MONTH_LABELS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def year_directory(directory, year):
+    return os.path.join(directory, str(year))
+
+
+def read_manifest(directory, year):
+    """``{member_id: entry}`` of finished statements; a torn last line is ignored."""
+    entries = {}
+    try:
+        with open(os.path.join(year_directory(directory, year), MANIFEST)) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry["member_id"]] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def _is_done(entry, member, directory, year, fmt, schedule):
+    return (
+        entry is not None
+        and entry["data_version"] == member.data_version
+        and entry.get("schedule") == schedule
+        and entry.get("format") == fmt
+        and os.path.exists(os.path.join(year_directory(directory, year), entry["file"]))
+    )
+
+
+def statement_inputs(members, year):
+    """Plain-data inputs for ``members`` (a list), three queries in all."""
+    ids = [m.pk for m in members]
+    txs, dividends = {}, {}
+    for member_id, units, purchase_date in (
+        PVTransaction.objects.filter(member_id__in=ids).order_by("purchase_date", "id")
+        .values_list("member_id", "pv_units", "purchase_date")
+    ):
+        txs.setdefault(member_id, []).append((units, purchase_date))
+    for member_id, amount, note, record_date in (
+        Dividend.objects.filter(member_id__in=ids, run__record_date__year=year).order_by("run__record_date", "id")
+        .values_list("member_id", "amount", "note", "run__record_date")
+    ):
+        dividends.setdefault(member_id, []).append((record_date, amount, note))
+    return [
+        {
+            "member_id": m.pk,
+            "member_code": m.member_code,
+            "full_name": m.full_name,
+            "address": m.address,
+            "join_date": m.join_date,
+            "data_version": m.data_version,
+            "total_dividends": m.total_dividends,
+            "transactions": txs.get(m.pk, []),
+            "dividends": dividends.get(m.pk, []),
+        }
+        for m in members
+    ]
+
+
+def build_statement(data, year):
+    """The figures on one member's statement for ``year``."""
+    purchases = valuation.effective_purchases(data["join_date"], data["transactions"])
+    holdings = valuation.monthly_holdings(
+        purchases, valuation.month_index(year - 1, 12), valuation.month_index(year, 12)
+    )
+    opening, months = holdings[0] or (0, 0), holdings[1:]
+    closing = months[-1] or (0, 0)
+
+    bought = []
+    for units, purchase_date in data["transactions"]:
+        day = purchase_date.date() if hasattr(purchase_date, "date") else purchase_date
+        if day.year == year:
+            price = valuation.base_price_fixed(day.year)
+            bought.append({"date": day, "pv_units": units, "price": price, "amount": units * price})
+
+    # Amounts are rounded to the paisa here, once (money.py).
+    return {
+        **{key: data[key] for key in ("member_id", "member_code", "full_name", "address", "data_version")},
+        "year": year,
+        "opening_pv": opening[0],
+        "opening_value": money.to_decimal(opening[1]),
+        "closing_pv": closing[0],
+        "closing_value": money.to_decimal(closing[1]),
+        "months": [
+            {"label": label, "pv": cell[0] if cell else 0, "value": money.to_decimal(cell[1] if cell else 0)}
+            for label, cell in zip(MONTH_LABELS, months)
+        ],
+        "purchases": [
+            {**p, "price": money.to_decimal(p["price"]), "amount": money.to_decimal(p["amount"])} for p in bought
+        ],
+        "purchased_pv": sum(p["pv_units"] for p in bought),
+        "purchased_amount": money.to_decimal(sum(p["amount"] for p in bought)),
+        "dividends": [{"date": d, "amount": amount, "note": note} for d, amount, note in data["dividends"]],
+        "year_dividends": sum((amount for _, amount, _ in data["dividends"]), 0),
+        "total_dividends": data["total_dividends"],
+    }
+
+
+def render_html(statement):
+    return render_to_string("annual_statement.html", {"s": statement}).encode()
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def render_pdf(statement):
+    pages = []
+    state = {}
+
+    def new_page():
+        page = pdf.Page(pdf.A4_PORTRAIT)
+        pages.append(page)
+        state["page"], state["y"] = page, page.height - 60
+        return page
+
+    def line(cells, bold=False, size=10):
+        if state["y"] < 60:
+            new_page()
+        for x, text, align in cells:
+            state["page"].text(x, state["y"], text, size=size, bold=bold, align=align)
+        state["y"] -= size + 6
+
+    def gap(points=10):
+        state["y"] -= points
+
+    s = statement
+    page = new_page()
+    page.text(50, state["y"], f"Annual Statement {s['year']}", size=20, bold=True, color=(15, 60, 138))
+    gap(30)
+    line([(50, f"{s['full_name']} ({s['member_code']})", "left")], bold=True, size=12)
+    if s["address"]:
+        line([(50, s["address"], "left")])
+    gap()
+    line([(50, "Opening (31 Dec prior year)", "left"), (330, f"{s['opening_pv']} PV", "left"),
+          (545, _money(s["opening_value"]), "right")])
+    line([(50, f"Closing (31 Dec {s['year']})", "left"), (330, f"{s['closing_pv']} PV", "left"),
+          (545, _money(s["closing_value"]), "right")], bold=True)
+    gap()
+
+    line([(50, "Month", "left"), (330, "PV held", "left"), (545, "Value", "right")], bold=True)
+    for month in s["months"]:
+        line([(50, month["label"], "left"), (330, str(month["pv"]), "left"), (545, _money(month["value"]), "right")])
+    gap()
+
+    line([(50, "Purchases", "left"), (250, "PV", "left"), (380, "Price", "right"), (545, "Amount", "right")],
+         bold=True)
+    for p in s["purchases"]:
+        line([(50, p["date"].isoformat(), "left"), (250, str(p["pv_units"]), "left"),
+              (380, _money(p["price"]), "right"), (545, _money(p["amount"]), "right")])
+    if not s["purchases"]:
+        line([(50, "None this year", "left")])
+    gap()
+
+    line([(50, "Dividends", "left"), (250, "Note", "left"), (545, "Amount", "right")], bold=True)
+    for d in s["dividends"]:
+        line([(50, d["date"].isoformat(), "left"), (250, d["note"][:45], "left"), (545, _money(d["amount"]), "right")])
+    line([(50, "Dividends this year", "left"), (545, _money(s["year_dividends"]), "right")], bold=True)
+    line([(50, "Dividends to date", "left"), (545, _money(s["total_dividends"]), "right")])
+
+    return pdf.document(pages, title=f"Annual Statement {s['member_code']} {s['year']}")
+
+
+RENDERERS = {"html": render_html, "pdf": render_pdf}
+
+
+def _write(path, content):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_chunk(inputs, year, fmt, directory):
+    """Builds, renders and writes one chunk; returns its manifest entries."""
+    out = year_directory(directory, year)
+    schedule = rates.get().fingerprint
+    entries = []
+    for data in inputs:
+        statement, ext = build_statement(data, year), fmt
+        try:
+            content = RENDERERS[fmt](statement)
+        except pdf.UnsupportedText:
+            content, ext = render_html(statement), "html"
+        name = f"{data['member_code']}.{ext}"
+        _write(os.path.join(out, name), content)
+        entries.append({
+            "member_id": data["member_id"],
+            "member_code": data["member_code"],
+            "data_version": data["data_version"],
+            "schedule": schedule,
+            "format": fmt,
+            "file": name,
+            "bytes": len(content),
+            "sha256": hashlib.sha256(content).hexdigest(),
+        })
+    return entries
+
+
+def _init_worker():
+    django.setup()  # a no-op after fork; needed where workers are spawned
+
+
+def generate(members, year, fmt="html", directory=".", workers=None, chunk_size=CHUNK_SIZE, restart=False,
+             progress=None):
+    """
+    Writes statements for ``members`` (a queryset). ``workers`` processes
+    (all CPUs by default; 1 works in-process). Returns ``(written,
+    skipped)``; ``progress(written, skipped)`` is called after each chunk.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown statement format {fmt!r}; use one of {', '.join(FORMATS)}.")
+    out = year_directory(directory, year)
+    os.makedirs(out, exist_ok=True)
+    manifest_path = os.path.join(out, MANIFEST)
+    if restart and os.path.exists(manifest_path):
+        os.unlink(manifest_path)
+    done = read_manifest(directory, year)
+    schedule = rates.get().fingerprint
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers != 1 else None
+    written = skipped = 0
+    pending = set()
+
+    with open(manifest_path, "a") as manifest:
+        def record(entries):
+            nonlocal written
+            manifest.writelines(json.dumps(entry) + "\n" for entry in entries)
+            manifest.flush()
+            written += len(entries)
+            if progress is not None:
+                progress(written, skipped)
+
+        def submit(chunk):
+            nonlocal pending
+            inputs = statement_inputs(chunk, year)
+            if pool is None:
+                record(write_chunk(inputs, year, fmt, directory))
+                return
+            pending.add(pool.submit(write_chunk, inputs, year, fmt, directory))
+            while len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(future.result())
+
+        try:
+            chunk = []
+            for member in members.order_by("id").iterator(chunk_size=chunk_size):
+                if _is_done(done.get(member.pk), member, directory, year, fmt, schedule):
+                    skipped += 1
+                elif len(chunk) + 1 < chunk_size:
+                    chunk.append(member)
+                else:
+                    submit(chunk + [member])
+                    chunk = []
+            if chunk:
+                submit(chunk)
+            for future in pending:
+                record(future.result())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    return written, skipped
@@ -0,0 +1,109 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import member_totals, search
+from .bulk_import import set_auto_datetimes
+from .models import Dividend, Member, PVTransaction
+
+
+# ---------------------------------------------------------
+#   SYNTHETIC DATA
+# ---------------------------------------------------------
+#
+# Reproducible members, purchases and dividends for benchmarks and load
+# tests: the same seed and counts always give the same rows. Join dates
+# start in 2024 so a good share of members and purchases predate the
+# project start and hit get_effective_date() clamping. Purchases per member
+# and units per purchase are skewed like real ledgers (most members buy a
+# few small lots, a few buy many or large ones). Everything is written
+# with bulk_create; totals are set directly and the search index is
+# updated, so the data looks as if it came in through the views.
+
+FIRST_NAMES = [
+    "Aarav", "Abdul", "Anil", "Anjali", "Arjun", "Deepa", "Divya", "Fathima", "Gopal", "Jacob",
+    "Kavya", "Lakshmi", "Manoj", "Meera", "Nikhil", "Priya", "Rahul", "Ravi", "Sanjay", "Sneha",
+    "Suresh", "Thomas", "Vidya", "Vijay",
+]
+LAST_NAMES = [
+    "Bhat", "Das", "George", "Iyer", "Joseph", "Krishnan", "Kumar", "Kurup", "Mathew", "Menon",
+    "Nair", "Panicker", "Pillai", "Rao", "Reddy", "Sharma", "Shetty", "Thomas", "Varma", "Warrier",
+]
+CITIES = ["Kochi", "Thrissur", "Kozhikode", "Kollam", "Kannur", "Palakkad", "Bengaluru", "Chennai"]
+UNIT_CHOICES = [1, 2, 5, 10, 20, 50, 100, 250]
+UNIT_WEIGHTS = [20, 18, 20, 18, 10, 8, 4, 2]
+
+FIRST_JOIN = datetime(2024, 1, 1, 9, 0)
+BATCH_SIZE = 2000
+
+
+def _random_moment(rng, start, end):
+    return start + timedelta(seconds=rng.randrange(max(1, int((end - start).total_seconds()))))
+
+
+def _member_plan(seed, n, now):
+    # One generator per member: member n is the same however the run is split.
+    rng = random.Random(f"{seed}:{n}")
+    join = _random_moment(rng, timezone.make_aware(FIRST_JOIN), now)
+    purchases = []
+    # Geometric-ish count: mean about 4, occasionally dozens.
+    while rng.random() < 0.8 and len(purchases) < 60:
+        units = rng.choices(UNIT_CHOICES, UNIT_WEIGHTS)[0]
+        purchases.append((units, _random_moment(rng, join, now)))
+    dividends = [
+        Decimal(rng.randrange(100, 500000)) / 100 for _ in range(rng.choice([0, 0, 1, 1, 2, 3]))
+    ]
+    member = Member(
+        full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        email=f"synthetic{n}@example.invalid",
+        phone_number=f"9{rng.randrange(10 ** 9):09d}",
+        address=rng.choice(CITIES),
+        password="synthetic",
+    )
+    return member, join, purchases, dividends
+
+
+def generate(count, seed=42, start=0, now=None):
+    """
+    Adds ``count`` members numbered from ``start`` with their purchases and
+    dividends; ``generate(1000)`` then ``generate(9000, start=1000)`` gives
+    the same data as ``generate(10000)`` for the same ``now``. Returns
+    ``(members, transactions, dividends)`` created.
+    """
+    now = now or timezone.now()
+    totals = [0, 0, 0]
+    for batch_start in range(start, start + count, BATCH_SIZE):
+        batch_end = min(batch_start + BATCH_SIZE, start + count)
+        plans = [_member_plan(seed, n, now) for n in range(batch_start, batch_end)]
+        with transaction.atomic():
+            totals = [a + b for a, b in zip(totals, _write_batch(plans))]
+    return tuple(totals)
+
+
+def _write_batch(plans):
+    members = []
+    for member, join, purchases, dividends in plans:
+        member.total_pv_units = sum(units for units, _ in purchases)
+        member.total_invested = sum(
+            (member_totals.invested_value(units, when) for units, when in purchases), Decimal("0.00")
+        )
+        member.total_dividends = sum(dividends, Decimal("0.00"))
+        members.append(member)
+    Member.assign_codes(members)
+    Member.objects.bulk_create(members)
+    set_auto_datetimes(Member, "join_date", [(m, join) for m, (_, join, _, _) in zip(members, plans)])
+    search.index_members(members)
+
+    txs, dates, divs = [], [], []
+    for member, (_, _, purchases, dividends) in zip(members, plans):
+        for units, when in purchases:
+            txs.append(PVTransaction(member=member, pv_units=units))
+            dates.append(when)
+        divs.extend(Dividend(member=member, amount=amount, note="Synthetic") for amount in dividends)
+    PVTransaction.objects.bulk_create(txs)
+    set_auto_datetimes(PVTransaction, "purchase_date", list(zip(txs, dates)))
+    Dividend.objects.bulk_create(divs)
+    return len(members), len(txs), len(divs)
@@ -1,3 +1,1873 @@
-from django.test import TestCase
+import csv
+import hashlib
+import importlib
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+from io import BytesIO, StringIO
+from unittest import mock
+
+from unittest import skipIf
+
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    batch_valuation, benchmarks, bulk_import, caching, certificates, db_routing, distributions, exports, instrumentation,
+    member_totals, money, pagination, pdf, projections, rates, search, snapshots, statements, synthetic, valuation,
+)
+from .models import (
+    MEMBER_CODE_SEQUENCE, Dividend, DividendRun, Member, PVMonthlySnapshot, PVTransaction, Sequence, get_pv_value_for_year,
+)
+from .views import calculate_current_value, calculate_pv_rate, calculate_pv_value_at_date
+
+
+UNIT_SAMPLES = (1, 3, 7, 50, 99, 250, 12345)
+PURCHASE_SAMPLES = (
+    date(2025, 6, 15),   # clamped to Jan 2026
+    date(2026, 1, 1),
+    date(2026, 7, 20),
+    date(2027, 12, 31),
+    date(2031, 3, 3),
+)
+OFFSET_MONTHS = 30 * 12
+
+
+def _paise(value):
+    """A float reference value in whole paise, rounded half up like money.paise()."""
+    return int((Decimal(value) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class ValuationAssertions:
+    def assertSameValuation(self, fast, reference):
+        if reference is None:
+            self.assertIsNone(fast)
+            return
+        # ``fast`` is fixed-point and exact to 1e-18; the float loop drifts
+        # by up to about one part in 1e13. They round to the same paisa
+        # unless that drift straddles a half paisa, where ``fast`` is the
+        # right one (FixedPointMoneyTests checks it against exact arithmetic).
+        self.assertIsInstance(fast, int)
+        self.assertAlmostEqual(fast / money.SCALE, reference, delta=abs(reference) * 1e-12)
+        self.assertLessEqual(abs(money.paise(fast) - reference * 100), 0.5 + abs(reference) * 1e-10)
+
+
+class ValuationTableTests(ValuationAssertions, SimpleTestCase):
+    """The precomputed factor tables must agree with the reference loops."""
+
+    def test_value_at_date_matches_reference_over_30_years(self):
+        for units in UNIT_SAMPLES:
+            for p_date in PURCHASE_SAMPLES:
+                start = valuation.get_effective_date(p_date)
+                for offset in range(-1, OFFSET_MONTHS + 1):
+                    idx = valuation.month_index(start.year, start.month) + offset - 1
+                    year, month = divmod(idx, 12)
+                    month += 1
+                    self.assertSameValuation(
+                        valuation.value_at_date(units, p_date, year, month),
+                        calculate_pv_value_at_date(units, p_date, year, month),
+                    )
+
+    def test_current_value_matches_reference_over_30_years(self):
+        for units in UNIT_SAMPLES:
+            for p_date in PURCHASE_SAMPLES:
+                for offset in range(-1, OFFSET_MONTHS + 1):
+                    idx = valuation.month_index(p_date.year, p_date.month) + offset - 1
+                    year, month = divmod(idx, 12)
+                    today = date(year, month + 1, 28)
+                    now = datetime(today.year, today.month, today.day, 12)
+                    with mock.patch("django.utils.timezone.now", return_value=now):
+                        reference = calculate_current_value(units, p_date)
+                    self.assertSameValuation(
+                        valuation.current_value(units, p_date, today=today),
+                        reference,
+                    )
+
+    def test_tables_grow_past_initial_size(self):
+        months = valuation.TABLE_MONTHS + 25
+        self.assertSameValuation(
+            valuation.value_at_date(10, date(2026, 1, 1), 2026 + months // 12, 1 + months % 12),
+            calculate_pv_value_at_date(10, date(2026, 1, 1), 2026 + months // 12, 1 + months % 12),
+        )
+
+
+class BatchEngineTests(ValuationAssertions, SimpleTestCase):
+    """Every batch engine must agree with the scalar reference functions."""
+
+    def setUp(self):
+        dates, units = [], []
+        for i, p_date in enumerate(PURCHASE_SAMPLES * 4):
+            dates.append(p_date)
+            units.append(UNIT_SAMPLES[i % len(UNIT_SAMPLES)])
+        self.cols = batch_valuation.TransactionColumns(range(len(dates)), units, dates)
+
+    def _check_engine(self, engine):
+        today = date(2034, 5, 17)
+        now = datetime(2034, 5, 17, 12)
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            expected = [calculate_current_value(u, d) for u, d in zip(self.cols.pv_units, self.cols.purchase_dates)]
+        for fast, reference in zip(engine.current_values(self.cols, today=today), expected):
+            self.assertSameValuation(fast, reference)
+
+        for year, month in ((2025, 12), (2026, 1), (2028, 7), (2041, 12)):
+            expected = [
+                calculate_pv_value_at_date(u, d, year, month)
+                for u, d in zip(self.cols.pv_units, self.cols.purchase_dates)
+            ]
+            for fast, reference in zip(engine.values_at(self.cols, year, month), expected):
+                self.assertSameValuation(fast, reference)
+
+        for projection, buy in zip(engine.projections(self.cols), self.cols.buy_value):
+            running = buy / money.SCALE
+            self.assertSameValuation(projection[0], running)
+            for i in range(1, 11):
+                running *= 1 + batch_valuation.projection_rate(i) / 100.0
+                self.assertSameValuation(projection[i], running)
+
+    def test_python_engine(self):
+        self._check_engine(batch_valuation.PythonEngine())
+
+    @skipIf(batch_valuation.np is None, "NumPy is not installed")
+    def test_numpy_engine(self):
+        self._check_engine(batch_valuation.NumpyEngine())
+
+    def test_year_grids_match_the_scalar_grid(self):
+        purchases = {
+            1: valuation.effective_purchases(date(2026, 4, 2), [(7, date(2026, 2, 1)), (3, date(2027, 8, 9))]),
+            2: valuation.effective_purchases(date(2025, 1, 1), list(zip(self.cols.pv_units, self.cols.purchase_dates))),
+            3: [],
+        }
+        for name in batch_valuation.ENGINES:
+            for year in (2025, 2027, 2031):
+                grids = batch_valuation.year_grids(purchases, year, engine=batch_valuation.get_engine(name))
+                for member_id, member_purchases in purchases.items():
+                    expected = valuation.year_grid(member_purchases, year)
+                    self.assertEqual(
+                        [cell and (cell[0], money.paise(cell[1])) for cell in grids[member_id]],
+                        [cell and (cell[0], money.paise(cell[1])) for cell in expected],
+                    )
+
+    def test_empty_columns(self):
+        cols = batch_valuation.TransactionColumns([], [], [])
+        for name in batch_valuation.ENGINES:
+            engine = batch_valuation.get_engine(name)
+            self.assertEqual(engine.current_values(cols), [])
+            self.assertEqual(engine.values_at(cols, 2027, 1), [])
+            self.assertEqual(engine.projections(cols), [])
+
+
+
+class FixedPointMoneyTests(ValuationAssertions, SimpleTestCase):
+    """
+    Properties of money.py and the fixed-point valuation core, over seeded
+    random samples: one rounding rule, exact prices and whole years, and
+    agreement with the float reference loops to the paisa.
+    """
+
+    SAMPLES = 1500
+
+    def setUp(self):
+        self.rng = random.Random(24)
+
+    def _random_date(self):
+        return date(self.rng.randrange(2020, 2046), self.rng.randrange(1, 13), self.rng.randrange(1, 29))
+
+    def test_round_div_rounds_half_away_from_zero(self):
+        with localcontext() as ctx:
+            ctx.prec = 100
+            for _ in range(self.SAMPLES):
+                d = self.rng.choice([2, 10, 100, money.SCALE, self.rng.randrange(1, 10 ** 20)])
+                n = self.rng.randrange(-10 ** 30, 10 ** 30)
+                if self.rng.random() < 0.3:
+                    n = (n // d) * d + (d // 2 if d % 2 == 0 else 0)  # exact halves
+                expected = (Decimal(n) / Decimal(d)).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+                self.assertEqual(money.round_div(n, d), int(expected))
+        self.assertEqual([money.paise(money.fixed(v)) for v in ("0.005", "0.025", "-0.025", "0.0049")], [1, 3, -3, 0])
+
+    def test_conversions_round_once(self):
+        for _ in range(self.SAMPLES):
+            places = self.rng.randrange(0, 25)
+            value = Decimal(self.rng.randrange(-10 ** 12, 10 ** 12)).scaleb(-places)
+            amount = money.fixed(value)
+            rounded = value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) + 0  # no "-0.00"
+            if places <= 18:
+                self.assertEqual(amount, int(value.scaleb(18)))
+            self.assertEqual(money.to_decimal(amount), rounded)
+            self.assertEqual(money.to_float(amount), float(rounded))
+            self.assertEqual(money.to_text(amount), f"{rounded:,}")
+            self.assertEqual(money.from_paise(money.paise(amount)), money.fixed(rounded))
+        self.assertEqual(money.fixed(1.08), money.fixed("1.08"))
+        with self.assertRaises(ValueError):
+            money.fixed(Decimal("NaN"))
+
+    def test_prices_and_whole_years_are_exact(self):
+        schedule = rates.get()
+        exact = Decimal(100)
+        for year in range(2026, 2036):
+            self.assertEqual(schedule.price_fixed(year), money.fixed(exact))
+            self.assertEqual(valuation.geometric_factor((year - 2026) * 12), money.fixed(exact / 100))
+            exact *= 1 + Decimal(schedule.rate_for_year(year)) / 100
+        # 125 PV bought in 2030 cost exactly 17967.015: a half, rounded up.
+        self.assertEqual(member_totals.invested_value(125, date(2030, 3, 1)), Decimal("17967.02"))
+        self.assertEqual(money.paise(valuation.value_at_date(125, date(2030, 3, 1), 2031, 3)), 1940438)  # 19404.37596
+
+    def _exact_paise(self, units, p_date, year, month):
+        # calculate_pv_value_at_date in 60-digit decimal arithmetic.
+        schedule = rates.get()
+        start = valuation.get_effective_date(p_date)
+        years, months = divmod(valuation.month_index(year, month) - valuation.month_index(start.year, start.month), 12)
+        with localcontext() as ctx:
+            ctx.prec = 60
+            value = units * Decimal(schedule.price_fixed(start.year)) / money.SCALE
+            for n in range(1, years + 1):
+                value *= 1 + Decimal(schedule.rate(n)) / 100
+            value *= (1 + Decimal(schedule.rate(years + 1)) / 100) ** (Decimal(months) / 12)
+            return int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    def test_valuations_agree_with_reference_to_the_paisa(self):
+        for _ in range(self.SAMPLES):
+            units = self.rng.choice([1, 7, 99, self.rng.randrange(1, 100000)])
+            p_date = self._random_date()
+            target = valuation.month_index(p_date.year, p_date.month) + self.rng.randrange(-12, 480)
+            year, month = divmod(target - 1, 12)
+            fast = valuation.value_at_date(units, p_date, year, month + 1)
+            self.assertSameValuation(fast, calculate_pv_value_at_date(units, p_date, year, month + 1))
+            if fast is not None:
+                self.assertEqual(money.paise(fast), self._exact_paise(units, p_date, year, month + 1))
+            today = date(year, month + 1, 28)
+            with mock.patch("django.utils.timezone.now", return_value=datetime(year, month + 1, 28, 12)):
+                reference = calculate_current_value(units, p_date)
+            self.assertSameValuation(valuation.current_value(units, p_date, today=today), reference)
+
+    def test_totals_are_rounded_from_the_exact_sum(self):
+        for _ in range(100):
+            n = self.rng.randrange(1, 40)
+            purchases = [(self.rng.randrange(1, 5000), self._random_date()) for _ in range(n)]
+            cols = batch_valuation.TransactionColumns(range(n), *zip(*purchases))
+            values = batch_valuation.PythonEngine().current_values(cols, today=date(2040, 6, 1))
+            total = money.to_decimal(sum(values))
+            rows = sum(money.to_decimal(v) for v in values)
+            self.assertLessEqual(abs(total - rows), Decimal("0.005") * n)
+            with mock.patch("django.utils.timezone.now", return_value=datetime(2040, 6, 1, 12)):
+                reference = sum(calculate_current_value(u, d) for u, d in purchases)
+            self.assertEqual(total * 100, _paise(reference))
+
+            grid = valuation.year_grid(valuation.effective_purchases(date(2020, 1, 1), purchases), 2040)
+            for m, cell in enumerate(grid, start=1):
+                held = [valuation.value_at_date(u, d, 2040, m) for u, d in purchases]
+                held = [v for v in held if v is not None]
+                if cell is None:
+                    self.assertEqual(held, [])
+                else:
+                    self.assertAlmostEqual(cell[1], sum(held), delta=len(held))
+
+    @skipIf(batch_valuation.np is None, "NumPy is not installed")
+    def test_engines_return_identical_integers(self):
+        n = 300
+        units = [self.rng.randrange(1, 100000) for _ in range(n)]
+        dates = [self._random_date() for _ in range(n)]
+        cols = batch_valuation.TransactionColumns(range(n), units, dates)
+        python, numpy = batch_valuation.PythonEngine(), batch_valuation.NumpyEngine()
+        self.assertEqual(python.current_values(cols, today=date(2041, 2, 1)), numpy.current_values(cols, today=date(2041, 2, 1)))
+        self.assertEqual(python.values_at(cols, 2039, 7), numpy.values_at(cols, 2039, 7))
+        self.assertEqual(python.projections(cols), numpy.projections(cols))
+
+
+class RateScheduleTests(ValuationAssertions, SimpleTestCase):
+    """Every pricing path reads the one schedule in rates.py."""
+
+    CUSTOM = {"start_year": 2026, "base_price": 50.0, "rates": [5, 6]}
+
+    def test_default_schedule(self):
+        schedule = rates.get()
+        self.assertEqual(schedule.price(2020), 100.0)
+        self.assertEqual(schedule.price(2026), 100.0)
+        self.assertAlmostEqual(schedule.price(2027), 108.0)
+        self.assertAlmostEqual(schedule.price(2028), 108.0 * 1.09)
+        self.assertEqual([schedule.rate_for_year(y) for y in range(2026, 2036)], [8, 9, 10, 11, 12, 13, 14, 14, 14, 14])
+        self.assertEqual([valuation.membership_rate(m) for m in (1, 12, 13, 24, 25, 85, 600)], [8, 8, 9, 9, 10, 14, 14])
+        last = schedule.start_year + rates.TABLE_YEARS
+        self.assertAlmostEqual(schedule.price(last + 1), schedule.price(last) * 1.14, delta=schedule.price(last) * 1e-12)
+
+    def test_pricing_paths_agree(self):
+        schedule = rates.get()
+        for year in range(2020, 2060):
+            price = schedule.price(year)
+            self.assertEqual(valuation.get_base_price_for_purchase_year(year), price)
+            self.assertEqual(get_pv_value_for_year(year), money.to_decimal(schedule.price_fixed(year)))
+            self.assertEqual(float(get_pv_value_for_year(year)), round(price, 2))
+            self.assertEqual(calculate_pv_rate(year), get_pv_value_for_year(year))
+        # A what-if projection earns each calendar year's rate, so its end
+        # amounts follow the entry prices.
+        projection = projections.project(100000, schedule.start_year, 10)
+        for row in projection["rows"]:
+            self.assertEqual(row["rate"], schedule.rate_for_year(row["year"]))
+            self.assertEqual(Decimal(row["end"]), money.to_decimal(10 * schedule.price_fixed(row["year"] + 1)))
+
+    def test_changing_the_schedule_rebuilds_every_table(self):
+        default_key = caching.global_key("x")
+        default_curve = batch_valuation.growth_curve(2027)
+        valuation.warm_tables()
+        with override_settings(PV_RATE_SCHEDULE=self.CUSTOM):
+            self.assertEqual(valuation.get_base_price_for_purchase_year(2026), 50.0)
+            self.assertEqual(get_pv_value_for_year(2029), Decimal("58.99"))  # 58.989
+            self.assertEqual(valuation.membership_rate(13), 6)
+            self.assertEqual(batch_valuation.projection_rate(1), 5)
+            self.assertNotEqual(caching.global_key("x"), default_key)
+            self.assertEqual(batch_valuation.growth_curve(2027)[1], money.fixed("55.125"))
+            for p_date in PURCHASE_SAMPLES:
+                self.assertSameValuation(
+                    valuation.value_at_date(7, p_date, 2040, 6), calculate_pv_value_at_date(7, p_date, 2040, 6),
+                )
+                with mock.patch("django.utils.timezone.now", return_value=datetime(2040, 6, 1, 12)):
+                    reference = calculate_current_value(7, p_date)
+                self.assertSameValuation(valuation.current_value(7, p_date, today=date(2040, 6, 1)), reference)
+        self.assertEqual(caching.global_key("x"), default_key)
+        self.assertEqual(batch_valuation.growth_curve(2027), default_curve)
+        self.assertEqual(valuation.get_base_price_for_purchase_year(2026), 100.0)
+
+
+def _aware(year, month, day):
+    return timezone.make_aware(datetime(year, month, day, 10))
+
+
+def _make_member(n, join, purchases):
+    """
+    A member with backdated join and purchase dates. The dates are set with
+    queryset updates, which skip signals, so any snapshots are dropped and
+    the member starts out unbuilt like pre-existing data and its totals
+    are recomputed.
+    """
+    member = Member.objects.create(full_name=f"Member {n}", email=f"m{n}@example.com")
+    Member.objects.filter(pk=member.pk).update(join_date=join)
+    for units, when in purchases:
+        tx = PVTransaction.objects.create(member=member, pv_units=units)
+        PVTransaction.objects.filter(pk=tx.pk).update(purchase_date=when)
+    PVMonthlySnapshot.objects.filter(member=member).delete()
+    Member.objects.filter(pk=member.pk).update(snapshots_through=None)
+    member_totals.repair(Member.objects.filter(pk=member.pk))
+    member.refresh_from_db()
+    return member
+
+
+class MemberPVOverviewTests(TestCase):
+    def setUp(self):
+        cache.clear()  # ids repeat between tests
+        self.members = [
+            _make_member(1, _aware(2025, 11, 5), [
+                (10, _aware(2025, 12, 1)),
+                (5, _aware(2026, 3, 14)),
+                (5, _aware(2026, 3, 20)),
+            ]),
+            _make_member(2, _aware(2026, 4, 2), [
+                (7, _aware(2026, 2, 1)),   # before join: clamped to join month
+                (3, _aware(2027, 8, 9)),
+            ]),
+            _make_member(3, _aware(2026, 6, 1), []),
+        ]
+
+    def _reference_cell(self, member, year, month):
+        join = valuation.get_effective_date(member.join_date)
+        pv, value, seen = 0, 0.0, False
+        for tx in member.pv_transactions.all():
+            tx_date = max(valuation.get_effective_date(tx.purchase_date), join)
+            val = calculate_pv_value_at_date(tx.pv_units, tx_date, year, month)
+            if val is not None:
+                pv += tx.pv_units
+                value += val
+                seen = True
+        return (pv, f"{value:,.2f}") if seen else ("-", "-")
+
+    def assertGridMatchesReference(self, years=(2026, 2027)):
+        for year in years:
+            response = self.client.get(reverse("member_pv_overview"), {"year": year})
+            rows = {row["member"].pk: row for row in response.context["member_rows"]}
+            for member in Member.objects.all():
+                cells = [(c["pv"], c["value"]) for c in rows[member.pk]["months"]]
+                expected = [self._reference_cell(member, year, m) for m in range(1, 13)]
+                self.assertEqual(cells, expected)
+                self.assertEqual(rows[member.pk]["total_pv"], sum(t.pv_units for t in member.pv_transactions.all()))
+
+    def test_grid_matches_reference(self):
+        self.assertGridMatchesReference()
+
+    def test_engines_render_the_same_grid(self):
+        for name in batch_valuation.ENGINES:
+            cache.clear()
+            with override_settings(PV_VALUATION_ENGINE=name):
+                self.assertGridMatchesReference()
+
+    def test_grid_from_snapshots_matches_reference(self):
+        call_command("build_pv_snapshots", stdout=StringIO())
+        self.assertTrue(all(snapshots.is_covered(m, 2027) for m in Member.objects.all()))
+        with self.assertNumQueries(3):
+            self.client.get(reverse("member_pv_overview"), {"year": 2027})
+        self.assertGridMatchesReference()
+
+    def test_snapshots_follow_transaction_writes(self):
+        call_command("build_pv_snapshots", stdout=StringIO())
+        first, second, third = self.members
+        url = reverse("buy_pv_edit", args=[first.pv_transactions.order_by("id").last().pk])
+        self.client.post(url, {"member_id": second.pk, "pv_units": 8})
+        PVTransaction.objects.create(member=third, pv_units=2)
+        self.client.post(reverse("buy_pv_delete", args=[second.pv_transactions.order_by("id").first().pk]))
+        self.assertGridMatchesReference(years=(2026, 2027, timezone.now().year))
+
+        incremental = list(PVMonthlySnapshot.objects.order_by("member_id", "year", "month").values_list(
+            "member_id", "year", "month", "pv_units", "value"))
+        call_command("build_pv_snapshots", stdout=StringIO())
+        rebuilt = list(PVMonthlySnapshot.objects.order_by("member_id", "year", "month").values_list(
+            "member_id", "year", "month", "pv_units", "value"))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_member_delete_cascades_snapshots(self):
+        call_command("build_pv_snapshots", stdout=StringIO())
+        self.client.post(reverse("delete_member", args=[self.members[0].pk]))
+        self.assertFalse(PVMonthlySnapshot.objects.filter(member_id=self.members[0].pk).exists())
+
+    def test_query_count_is_independent_of_page_size(self):
+        url = reverse("member_pv_overview")
+        with self.assertNumQueries(3):
+            self.client.get(url, {"year": 2027})
+        for n in range(4, 40):
+            _make_member(n, _aware(2026, 1, 1), [(1, _aware(2026, 5, 5))])
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"year": 2027})
+        self.assertEqual(len(response.context["member_rows"]), 39)
+
+
+    def _export_rows(self, **params):
+        response = self.client.get(reverse("member_pv_overview"), {"format": "csv", **params})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.reader(StringIO(content)))
+
+    def test_csv_export_matches_grid(self):
+        for year in (2026, 2027):
+            response = self.client.get(reverse("member_pv_overview"), {"year": year})
+            html_rows = {row["member"].member_code: row for row in response.context["member_rows"]}
+            header, *rows = self._export_rows(year=year)
+            self.assertEqual(header, exports.header_row())
+            self.assertEqual([r[0] for r in rows], [m.member_code for m in Member.objects.order_by("join_date", "id")])
+            for row in rows:
+                expected = html_rows[row[0]]
+                self.assertEqual(int(row[3]), expected["total_pv"])
+                for m_idx, cell in enumerate(expected["months"]):
+                    pv, value = row[4 + 2 * m_idx:6 + 2 * m_idx]
+                    if cell["pv"] == "-":
+                        self.assertEqual((pv, value), ("", ""))
+                    else:
+                        self.assertEqual(int(pv), cell["pv"])
+                        self.assertEqual(f"{float(value):,.2f}", cell["value"])
+
+    def test_csv_export_follows_search_and_snapshots(self):
+        live = self._export_rows(year=2027)
+        call_command("build_pv_snapshots", stdout=StringIO())
+        self.assertEqual(self._export_rows(year=2027), live)
+        searched = self._export_rows(year=2027, search=self.members[1].member_code)
+        self.assertEqual([r[0] for r in searched[1:]], [self.members[1].member_code])
+
+    def test_csv_export_queries_per_chunk(self):
+        for n in range(4, 12):
+            _make_member(n, _aware(2026, 1, 1), [(1, _aware(2026, 5, 5))])
+        # One member query read through, then one transaction query per
+        # chunk of 4 (no member is covered by snapshots yet).
+        with mock.patch.object(exports, "EXPORT_CHUNK_SIZE", 4), self.assertNumQueries(1 + 3):
+            response = self.client.get(reverse("member_pv_overview"), {"format": "csv", "year": 2027})
+            rows = list(response.streaming_content)
+        self.assertEqual(len(rows), 1 + 11)
+
+    @skipIf(exports.Workbook is None, "openpyxl is not installed")
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(reverse("member_pv_overview"), {"format": "xlsx", "year": 2027})
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)))
+        rows = list(workbook.active.values)
+        self.assertEqual([r[0] for r in rows[1:]], [m.member_code for m in Member.objects.order_by("join_date", "id")])
+        self.assertEqual(rows[0], tuple(exports.header_row()))
+        self.assertEqual(rows[1][3], self.members[0].total_pv_units)
+
+
+class MemberDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = _make_member(1, _aware(2026, 1, 1), [
+            (10, _aware(2026, 2, 1)),
+            (4, _aware(2027, 9, 30)),
+        ])
+        session = self.client.session
+        session["member_id"] = self.member.pk
+        session.save()
+
+    def test_engines_render_the_same_dashboard(self):
+        pages = {}
+        for name in batch_valuation.ENGINES:
+            cache.clear()
+            with override_settings(PV_VALUATION_ENGINE=name):
+                response = self.client.get(reverse("member_dashboard"))
+            self.assertEqual(response.status_code, 200)
+            pages[name] = (response.context["overall_total_value"], response.context["dashboard_data"])
+        self.assertEqual(len({repr(page) for page in pages.values()}), 1)
+
+    def test_page_has_no_inline_chart_data(self):
+        response = self.client.get(reverse("member_dashboard"))
+        self.assertNotContains(response, "graph_data")
+        self.assertContains(response, 'data-year="2027" data-units="4"')
+
+    def test_growth_curves(self):
+        response = self.client.get(reverse("member_growth_curves"))
+        self.assertEqual(response.status_code, 200)
+        curves = response.json()["curves"]
+        self.assertEqual(sorted(curves), ["2026", "2027"])
+        running = 4 * valuation.get_base_price_for_purchase_year(2027)
+        for i, point in enumerate(curves["2027"]["values"]):
+            if i:
+                running *= 1 + batch_valuation.projection_rate(i) / 100.0
+            self.assertEqual(round(point * 4, 2), round(running, 2))
+
+    def test_growth_curves_follow_member_version(self):
+        first = self.client.get(reverse("member_growth_curves")).json()
+        with self.assertNumQueries(2):  # session + version
+            self.client.get(reverse("member_growth_curves"))
+        tx = PVTransaction.objects.create(member=self.member, pv_units=1)
+        second = self.client.get(reverse("member_growth_curves")).json()
+        self.assertGreater(second["version"], first["version"])
+        self.assertIn(str(tx.purchase_date.year), second["curves"])
+
+    def test_growth_curves_revalidate_by_version(self):
+        url = reverse("member_growth_curves")
+        first = self.client.get(url)
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+        with self.assertNumQueries(2):  # session + version
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        PVTransaction.objects.create(member=self.member, pv_units=1)
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_growth_curves_require_login(self):
+        self.client.session.flush()
+        self.client.cookies.clear()
+        self.assertEqual(self.client.get(reverse("member_growth_curves")).status_code, 401)
+
+
+class CachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.members = [
+            _make_member(n, _aware(2026, 1, n), [(n, _aware(2026, 2, n))]) for n in range(1, 4)
+        ]
+        session = self.client.session
+        session["member_id"] = self.members[0].pk
+        session.save()
+
+    def test_keys_follow_member_version_and_month(self):
+        october = timezone.make_aware(datetime(2026, 10, 31, 23, 59, 30))
+        november = timezone.make_aware(datetime(2026, 11, 1, 0, 0, 1))
+        self.assertEqual(caching.valuation_month(october), "2026-10")
+        self.assertEqual(caching.seconds_to_rollover(october), 30)
+        self.assertEqual(caching.seconds_to_rollover(timezone.make_aware(datetime(2026, 12, 31, 23, 59))), 60)
+        self.assertNotEqual(caching.member_key("x", 1, 5, now=october), caching.member_key("x", 1, 5, now=november))
+        self.assertNotEqual(caching.member_key("x", 1, 5, now=october), caching.member_key("x", 1, 6, now=october))
+
+    def test_overview_recomputes_only_changed_members(self):
+        url = reverse("member_pv_overview")
+        first = self.client.get(url, {"year": 2026}).context["member_rows"]
+        with self.assertNumQueries(2):  # count + page; every grid is cached
+            self.client.get(url, {"year": 2026})
+
+        PVTransaction.objects.create(member=self.members[1], pv_units=4)
+        with mock.patch.object(snapshots, "grids_for", wraps=snapshots.grids_for) as grids_for:
+            second = self.client.get(url, {"year": 2026}).context["member_rows"]
+        grids_for.assert_called_once()
+        self.assertEqual([m.pk for m in grids_for.call_args.args[0]], [self.members[1].pk])
+        self.assertEqual(first[0]["months"], second[0]["months"])
+        self.assertNotEqual(first[1]["months"], second[1]["months"])
+
+    def test_dashboard_follows_ledger_writes_and_month_rollover(self):
+        url = reverse("member_dashboard")
+        before = self.client.get(url).context["overall_total_value"]
+        with mock.patch("clubapp.views._dashboard_rows") as rows:
+            self.client.get(url)
+        rows.assert_not_called()
+
+        Dividend.objects.create(member=self.members[0], amount=Decimal("1.00"))
+        with mock.patch("clubapp.views._dashboard_rows", return_value=([], Decimal("0.00"))) as rows:
+            self.client.get(url)
+        rows.assert_called_once()
+
+        session = self.client.session
+        session.set_expiry(800 * 24 * 60 * 60)
+        session.save()
+        next_year = timezone.now() + timedelta(days=366)
+        with mock.patch("django.utils.timezone.now", return_value=next_year):
+            later = self.client.get(url).context["overall_total_value"]
+        self.assertGreater(later, before)
+
+    def test_certificate_and_projection_are_cached(self):
+        tx = self.members[0].pv_transactions.get()
+        url = reverse("member_certificate", args=[tx.pk])
+        self.assertContains(self.client.get(url), "Member 1")
+        with self.assertNumQueries(2):  # session + transaction
+            self.assertContains(self.client.get(url), "Member 1")
+        member = self.members[0]
+        member.full_name = "Renamed Member"
+        member.save()
+        self.assertContains(self.client.get(url), "Renamed Member")
+
+        self.client.get(reverse("project_value"))
+        hits = projections.project.cache_info().hits
+        response = self.client.get(reverse("project_value"))
+        self.assertEqual(projections.project.cache_info().hits, hits + 1)
+        self.assertEqual(len(response.context["projection"]["rows"]), 10)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}}
+            with override_settings(CACHES=backend):
+                first = self.client.get(reverse("member_dashboard")).context["dashboard_data"]
+                with mock.patch("clubapp.views._dashboard_rows") as rows:
+                    second = self.client.get(reverse("member_dashboard")).context["dashboard_data"]
+                rows.assert_not_called()
+                self.assertEqual(first, second)
+                self.assertTrue(os.listdir(location))
+
+
+class CertificateTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        override = override_settings(PV_CERTIFICATE_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.member = _make_member(1, _aware(2026, 1, 1), [(10, _aware(2026, 2, 1)), (4, _aware(2026, 9, 30))])
+        self.member.address = "Kochi, Kerala"
+        self.member.save()
+        session = self.client.session
+        session["member_id"] = self.member.pk
+        session.save()
+
+    def _pdf_files(self):
+        return sorted(os.path.join(root, f) for root, _, files in os.walk(self.dir) for f in files)
+
+    def test_pdf_download_renders_once(self):
+        tx = self.member.pv_transactions.order_by("id").first()
+        url = reverse("member_certificate_pdf", args=[tx.pk])
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        body = b"".join(response.streaming_content)
+        self.assertTrue(body.startswith(b"%PDF-1.4"))
+        self.assertTrue(body.rstrip().endswith(b"%%EOF"))
+        self.assertEqual(len(self._pdf_files()), 1)
+
+        with mock.patch.object(certificates, "render_pdf") as render:
+            again = b"".join(self.client.get(url).streaming_content)
+        render.assert_not_called()
+        self.assertEqual(again, body)
+
+        self.member.full_name = "Member One"
+        self.member.save()
+        renamed = b"".join(self.client.get(url).streaming_content)
+        self.assertNotEqual(renamed, body)
+        self.assertEqual(len(self._pdf_files()), 2)
+
+    def test_pdf_content(self):
+        tx = self.member.pv_transactions.order_by("id").first()
+        fields = certificates.certificate_fields(tx)
+        self.assertEqual(fields["buy_pv_value"], "1,000.00")
+        self.assertEqual(fields["issued_on"], "2026-02-01")
+        content = zlib.decompress(certificates.render_pdf(fields).split(b"stream\n", 1)[1].split(b"\nendstream")[0])
+        for text in (b"(Member 1)", b"(Kochi, Kerala)", b"(1,000.00 PV)", b"(ISSUED ON: 2026-02-01)"):
+            self.assertIn(text, content)
+        self.assertEqual(certificates.render_pdf(fields), certificates.render_pdf(fields))
+
+    def test_non_latin_name_gets_the_html_certificate(self):
+        self.member.full_name = "അനിൽ കുമാർ"  # Malayalam
+        self.member.save()
+        tx = self.member.pv_transactions.order_by("id").first()
+        with self.assertRaises(pdf.UnsupportedText):
+            certificates.render_pdf(certificates.certificate_fields(tx))
+        self.assertFalse(pdf.supports("अनिल"))
+        self.assertTrue(pdf.supports("José Müller"))
+
+        response = self.client.get(reverse("member_certificate_pdf", args=[tx.pk]))
+        self.assertRedirects(response, reverse("member_certificate", args=[tx.pk]))
+        self.assertContains(self.client.get(response["Location"]), "അനിൽ കുമാർ")
+        self.assertEqual(self._pdf_files(), [])
+
+        out = StringIO()
+        call_command("render_certificates", "--workers", "1", stdout=out)
+        self.assertIn("Rendered 0 certificates (0 already on disk)", out.getvalue())
+        self.assertIn("2 certificates have text the PDF fonts cannot show", out.getvalue())
+
+    def test_other_members_transactions_are_hidden(self):
+        other = _make_member(2, _aware(2026, 1, 1), [(1, _aware(2026, 3, 1))])
+        url = reverse("member_certificate_pdf", args=[other.pv_transactions.get().pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_batch_command_renders_only_new_certificates(self):
+        out = StringIO()
+        call_command("render_certificates", "--workers", "2", stdout=out)
+        self.assertIn("Rendered 2 certificates (0 already on disk)", out.getvalue())
+        first = self._pdf_files()
+        self.assertEqual(len(first), 2)
+
+        PVTransaction.objects.create(member=self.member, pv_units=1)
+        out = StringIO()
+        call_command("render_certificates", "--workers", "1", stdout=out)
+        self.assertIn("Rendered 1 certificates (2 already on disk)", out.getvalue())
+        self.assertEqual(len(self._pdf_files()), 3)
+
+        out = StringIO()
+        call_command("render_certificates", "--since", "2026-09-01", "--workers", "1", stdout=out)
+        self.assertIn("Rendered 0 certificates (2 already on disk)", out.getvalue())
+
+
+class MemberTotalsTests(TestCase):
+    def setUp(self):
+        self.first = _make_member(1, _aware(2026, 1, 1), [(10, _aware(2027, 2, 1))])
+        self.second = _make_member(2, _aware(2026, 1, 1), [])
+
+    def assertTotalsInSync(self):
+        self.assertEqual(member_totals.repair(Member.objects.all(), fix=False), [])
+
+    def test_fixture_totals(self):
+        self.assertEqual(self.first.total_pv_units, 10)
+        self.assertEqual(self.first.total_invested, Decimal("1080.00"))
+
+    def test_totals_follow_ledger_writes(self):
+        self.client.post(reverse("buy_pv_add"), {"member_id": self.second.pk, "pv_units": 4})
+        tx = self.first.pv_transactions.get()
+        self.client.post(reverse("buy_pv_edit", args=[tx.pk]), {"member_id": self.second.pk, "pv_units": 6})
+        self.client.post(reverse("dividend_add"), {"member_id": self.first.pk, "amount": "12.50"})
+        dividend = Dividend.objects.get()
+        self.client.post(reverse("dividend_edit", args=[dividend.pk]), {"member_id": self.second.pk, "amount": "20"})
+        self.assertTotalsInSync()
+
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.total_pv_units, 10)
+        self.assertEqual(self.second.total_dividends, Decimal("20.00"))
+
+        self.client.post(reverse("buy_pv_delete", args=[tx.pk]))
+        self.client.post(reverse("dividend_delete", args=[dividend.pk]))
+        self.assertTotalsInSync()
+
+    def test_saving_a_stale_member_keeps_ledger_updates(self):
+        stale = Member.objects.get(pk=self.first.pk)
+        version = stale.data_version
+        member_totals.add_transaction(self.first.pk, 5, _aware(2026, 3, 1))
+        member_totals.add_dividend(self.first.pk, "7.50")
+
+        stale.full_name = "Renamed"
+        stale.save()
+        self.client.post(reverse("edit_member", args=[self.first.pk]), {
+            "full_name": "Edited", "email": stale.email, "phone_number": "", "address": "Thrissur",
+        })
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.full_name, "Edited")
+        self.assertEqual(self.first.total_pv_units, 15)
+        self.assertEqual(self.first.total_invested, Decimal("1580.00"))
+        self.assertEqual(self.first.total_dividends, Decimal("7.50"))
+        self.assertEqual(self.first.data_version, version + 4)  # two ledger writes, two saves
+
+    def test_migration_backfills_existing_members(self):
+        backfill = importlib.import_module("clubapp.migrations.0015_backfill_member_totals").backfill_member_totals
+        Dividend.objects.create(member=self.first, amount=Decimal("450"))
+        Member.objects.update(total_pv_units=0, total_invested=0, total_dividends=0)  # as 0008 left them
+        backfill(django_apps, None)
+        self.assertTotalsInSync()
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.total_pv_units, self.first.total_dividends), (10, Decimal("450.00")))
+
+    def test_repair_command(self):
+        Member.objects.filter(pk=self.first.pk).update(total_pv_units=0, total_dividends=5)
+        with self.assertRaises(CommandError):
+            call_command("repair_member_totals", "--check", stdout=StringIO())
+        call_command("repair_member_totals", stdout=StringIO())
+        self.assertTotalsInSync()
+
+
+class MemberCodeTests(TestCase):
+    def test_codes_are_sequential(self):
+        codes = [Member.objects.create(full_name="A", email=f"a{i}@example.com").member_code for i in range(3)]
+        first = int(codes[0][1:])
+        self.assertEqual(codes, [f"M{n:04d}" for n in range(first, first + 3)])
+
+    def test_bulk_assignment_reserves_one_block(self):
+        members = [Member(full_name="B", email=f"b{i}@example.com", password="x") for i in range(2000)]
+        with self.assertNumQueries(4):  # savepoint, update, read back, release
+            Member.assign_codes(members)
+        Member.objects.bulk_create(members)
+        codes = [int(m.member_code[1:]) for m in members]
+        self.assertEqual(codes, list(range(codes[0], codes[0] + 2000)))
+        self.assertEqual(Member.objects.create(full_name="C", email="c@example.com").member_code[1:],
+                         str(codes[-1] + 1).zfill(4))
+
+    def test_codes_grow_past_9999(self):
+        Sequence.objects.filter(name=MEMBER_CODE_SEQUENCE).update(next_value=9999)
+        first = Member.objects.create(full_name="D", email="d1@example.com")
+        second = Member.objects.create(full_name="D", email="d2@example.com")
+        self.assertEqual((first.member_code, second.member_code), ("M9999", "M10000"))
+
+    def test_missing_sequence_row_is_created(self):
+        Sequence.objects.all().delete()
+        self.assertEqual(Member.objects.create(full_name="E", email="e@example.com").member_code, "M0001")
+
+
+class MemberSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()  # ids repeat between tests
+        self.john = Member.objects.create(full_name="John Smith", email="john@example.com")
+        self.jose = Member.objects.create(full_name="José Mathew", email="jose@example.com")
+        self.anna = Member.objects.create(full_name="Anna Johnson", email="anna@example.com")
+        PVTransaction.objects.create(member=self.john, pv_units=3)
+        PVTransaction.objects.create(member=self.anna, pv_units=4)
+        Dividend.objects.create(member=self.jose, amount=Decimal("10.00"))
+
+    def _found(self, query):
+        return set(search.filter_members(Member.objects.all(), query))
+
+    def test_index_is_available_in_tests(self):
+        self.assertTrue(search.is_available("default"))
+
+    def test_words_prefix_match_name_and_code(self):
+        self.assertEqual(self._found("jo"), {self.john, self.jose, self.anna})
+        self.assertEqual(self._found("jo sm"), {self.john})
+        self.assertEqual(self._found("smith john"), {self.john})
+        self.assertEqual(self._found("jose"), {self.jose})
+        self.assertEqual(self._found(self.anna.member_code), {self.anna})
+        self.assertEqual(self._found(self.anna.member_code.lstrip("M0")), {self.anna})
+        self.assertEqual(self._found("mith"), set())
+        self.assertEqual(self._found('"*()'), {self.john, self.jose, self.anna})
+
+    def test_index_follows_member_writes(self):
+        self.john.full_name = "Jonathan Price"
+        self.john.save()
+        self.assertEqual(self._found("smith"), set())
+        self.assertEqual(self._found("pri"), {self.john})
+        self.jose.delete()
+        self.assertEqual(self._found("jo"), {self.john, self.anna})
+        bulk_import.import_csv("members", ["full_name,email\n", "Smitha Rao,smitha@example.com\n"])
+        self.assertEqual({m.full_name for m in self._found("smi")}, {"Smitha Rao"})
+
+    def test_list_views_use_the_index(self):
+        response = self.client.get(reverse("list_members"), {"search": "john"})
+        self.assertEqual({m.pk for m in response.context["page_obj"]}, {self.john.pk, self.anna.pk})
+        response = self.client.get(reverse("buy_pv_list"), {"q": "smith"})
+        self.assertEqual([t.member_id for t in response.context["page_obj"]], [self.john.pk])
+        response = self.client.get(reverse("dividend_list"), {"q": "mat"})
+        self.assertEqual([d.member_id for d in response.context["page_obj"]], [self.jose.pk])
+        response = self.client.get(reverse("member_pv_overview"), {"search": "anna"})
+        self.assertEqual([r["member"].pk for r in response.context["member_rows"]], [self.anna.pk])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.SEARCH_TABLE}")
+        self.assertEqual(self._found("john"), set())
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self._found("john"), {self.john, self.anna})
+
+    def test_falls_back_to_icontains_without_the_index(self):
+        with mock.patch.object(search, "is_available", return_value=False):
+            self.assertEqual(self._found("mith"), {self.john})
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()  # ids repeat between tests
+        same_day = _aware(2026, 2, 3)
+        self.members = [_make_member(n, _aware(2026, 1, 1 + n % 3), []) for n in range(7)]
+        for n, member in enumerate(self.members):
+            for units in range(1, 4):
+                tx = PVTransaction.objects.create(member=member, pv_units=units)
+                # Many rows share a purchase_date; id breaks the ties.
+                PVTransaction.objects.filter(pk=tx.pk).update(purchase_date=same_day if units < 3 else _aware(2026, 1, 1 + n))
+
+    def _walk(self, paginator, cursor=None, attr="next_cursor"):
+        pages = []
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append([obj.pk for obj in page])
+            cursor = getattr(page, attr)
+            if cursor is None:
+                return pages
+
+    def test_pages_match_offset_pagination_both_ways(self):
+        cases = [
+            (PVTransaction.objects.all(), ("-purchase_date", "-id")),
+            (Member.objects.all(), ("join_date", "id")),
+            (Member.objects.all(), ("-join_date", "-id")),
+            (Dividend.objects.all(), ("-id",)),
+        ]
+        for queryset, ordering in cases:
+            expected = list(queryset.order_by(*ordering).values_list("pk", flat=True))
+            paginator = pagination.KeysetPaginator(queryset, ordering, per_page=4)
+            forward = self._walk(paginator)
+            self.assertEqual([pk for page in forward for pk in page], expected)
+            self.assertTrue(all(len(page) == 4 for page in forward[:-1]))
+
+            last = paginator.get_page(None)
+            while last.has_next():
+                last = paginator.get_page(last.next_cursor)
+            backward = self._walk(paginator, last.previous_cursor, "previous_cursor") if last.has_previous() else []
+            self.assertEqual(list(reversed(backward)), forward[:-1])
+
+    def test_cursor_mode_in_list_views(self):
+        url = reverse("buy_pv_list")
+        with self.assertNumQueries(1):  # no COUNT, no OFFSET
+            first = self.client.get(url, {"paging": "cursor"}).context["page_obj"]
+        self.assertFalse(first.has_previous())
+        second = self.client.get(url, {"cursor": first.next_cursor}).context["page_obj"]
+        expected = list(PVTransaction.objects.order_by("-purchase_date", "-id").values_list("pk", flat=True))
+        self.assertEqual([t.pk for t in first] + [t.pk for t in second], expected[:20])
+        back = self.client.get(url, {"cursor": second.previous_cursor}).context["page_obj"]
+        self.assertEqual([t.pk for t in back], [t.pk for t in first])
+
+        for name in ("list_members", "dividend_list", "member_pv_overview"):
+            response = self.client.get(reverse(name), {"paging": "cursor"})
+            self.assertTrue(response.context["page_obj"].is_cursor)
+        response = self.client.get(reverse("member_pv_overview"), {"paging": "cursor", "year": 2026})
+        self.assertEqual([r["member"].pk for r in response.context["member_rows"]],
+                         list(Member.objects.order_by("join_date", "id").values_list("pk", flat=True)))
+
+    def test_page_numbers_still_work_and_bad_cursors_restart(self):
+        response = self.client.get(reverse("buy_pv_list"), {"page": 2})
+        self.assertEqual(response.context["page_obj"].number, 2)
+        response = self.client.get(reverse("buy_pv_list"), {"cursor": "forged:token"})
+        self.assertEqual(len(response.context["page_obj"]), 10)
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+
+@contextmanager
+def _recorded_selects():
+    """Records (sql, params) of every SELECT run on the default database."""
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield queries
+
+
+class QueryPlanAssertions:
+    def query_plan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScans(self, sql, params=()):
+        """
+        Fails on a bare ``SCAN <table>`` (no index) unless the query is
+        LIMITed and needs no sort, i.e. it reads rows in order and stops.
+        """
+        plan = self.query_plan(sql, params)
+        bounded = " LIMIT " in sql.upper() and not any("TEMP B-TREE" in line for line in plan)
+        for line in plan:
+            if FULL_SCAN_RE.match(line) and not bounded:
+                self.fail(f"Full table scan ({line}) in:\n{sql}\nPlan: {plan}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        sql, params = queryset.query.sql_with_params()
+        plan = self.query_plan(sql, params)
+        self.assertTrue(any(index_name in line for line in plan), plan)
+        self.assertFalse(any("TEMP B-TREE FOR ORDER BY" in line for line in plan), plan)
+
+
+FULL_SCAN_RE = re.compile(r"^SCAN \w+( AS \w+)?$")
+
+
+@skipIf(connection.vendor != "sqlite", "query plans are checked on SQLite")
+class QueryPlanTests(QueryPlanAssertions, TestCase):
+    """Hot view queries must stay on indexes as the views change."""
+
+    HOT_VIEWS = [
+        ("member_pv_overview", {}),
+        ("member_pv_overview", {"year": 2027, "search": "Member"}),
+        ("member_pv_overview", {"paging": "cursor"}),
+        ("list_members", {}),
+        ("list_members", {"search": "Member 2"}),
+        ("list_members", {"paging": "cursor"}),
+        ("buy_pv_list", {}),
+        ("buy_pv_list", {"q": "Member"}),
+        ("buy_pv_list", {"paging": "cursor"}),
+        ("dividend_list", {}),
+        ("dividend_list", {"q": "Member"}),
+        ("dividend_list", {"paging": "cursor"}),
+        ("member_dashboard", {}),
+        ("member_growth_curves", {}),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.members = [
+            _make_member(n, _aware(2026, 1, n), [(n, _aware(2026, 2, n)), (2, _aware(2026, 5, 1))])
+            for n in range(1, 4)
+        ]
+        for member in self.members:
+            Dividend.objects.create(member=member, amount=Decimal("5.00"))
+        call_command("build_pv_snapshots", self.members[0].member_code, stdout=StringIO())
+        session = self.client.session
+        session["member_id"] = self.members[0].pk
+        session.save()
+
+    def test_hot_views_have_no_full_scans(self):
+        for name, params in self.HOT_VIEWS:
+            with self.subTest(view=name, params=params):
+                with _recorded_selects() as queries:
+                    self.assertEqual(self.client.get(reverse(name), params).status_code, 200)
+                self.assertTrue(queries)
+                for sql, sql_params in queries:
+                    self.assertNoFullScans(sql, sql_params)
+
+    def test_next_cursor_pages_seek_the_index(self):
+        for name, params in (("buy_pv_list", {}), ("list_members", {}), ("member_pv_overview", {})):
+            first = self.client.get(reverse(name), {"paging": "cursor", **params}).context["page_obj"]
+            self.assertIsNotNone(first)
+            cursor = first.next_cursor or first.previous_cursor
+            if cursor is None:
+                continue
+            with _recorded_selects() as queries:
+                self.client.get(reverse(name), {"cursor": cursor})
+            for sql, sql_params in queries:
+                self.assertNoFullScans(sql, sql_params)
+
+    def test_ledger_access_paths_use_composite_indexes(self):
+        member = self.members[0]
+        self.assertUsesIndex(
+            PVTransaction.objects.filter(member=member).order_by("-purchase_date"), "pvtx_member_purchase_date_idx"
+        )
+        self.assertUsesIndex(
+            PVTransaction.objects.filter(member__in=self.members).order_by("member_id", "purchase_date"),
+            "pvtx_member_purchase_date_idx",
+        )
+        self.assertUsesIndex(Dividend.objects.filter(member=member).order_by("-id"), "clubapp_dividend_member_id")
+        self.assertUsesIndex(Member.objects.order_by("join_date", "id")[:50], "member_join_date_id_idx")
+        self.assertUsesIndex(PVTransaction.objects.order_by("-purchase_date", "-id")[:10], "pvtx_purchase_date_id_idx")
+        self.assertUsesIndex(
+            PVMonthlySnapshot.objects.filter(member_id__in=[m.pk for m in self.members], year=2026),
+            "(member_id=? AND year=?)",  # the unique (member, year, month) constraint
+        )
+
+    def test_detects_a_full_scan(self):
+        with self.assertRaises(AssertionError):
+            self.assertNoFullScans(*Member.objects.filter(phone_number="1").query.sql_with_params())
+
+
+class BulkImportTests(TestCase):
+    MEMBERS_CSV = (
+        "full_name,email,phone_number,address\n"
+        "Asha,asha@example.com,111,Kochi\n"
+        "Ravi,ravi@example.com,,\n"
+        ",nobody@example.com,,\n"
+        "Dup,asha@example.com,,\n"
+        "Bad,not-an-email,,\n"
+    )
+
+    def _import(self, kind, text, chunk_size=2):
+        return bulk_import.import_csv(kind, StringIO(text), chunk_size=chunk_size)
+
+    def test_members_are_created_and_bad_rows_reported(self):
+        result = self._import("members", self.MEMBERS_CSV)
+        self.assertEqual((result.created, result.rejected), (2, 3))
+        self.assertEqual([line for line, _ in result.rejects], [4, 5, 6])
+        codes = list(Member.objects.order_by("member_code").values_list("member_code", flat=True))
+        self.assertEqual(len(set(codes)), 2)
+        self.assertTrue(all(Member.objects.values_list("password", flat=True)))
+
+    def test_transactions_and_dividends_keep_derived_data_in_sync(self):
+        self._import("members", self.MEMBERS_CSV)
+        asha, ravi = Member.objects.order_by("id")
+        result = self._import("transactions", (
+            "member_code,pv_units,purchase_date\n"
+            f"{asha.member_code},10,2025-06-01\n"
+            f"{asha.member_code},5,2026-03-15T09:30:00\n"
+            f"{ravi.member_code},3,\n"
+            f"{ravi.member_code},-1,\n"
+            "M9999,1,\n"
+            f"{ravi.member_code},1,2999-01-01\n"
+        ))
+        self.assertEqual((result.created, result.rejected), (3, 3))
+        self.assertEqual(
+            sorted(d.year for d in asha.pv_transactions.values_list("purchase_date", flat=True)), [2025, 2026]
+        )
+
+        result = self._import("dividends", (
+            "member_code,amount,note\n"
+            f"{asha.member_code},12.50,Q1\n"
+            f"{asha.member_code},1.234,bad\n"
+        ))
+        self.assertEqual((result.created, result.rejected), (1, 1))
+
+        self.assertEqual(member_totals.repair(Member.objects.all(), fix=False), [])
+        asha.refresh_from_db()
+        self.assertEqual((asha.total_pv_units, asha.total_dividends), (15, Decimal("12.50")))
+        self.assertFalse(snapshots.is_covered(asha, 2027))
+        call_command("build_pv_snapshots", stdout=StringIO())
+        asha.refresh_from_db()
+        self.assertTrue(snapshots.is_covered(asha, 2027))
+
+    def test_command_and_upload_view(self):
+        path = self._write_temp(self.MEMBERS_CSV)
+        out, err = StringIO(), StringIO()
+        call_command("import_csv", "members", path, stdout=out, stderr=err)
+        self.assertIn("Imported 2 members (3 rejected)", out.getvalue())
+        self.assertIn("line 4:", err.getvalue())
+
+        session = self.client.session
+        session["admin_user"] = True
+        session.save()
+        upload = SimpleUploadedFile("m.csv", b"full_name,email\nNew,new@example.com\n", content_type="text/csv")
+        response = self.client.post(reverse("import_csv"), {"kind": "members", "file": upload})
+        self.assertEqual(response.context["result"].created, 1)
+        self.assertTrue(Member.objects.filter(email="new@example.com").exists())
+
+    def _write_temp(self, text):
+        f = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        self.addCleanup(os.unlink, f.name)
+        with f:
+            f.write(text)
+        return f.name
+
+
+class SyntheticDataTests(TestCase):
+    NOW = timezone.make_aware(datetime(2026, 10, 16, 12, 0))
+
+    def _snapshot(self):
+        return (
+            list(Member.objects.order_by("id").values_list(
+                "member_code", "full_name", "email", "join_date", "total_pv_units", "total_invested", "total_dividends")),
+            list(PVTransaction.objects.order_by("id").values_list("member__email", "pv_units", "purchase_date")),
+            list(Dividend.objects.order_by("id").values_list("member__email", "amount")),
+        )
+
+    def test_incremental_runs_match_a_single_run(self):
+        synthetic.generate(30, seed=7, now=self.NOW)
+        single = self._snapshot()
+        Member.objects.all().delete()
+        Sequence.objects.all().delete()
+        synthetic.generate(10, seed=7, now=self.NOW)
+        synthetic.generate(20, seed=7, start=10, now=self.NOW)
+        self.assertEqual(self._snapshot(), single)
+
+    def test_data_is_consistent_and_exercises_clamping(self):
+        members, txs, dividends = synthetic.generate(60, now=self.NOW)
+        self.assertEqual(members, 60)
+        self.assertEqual(PVTransaction.objects.count(), txs)
+        self.assertEqual(Dividend.objects.count(), dividends)
+        self.assertEqual(member_totals.repair(Member.objects.all(), fix=False), [])
+        self.assertTrue(PVTransaction.objects.filter(purchase_date__year__lt=rates.get().start_year).exists())
+        self.assertFalse(PVTransaction.objects.filter(purchase_date__gt=self.NOW).exists())
+        first = Member.objects.first()
+        self.assertIn(first, search.filter_members(Member.objects.all(), first.full_name))
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_suite_times_every_url(self):
+        results = benchmarks.run_suite([10, 20], repeat=1)
+        json.dumps(results)
+        self.assertEqual(set(results["scales"]), {"10", "20"})
+        entry = results["scales"]["20"]
+        self.assertEqual(entry["members"], 20)
+        self.assertIn("valuation.current_value", entry["valuation"])
+        self.assertIn("engine.python.current_values", entry["valuation"])
+        names = {p.name for p in benchmarks.urls.urlpatterns}
+        self.assertEqual(set(entry["urls"]), names)
+        for name, row in entry["urls"].items():
+            if "skipped" not in row:
+                self.assertLess(row["status"], 500, name)
+        # Pages behind the member or admin login were measured logged in,
+        # also after the logout routes ran.
+        for name in (
+            "admin_dashboard", "member_dashboard", "member_growth_curves", "member_certificate",
+            "member_certificate_pdf", "import_csv", "dividend_runs", "api_member", "api_member_transactions",
+            "api_member_projections", "api_member_dividends",
+        ):
+            self.assertEqual(entry["urls"][name]["status"], 200, name)
+        for name in ("list_members", "member_dashboard", "member_pv_overview", "api_member"):
+            self.assertGreater(entry["urls"][name]["queries"], 0, name)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.registry.reset()
+        Member.objects.create(full_name="Asha", email="asha@example.com")
+        session = self.client.session
+        session["admin_user"] = True
+        session.save()
+
+    def test_percentiles_come_from_the_histogram(self):
+        stats = instrumentation._empty_stats()
+        for ms in [1] * 90 + [50] * 9 + [900]:
+            stats["count"] += 1
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["histogram"][instrumentation.bisect.bisect_left(instrumentation.BUCKETS, ms)] += 1
+        p50, p95, p99 = (instrumentation.percentile(stats, f) for f in (0.5, 0.95, 0.99))
+        self.assertTrue(1 <= p50 < 1.2, p50)
+        self.assertTrue(50 <= p95 < 60, p95)
+        self.assertTrue(50 <= p99 < 60, p99)
+        self.assertEqual(instrumentation.percentile(stats, 1.0), 900)
+
+    def test_requests_are_recorded_per_view(self):
+        for _ in range(3):
+            self.client.get(reverse("list_members"))
+        self.client.get("/no-such-page/")
+        rows = {row["view"]: row for row in instrumentation.summary()}
+        row = rows["list_members"]
+        self.assertEqual(row["count"], 3)
+        self.assertGreater(row["queries"], 0)
+        self.assertGreater(row["template_ms"], 0)
+        self.assertTrue(0 < row["p50"] <= row["p95"] <= row["p99"] <= row["max"])
+        self.assertEqual(rows[instrumentation.UNRESOLVED]["count"], 1)
+
+    def test_pending_counts_flush_on_schedule(self):
+        with override_settings(PV_METRICS_FLUSH_SECONDS=3600):
+            self.client.get(reverse("list_members"))
+            self.assertIsNone(cache.get(instrumentation.CACHE_KEY))
+        with override_settings(PV_METRICS_FLUSH_SECONDS=0):
+            self.client.get(reverse("list_members"))
+            self.assertEqual(cache.get(instrumentation.CACHE_KEY)["list_members"]["count"], 2)
+
+    @override_settings(PV_SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged(self):
+        with self.assertLogs("clubapp.instrumentation", "WARNING") as logs:
+            self.client.get(reverse("list_members"))
+        self.assertIn("in list_members: SELECT", "\n".join(logs.output))
+
+    @override_settings(PV_METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(reverse("list_members"))
+        self.assertEqual(instrumentation.summary(), [])
+
+    def test_dashboard_panel_and_reset(self):
+        self.client.get(reverse("list_members"))
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertContains(response, "Request performance")
+        self.assertIn("list_members", [row["view"] for row in response.context["request_stats"]])
+
+        self.client.post(reverse("admin_dashboard"), {"action": "reset_metrics"})
+        self.assertNotIn("list_members", [row["view"] for row in instrumentation.summary()])
+
+        anonymous = self.client_class()
+        self.assertNotContains(anonymous.get(reverse("admin_dashboard")), "Request performance")
+
+
+@override_settings(ROOT_URLCONF=benchmarks._comparison_urlconf())
+class AsyncViewTests(TransactionTestCase):
+    # TransactionTestCase: the async views query from pool threads, whose
+    # connections cannot see a TestCase's uncommitted rows.
+
+    def setUp(self):
+        cache.clear()
+        synthetic.generate(120, now=timezone.make_aware(datetime(2026, 10, 16, 12, 0)))
+        self.member = Member.objects.filter(total_pv_units__gt=0).order_by("id").first()
+        Dividend.objects.create(member=self.member, amount=Decimal("12.50"), note="Async")
+        session = SessionStore()
+        session["member_id"] = self.member.pk
+        session["admin_user"] = True
+        session.create()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        self.async_client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+    def tearDown(self):
+        # The flush between tests does not reach the FTS table.
+        search.rebuild_index()
+
+    def _html(self, response):
+        self.assertEqual(response.status_code, 200)
+        return re.sub(r'name="csrfmiddlewaretoken" value="[^"]+"', "", response.content.decode())
+
+    async def _both(self, page, query=""):
+        sync = await sync_to_async(self.client.get)(f"/bench/sync/{page}/{query}")
+        cache.clear()
+        asynchronous = await self.async_client.get(f"/bench/async/{page}/{query}")
+        return self._html(sync), self._html(asynchronous)
+
+    async def test_async_pages_match_sync_pages(self):
+        for page, query in [
+            ("member_dashboard", ""),
+            ("member_pv_overview", "?year=2027"),
+            ("member_pv_overview", "?page=2&search=a"),
+            ("member_pv_overview", "?page=99"),
+            ("member_pv_overview", "?page=x"),
+            ("member_pv_overview", "?paging=cursor"),
+        ]:
+            with self.subTest(page=page, query=query):
+                sync, asynchronous = await self._both(page, query)
+                self.assertEqual(asynchronous, sync)
+                if page == "member_dashboard":
+                    self.assertIn("Async", asynchronous)
+
+    async def test_dashboard_access(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get("/bench/async/member_dashboard/")
+        self.assertRedirects(response, reverse("memberlogin"), fetch_redirect_response=False)
+
+        await Member.objects.filter(pk=self.member.pk).adelete()
+        session = SessionStore()
+        session["member_id"] = self.member.pk
+        await sync_to_async(session.create)()
+        self.async_client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        response = await self.async_client.get("/bench/async/member_dashboard/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_requests_are_measured(self):
+        await sync_to_async(instrumentation.registry.reset)()
+        await self.async_client.get("/bench/async/member_dashboard/")
+        rows = {row["view"]: row for row in await sync_to_async(instrumentation.summary)()}
+        row = rows["clubapp.views.member_dashboard_async"]
+        self.assertEqual(row["count"], 1)
+        self.assertGreaterEqual(row["queries"], 4)
+        self.assertGreater(row["template_ms"], 0)
+
+
+class DividendRunTests(TestCase):
+    def setUp(self):
+        self.members = [
+            Member.objects.create(full_name=name, email=f"{name.lower()}@example.com")
+            for name in ("Asha", "Binu", "Chitra", "Dev")
+        ]
+        for member, units, when in [
+            (self.members[0], 10, datetime(2026, 2, 1, 10, 0)),
+            (self.members[1], 20, datetime(2026, 3, 1, 10, 0)),
+            (self.members[2], 30, datetime(2026, 3, 1, 10, 0)),
+            (self.members[2], 5, datetime(2026, 6, 20, 10, 0)),  # after the record date
+            (self.members[3], 7, datetime(2026, 5, 31, 23, 0)),  # late on the record date
+        ]:
+            tx = PVTransaction.objects.create(member=member, pv_units=units)
+            PVTransaction.objects.filter(pk=tx.pk).update(purchase_date=timezone.make_aware(when))
+        member_totals.repair(Member.objects.all())
+
+    def _run(self, pool="1000.00", basis=DividendRun.BASIS_UNITS):
+        return DividendRun.objects.create(pool=Decimal(pool), record_date=date(2026, 5, 31), basis=basis)
+
+    def test_allocate_is_exact_and_deterministic(self):
+        shares = distributions.allocate(Decimal("100.00"), {1: 1, 2: 1, 3: 1})
+        self.assertEqual(shares, {1: Decimal("33.34"), 2: Decimal("33.33"), 3: Decimal("33.33")})
+        weights = {n: n * 7 + 3 for n in range(1, 500)}
+        shares = distributions.allocate(Decimal("12345.67"), weights)
+        self.assertEqual(sum(shares.values()), Decimal("12345.67"))
+        self.assertEqual(shares, distributions.allocate(Decimal("12345.67"), dict(reversed(weights.items()))))
+        self.assertEqual(distributions.allocate(Decimal("0.02"), {1: 1, 2: 1, 3: 1}), {1: Decimal("0.01"), 2: Decimal("0.01")})
+        self.assertEqual(distributions.allocate(Decimal("10"), {}), {})
+
+    def test_holdings_are_end_of_record_date(self):
+        asha, binu, chitra, dev = (m.pk for m in self.members)
+        self.assertEqual(
+            distributions.holdings(date(2026, 5, 31), DividendRun.BASIS_UNITS),
+            {asha: 10, binu: 20, chitra: 30, dev: 7},
+        )
+        values = distributions.holdings(date(2026, 5, 31), DividendRun.BASIS_VALUE)
+        self.assertEqual(set(values), {asha, binu, chitra, dev})
+        self.assertGreater(values[asha] / 10, values[binu] / 20)  # held longer, grew more
+
+    def test_commit_and_rollback(self):
+        Dividend.objects.create(member=self.members[0], amount=Decimal("5.00"), note="Manual")
+        run = self._run()
+        summary = distributions.preview(run)
+        self.assertEqual((summary["member_count"], summary["total"]), (4, Decimal("1000.00")))
+        self.assertEqual(Dividend.objects.filter(run=run).count(), 0)
+
+        with self.assertNumQueries(8):  # incl. savepoint, release and the refresh
+            distributions.commit(run)
+        self.assertEqual((run.status, run.member_count, run.distributed), (DividendRun.COMMITTED, 4, Decimal("1000.00")))
+        self.assertEqual(
+            dict(Dividend.objects.filter(run=run).values_list("member__full_name", "amount")),
+            {"Asha": Decimal("149.25"), "Binu": Decimal("298.51"), "Chitra": Decimal("447.76"), "Dev": Decimal("104.48")},
+        )
+        self.assertEqual(member_totals.repair(Member.objects.all(), fix=False), [])
+        with self.assertRaises(distributions.DistributionError):
+            distributions.commit(run)
+
+        # An edit after the commit is reversed by what is in the row.
+        edited = Dividend.objects.get(run=run, member=self.members[1])
+        edited.amount = Decimal("300.00")
+        edited.save()
+        distributions.rollback(run)
+        self.assertEqual(run.status, DividendRun.ROLLED_BACK)
+        self.assertFalse(Dividend.objects.filter(run=run).exists())
+        self.assertEqual(member_totals.repair(Member.objects.all(), fix=False), [])
+        self.assertEqual(Member.objects.get(pk=self.members[0].pk).total_dividends, Decimal("5.00"))
+        with self.assertRaises(distributions.DistributionError):
+            distributions.rollback(run)
+
+    def test_commit_query_count_does_not_grow_with_members(self):
+        synthetic.generate(200, now=timezone.make_aware(datetime(2026, 5, 1, 12, 0)))
+        run = self._run(basis=DividendRun.BASIS_VALUE)
+        with self.assertNumQueries(8):
+            distributions.commit(run)
+        self.assertGreater(run.member_count, 100)
+
+    def test_views(self):
+        session = self.client.session
+        session["admin_user"] = True
+        session.save()
+
+        response = self.client.post(reverse("dividend_runs"), {"pool": "500", "record_date": "2099-01-01", "basis": "units"})
+        self.assertContains(response, "cannot be in the future")
+        response = self.client.post(reverse("dividend_runs"), {"pool": "500", "record_date": "2026-05-31", "basis": "units"})
+        run = DividendRun.objects.get()
+        self.assertRedirects(response, reverse("dividend_run_detail", args=[run.pk]))
+
+        response = self.client.get(reverse("dividend_run_detail", args=[run.pk]))
+        self.assertEqual(response.context["summary"]["member_count"], 4)
+        self.assertEqual(response.context["top_rows"][0][0], self.members[2])
+
+        self.client.post(reverse("dividend_run_detail", args=[run.pk]), {"action": "commit"})
+        self.assertEqual(Dividend.objects.filter(run=run).count(), 4)
+        response = self.client.get(reverse("dividend_run_detail", args=[run.pk]))
+        self.assertContains(response, "Roll Back Run")
+        self.client.post(reverse("dividend_run_detail", args=[run.pk]), {"action": "rollback"})
+        self.assertEqual(Dividend.objects.count(), 0)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+
+    def _seed(self, members, start=0):
+        for n in range(start, start + members):
+            member = Member.objects.create(full_name=f"Member {n}", email=f"m{n}@example.com")
+            PVTransaction.objects.create(member=member, pv_units=n + 1)
+            Dividend.objects.create(member=member, amount=Decimal(n + 1), note="Admin")
+
+    def _query_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        urls = [reverse("admin:clubapp_pvtransaction_changelist"), reverse("admin:clubapp_dividend_changelist")]
+        self._seed(3)
+        small = [self._query_count(url) for url in urls]
+        self._seed(40, start=3)
+        self.assertEqual([self._query_count(url) for url in urls], small)
+
+    def test_transaction_values_are_annotated_and_sortable(self):
+        self._seed(3)
+        price = get_pv_value_for_year(timezone.now().year)
+        response = self.client.get(reverse("admin:clubapp_pvtransaction_changelist"), {"o": "-5"})
+        rows = list(response.context["cl"].result_list)
+        self.assertEqual([tx.pv_units for tx in rows], [3, 2, 1])
+        self.assertEqual(rows[0].total_value, 3 * price)
+        self.assertEqual(rows[0].value_per_pv, price)
+        self.assertContains(response, f'<td class="field-current_value_per_pv">{price:.2f}</td>', count=3)
+        self.assertContains(response, f'<td class="field-current_total_value">{3 * price:.2f}</td>')
+
+    def test_search_uses_member_index(self):
+        self._seed(3)
+        Member.objects.filter(full_name="Member 2").update(full_name="Zara Fernandes")
+        search.rebuild_index()
+        response = self.client.get(reverse("admin:clubapp_dividend_changelist"), {"q": "zar"})
+        self.assertEqual([d.member.full_name for d in response.context["cl"].result_list], ["Zara Fernandes"])
+
+
+class MemberApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = _make_member(1, _aware(2026, 1, 5), [(10, _aware(2026, 2, 1)), (4, _aware(2026, 6, 9))])
+        Dividend.objects.create(member=self.member, amount=Decimal("12.50"), note="Q1")
+        self.member.refresh_from_db()
+        session = self.client.session
+        session["member_id"] = self.member.pk
+        session.save()
+
+    def test_requires_member_login(self):
+        self.client.session.flush()
+        self.client.cookies.clear()
+        response = self.client.get(reverse("api_member_transactions"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "Not logged in."})
+
+    def test_transactions_match_the_dashboard(self):
+        rows = self.client.get(reverse("member_dashboard")).context["dashboard_data"]
+        payload = self.client.get(reverse("api_member_transactions")).json()
+        self.assertEqual(payload["version"], self.member.data_version)
+        self.assertEqual([r["id"] for r in payload["results"]], [r["id"] for r in rows])
+        self.assertEqual([r["current_value"] for r in payload["results"]], [str(r["current_value"]) for r in rows])
+        self.assertEqual([r["pv_units"] for r in payload["results"]], [4, 10])
+
+    def test_summary_projections_and_dividends(self):
+        summary = self.client.get(reverse("api_member")).json()["result"]
+        self.assertEqual(summary["member_code"], self.member.member_code)
+        self.assertEqual(summary["total_pv_units"], 14)
+        self.assertEqual(summary["total_dividends"], "12.50")
+
+        projections = self.client.get(reverse("api_member_projections")).json()["results"]
+        self.assertEqual(len(projections[0]["values"]), batch_valuation.PROJECTION_YEARS + 1)
+        self.assertEqual(projections[0]["values"][0], "400.00")
+
+        dividends = self.client.get(reverse("api_member_dividends")).json()["results"]
+        self.assertEqual(dividends, [{"id": dividends[0]["id"], "amount": "12.50", "note": "Q1", "run": None}])
+
+    def test_field_selection_and_compact_rows(self):
+        url = reverse("api_member_transactions")
+        payload = self.client.get(url, {"fields": "id,current_value"}).json()
+        self.assertEqual([set(r) for r in payload["results"]], [{"id", "current_value"}] * 2)
+
+        compact = self.client.get(url, {"fields": "pv_units,id", "compact": "1"}).json()
+        self.assertEqual(compact["fields"], ["pv_units", "id"])
+        self.assertEqual([r[0] for r in compact["results"]], [4, 10])
+
+        response = self.client.get(url, {"fields": "id,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.json()["error"])
+
+    def test_unchanged_portfolio_returns_304_without_valuing(self):
+        url = reverse("api_member_transactions")
+        etag = self.client.get(url)["ETag"]
+        cache.clear()
+        with mock.patch("clubapp.api._dashboard_rows") as rows, self.assertNumQueries(2):  # session + data_version
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        rows.assert_not_called()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        # Field selection is part of the tag, and any write to the portfolio
+        # moves data_version on.
+        self.assertEqual(self.client.get(url, {"fields": "id"}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        PVTransaction.objects.create(member=self.member, pv_units=1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["results"]), 3)
+
+
+class ProjectionCalculatorTests(SimpleTestCase):
+    def setUp(self):
+        projections.project.cache_clear()
+        self.schedule = rates.get()
+        self.url = reverse("api_projection")
+
+    def test_rows_follow_the_price_table(self):
+        start = self.schedule.start_year + 2
+        payload = self.client.get(self.url, {"amount": "2,500", "start_year": start, "years": 30}).json()
+        self.assertEqual(len(payload["rows"]), 30)
+        self.assertEqual(payload["invested"], "2500.00")
+        units = money.round_div(money.fixed(2500) * money.SCALE, self.schedule.price_fixed(start))
+        for row in payload["rows"]:
+            self.assertEqual(row["rate"], self.schedule.rate_for_year(row["year"]))
+            self.assertEqual(Decimal(row["end"]), money.to_decimal(money.mul(units, self.schedule.price_fixed(row["year"] + 1))))
+            self.assertEqual(Decimal(row["start"]) + Decimal(row["return"]), Decimal(row["end"]))
+        for previous, row in zip(payload["rows"], payload["rows"][1:]):
+            self.assertEqual(row["start"], previous["end"])
+        self.assertEqual(payload["value"], payload["rows"][-1]["end"])
+        self.assertEqual(Decimal(payload["gain"]), Decimal(payload["value"]) - Decimal(payload["invested"]))
+
+    def test_top_ups_buy_at_their_year_price(self):
+        start = self.schedule.start_year
+        payload = self.client.get(self.url, {
+            "amount": "1000", "start_year": start, "years": 3,
+            "top_up": [f"{start + 1}:500", f"{start + 1}:250.50", f"{start + 2}:100"],
+        }).json()
+        self.assertEqual(payload["top_ups"], [[start + 1, "750.50"], [start + 2, "100.00"]])
+        self.assertEqual([row["added"] for row in payload["rows"]], ["1000.00", "750.50", "100.00"])
+        self.assertEqual(payload["invested"], "1850.50")
+        self.assertEqual(payload["rows"][1]["start"], str(Decimal("1080.00") + Decimal("750.50")))
+
+        # The same as three separate projections added up, to the paisa.
+        parts = [
+            projections.project(100000, start, 3),
+            projections.project(75050, start + 1, 2),
+            projections.project(10000, start + 2, 1),
+        ]
+        total = sum(Decimal(p["value"]) for p in parts)
+        self.assertLessEqual(abs(Decimal(payload["value"]) - total), Decimal("0.02"))
+
+    def test_bad_input_is_a_400(self):
+        start = self.schedule.start_year
+        for params in (
+            {"amount": "ten"},
+            {"amount": "0"},
+            {"amount": "NaN"},
+            {"amount": "1e12"},
+            {"years": "0"},
+            {"years": str(projections.MAX_YEARS + 1)},
+            {"start_year": str(start - 1)},
+            {"top_up": "500"},
+            {"top_up": f"{start + 10}:500", "start_year": start, "years": "10"},
+            {"top_up": [f"{start}:1"] * (projections.MAX_TOP_UPS + 1)},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    @override_settings(PV_PROJECTION_CACHE_SECONDS=120)
+    def test_public_cacheable_and_memoized(self):
+        params = {"amount": "1000", "start_year": self.schedule.start_year, "years": 10}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response["Cache-Control"], "public, max-age=120")
+        self.assertEqual(self.client.post(self.url, params).status_code, 405)
+
+        hits = projections.project.cache_info().hits
+        again = self.client.get(self.url, {**params, "amount": "1,000.00"})
+        self.assertEqual(projections.project.cache_info().hits, hits + 1)  # parse() normalizes
+        self.assertEqual(again.content, response.content)
+
+        with override_settings(PV_RATE_SCHEDULE={"start_year": 2026, "base_price": 100.0, "rates": [10]}):
+            changed = self.client.get(self.url, params).json()
+        self.assertEqual(changed["rows"][0]["end"], "1100.00")
+        self.assertEqual(self.client.get(self.url, params).content, response.content)
+
+    def test_default_projection(self):
+        projection = projections.default(today=date(2030, 3, 1))
+        self.assertEqual(
+            (projection["amount"], projection["start_year"], projection["years"]),
+            ("1000.00", 2030, projections.DEFAULT_YEARS),
+        )
+        self.assertEqual(projections.default(today=date(2020, 1, 1))["start_year"], self.schedule.start_year)
+
+
+class ProjectionCalculatorPageTests(TestCase):
+    def test_landing_page_renders_the_calculator_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("index"))
+        self.assertContains(response, 'id="calculator"')
+        self.assertContains(response, reverse("api_projection"))
+        self.assertEqual(len(response.context["projection"]["rows"]), projections.DEFAULT_YEARS)
+        self.assertNotContains(response, "data-sync-url")
+
+    def test_query_string_prefills_the_table(self):
+        start = rates.get().start_year
+        response = self.client.get(reverse("project_value"), {"amount": "5000", "start_year": start, "years": 3})
+        self.assertEqual(response.context["projection"]["years"], 3)
+        self.assertContains(response, "5,400.00")
+        self.assertContains(response, "data-sync-url")
+
+        response = self.client.get(reverse("index"), {"years": "500"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "years must be between")
+        self.assertEqual(len(response.context["projection"]["rows"]), projections.DEFAULT_YEARS)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Routing against a real second SQLite file, refreshed from the test
+    database (which needs committed data, hence TransactionTestCase).
+    """
+
+    ALIAS = "reporting"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        configured = connections.configure_settings({
+            "default": dict(connections["default"].settings_dict),
+            cls.ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": os.path.join(cls.tmp.name, "replica.sqlite3")},
+        })
+        connections.settings[cls.ALIAS] = configured[cls.ALIAS]
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[cls.ALIAS].close()
+        del connections[cls.ALIAS]
+        del connections.settings[cls.ALIAS]
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        # The alias is added after the runner has checked the databases
+        # tests use, so it is allowed here rather than in ``databases``.
+        self.enterContext(mock.patch.object(type(self), "databases", {"default", self.ALIAS}))
+        self.enterContext(override_settings(PV_REPLICA_ALIAS=self.ALIAS))
+        self.first = _make_member(1, _aware(2026, 1, 5), [(10, _aware(2026, 2, 1))])
+        db_routing.refresh_replica()
+        self.second = _make_member(2, _aware(2026, 1, 6), [(5, _aware(2026, 2, 1))])  # primary only
+
+    def tearDown(self):
+        search.rebuild_index()  # the flush empties members but not the FTS table
+
+    def _overview_codes(self):
+        response = self.client.get(reverse("member_pv_overview"), {"year": 2026})
+        return [m.member_code for m in response.context["page_obj"].object_list]
+
+    def test_reporting_views_read_the_replica(self):
+        with CaptureQueriesContext(connections[self.ALIAS]) as replica:
+            self.assertEqual(self._overview_codes(), [self.first.member_code])
+        self.assertTrue(replica.captured_queries)
+
+        # The CSV export streams its rows after the view returns; they are
+        # read from the replica too.
+        with CaptureQueriesContext(connections[self.ALIAS]) as replica:
+            response = self.client.get(reverse("member_pv_overview"), {"year": 2026, "format": "csv"})
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([line.split(",")[0] for line in lines[1:]], [self.first.member_code])
+        self.assertTrue(any("clubapp_pvtransaction" in q["sql"] for q in replica.captured_queries))
+
+        # Views not listed in PV_REPLICA_VIEWS, and code outside a request,
+        # read the primary.
+        session = self.client.session
+        session["member_id"] = self.second.pk
+        session.save()
+        self.assertEqual(self.client.get(reverse("api_member")).json()["result"]["member_code"], self.second.member_code)
+        self.assertEqual(router.db_for_read(Member), "default")
+        self.assertEqual(router.db_for_write(Member), "default")
+        self.assertFalse(router.allow_migrate(self.ALIAS, "clubapp"))
+
+        db_routing.refresh_replica()
+        self.assertEqual(self._overview_codes(), [self.first.member_code, self.second.member_code])
+
+    def test_a_post_pins_the_browser_to_the_primary(self):
+        response = self.client.post(reverse("memberlogin"), {"code": "nobody", "password": "x"})
+        self.assertIn(db_routing.PIN_COOKIE, response.cookies)
+        self.assertEqual(self._overview_codes(), [self.first.member_code, self.second.member_code])
+
+    def test_sqlite_connections_get_the_pragmas(self):
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -32000)
+            # Opening a database does not change its file, and a rollback
+            # journal keeps synchronous=FULL.
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "delete")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 2)  # FULL
+
+        out = StringIO()
+        call_command("enable_wal", "--database", self.ALIAS, stdout=out)
+        self.assertIn("journal_mode=wal", out.getvalue())
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        connections[self.ALIAS].close()
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+class StatementTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.asha = _make_member(1, _aware(2026, 1, 1), [(10, _aware(2026, 2, 1)), (4, _aware(2027, 9, 30))])
+        self.binu = _make_member(2, _aware(2026, 5, 1), [(3, _aware(2026, 5, 1))])
+        self.chitra = _make_member(3, _aware(2027, 6, 1), [])
+        self.members = Member.objects.all()
+
+    def _year_files(self, year=2027):
+        out = statements.year_directory(self.dir, year)
+        return {name: open(os.path.join(out, name), "rb").read() for name in os.listdir(out) if name != statements.MANIFEST}
+
+    def test_figures_match_calculate_pv_value_at_date(self):
+        run = DividendRun.objects.create(pool=Decimal("100.00"), record_date=date(2027, 3, 31))
+        distributions.commit(run)
+        Dividend.objects.create(member=self.asha, amount=Decimal("5.00"), note="Manual")
+        self.asha.refresh_from_db()
+
+        data = statements.statement_inputs([self.asha], 2027)[0]
+        s = statements.build_statement(data, 2027)
+        for month, cell in zip(range(1, 13), s["months"]):
+            expected = sum(
+                calculate_pv_value_at_date(units, when, 2027, month) or 0
+                for units, when in ((10, date(2026, 2, 1)), (4, date(2027, 9, 30)))
+            )
+            self.assertEqual(cell["value"] * 100, _paise(expected))
+            self.assertEqual(cell["pv"], 14 if month >= 9 else 10)
+        self.assertEqual(s["opening_value"] * 100, _paise(calculate_pv_value_at_date(10, date(2026, 2, 1), 2026, 12)))
+        self.assertEqual((s["opening_pv"], s["closing_pv"]), (10, 14))
+        self.assertEqual(s["closing_value"], s["months"][-1]["value"])
+        self.assertEqual([(p["pv_units"], p["price"]) for p in s["purchases"]], [(4, 108.0)])
+        self.assertEqual(s["year_dividends"], Dividend.objects.get(member=self.asha, run=run).amount)
+        self.assertEqual(s["total_dividends"], s["year_dividends"] + Decimal("5.00"))
+
+        empty = statements.build_statement(statements.statement_inputs([self.chitra], 2027)[0], 2027)
+        self.assertEqual((empty["closing_pv"], empty["closing_value"], empty["purchases"]), (0, Decimal("0.00"), []))
+
+    def test_resumes_from_manifest(self):
+        self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1, chunk_size=2), (3, 0))
+        files = self._year_files()
+        self.assertEqual(sorted(files), ["M0001.html", "M0002.html", "M0003.html"])
+        self.assertIn(b"Annual Statement 2027", files["M0001.html"])
+        manifest = statements.read_manifest(self.dir, 2027)
+        self.assertEqual(manifest[self.asha.pk]["data_version"], self.asha.data_version)
+
+        # A torn last line (killed mid-write) and a missing file are redone.
+        with open(os.path.join(self.dir, "2027", statements.MANIFEST), "a") as f:
+            f.write('{"member_id": ')
+        os.unlink(os.path.join(self.dir, "2027", "M0002.html"))
+        PVTransaction.objects.create(member=self.chitra, pv_units=1)
+        render = mock.Mock(wraps=statements.render_html)
+        with mock.patch.dict(statements.RENDERERS, {"html": render}):
+            self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1), (2, 1))
+        self.assertEqual(sorted(call.args[0]["member_code"] for call in render.call_args_list), ["M0002", "M0003"])
+
+        self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1), (0, 3))
+        self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1, restart=True), (3, 0))
+
+    def test_schedule_or_format_change_redoes_statements(self):
+        self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1), (3, 0))
+        entry = statements.read_manifest(self.dir, 2027)[self.asha.pk]
+        self.assertEqual((entry["schedule"], entry["format"]), (rates.get().fingerprint, "html"))
+
+        before = self._year_files()["M0001.html"]
+        schedule = {"start_year": 2026, "base_price": 100.0, "rates": [20]}
+        with override_settings(PV_RATE_SCHEDULE=schedule):
+            self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1), (3, 0))
+            self.assertNotEqual(self._year_files()["M0001.html"], before)
+            self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1), (0, 3))
+        self.assertEqual(statements.generate(self.members, 2027, "html", self.dir, workers=1), (3, 0))
+        self.assertEqual(self._year_files()["M0001.html"], before)
+
+        self.assertEqual(statements.generate(self.members, 2027, "pdf", self.dir, workers=1), (3, 0))
+        self.assertEqual(statements.generate(self.members, 2027, "pdf", self.dir, workers=1), (0, 3))
+
+    def test_non_latin_name_gets_an_html_statement(self):
+        self.binu.full_name = "बीनू"
+        self.binu.save()
+        self.assertEqual(statements.generate(self.members, 2027, "pdf", self.dir, workers=1), (3, 0))
+        files = self._year_files()
+        self.assertEqual(sorted(files), ["M0001.pdf", "M0002.html", "M0003.pdf"])
+        self.assertIn("बीनू", files["M0002.html"].decode())
+        self.assertEqual(statements.generate(self.members, 2027, "pdf", self.dir, workers=1), (0, 3))
+
+    def test_pdf_in_a_pool_matches_in_process(self):
+        out = StringIO()
+        call_command("generate_statements", "--year", "2027", "--format", "pdf", "--output", self.dir,
+                     "--workers", "2", "--chunk-size", "1", stdout=out)
+        self.assertIn("Wrote 3 2027 statements (0 already done)", out.getvalue())
+        pooled = self._year_files()
+        for body in pooled.values():
+            self.assertTrue(body.startswith(b"%PDF-1.4"))
+            self.assertTrue(body.rstrip().endswith(b"%%EOF"))
+        content = zlib.decompress(pooled["M0001.pdf"].split(b"stream\n", 1)[1].split(b"\nendstream")[0])
+        self.assertIn(b"(Annual Statement 2027)", content)
+        self.assertIn(b"(Member 1 \\(M0001\\))", content)
+
+        statements.generate(self.members, 2027, "pdf", self.dir, workers=1, restart=True)
+        self.assertEqual(self._year_files(), pooled)
+        entries = statements.read_manifest(self.dir, 2027)
+        self.assertEqual(
+            {e["file"]: e["sha256"] for e in entries.values()},
+            {name: hashlib.sha256(body).hexdigest() for name, body in pooled.items()},
+        )
 
-# Create your tests here.
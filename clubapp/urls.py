@@ -1,5 +1,12 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, views
+
+# Under an ASGI server (PV_ASYNC_VIEWS) the busiest pages run as async views.
+if settings.PV_ASYNC_VIEWS:
+    member_dashboard, member_pv_overview = views.member_dashboard_async, views.member_pv_overview_async
+else:
+    member_dashboard, member_pv_overview = views.member_dashboard, views.member_pv_overview
 
 urlpatterns = [
     # ... (Keep your admin paths the same) ...
@@ -15,22 +22,34 @@ urlpatterns = [
     path("buy-pv/add/", views.buy_pv_add, name="buy_pv_add"),
     path("buy-pv/<int:pk>/edit/", views.buy_pv_edit, name="buy_pv_edit"),
     path("buy-pv/<int:pk>/delete/", views.buy_pv_delete, name="buy_pv_delete"),
-    path("members-pv-overview/", views.member_pv_overview, name="member_pv_overview"),
+    path("members-pv-overview/", member_pv_overview, name="member_pv_overview"),
+    path("import/", views.import_csv_upload, name="import_csv"),
     
     # --- Public / Member Paths ---
     path('', views.index, name='index'),
     path('memberlogin/', views.memberlogin, name='memberlogin'),
-    path("member/dashboard/", views.member_dashboard, name="member_dashboard"),
+    path("member/dashboard/", member_dashboard, name="member_dashboard"),
     path("member/logout/", views.member_logout, name="member_logout"),
+    path("member/growth-curves/", views.member_growth_curves, name="member_growth_curves"),
     
     # UPDATED: Now accepts an integer ID for specific certificates
     path("member/certificate/<int:pk>/", views.member_certificate, name="member_certificate"),
+    path("member/certificate/<int:pk>/pdf/", views.member_certificate_pdf, name="member_certificate_pdf"),
 
 
     path("dividend/",views.dividend_list, name="dividend_list"),
     path("dividend/add/",views.dividend_add, name="dividend_add"),
     path("dividend/edit/<int:pk>/",views.dividend_edit, name="dividend_edit"),
     path("dividend/delete/<int:pk>/",views.dividend_delete, name="dividend_delete"),
+    path("dividend/runs/", views.dividend_runs, name="dividend_runs"),
+    path("dividend/runs/<int:pk>/", views.dividend_run_detail, name="dividend_run_detail"),
+
+    # --- Member JSON API ---
+    path("api/v1/member/", api.member_summary, name="api_member"),
+    path("api/v1/member/transactions/", api.member_transactions, name="api_member_transactions"),
+    path("api/v1/member/projections/", api.member_projections, name="api_member_projections"),
+    path("api/v1/member/dividends/", api.member_dividends, name="api_member_dividends"),
+    path("api/v1/projection/", api.projection, name="api_projection"),
 
 
 
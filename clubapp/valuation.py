@@ -0,0 +1,239 @@
+import threading
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+
+from django.utils import timezone
+
+from . import money, rates
+
+
+# ---------------------------------------------------------
+#   VALUATION ENGINE: PRECOMPUTED GROWTH TABLES
+# ---------------------------------------------------------
+#
+# A purchase grows by a rate that only depends on how many months it
+# has been held (the rate schedule in rates.py, by membership year). The
+# cumulative factor for every month offset is therefore the same for every
+# transaction, so it is built once and each valuation becomes one lookup
+# and one multiply instead of a month-by-month loop. The tables are
+# dropped and rebuilt when the schedule changes.
+#
+# Factors, prices and the values returned here are fixed-point integers
+# (money.py); callers round them to paise once, where they are shown or
+# stored. Each table entry is computed in Decimal at _PRECISION digits
+# from the exact growth of the whole years before it, so a whole number of
+# years held is exact (12 months at 8% is exactly 1.08).
+
+# Initial table size (100 years). Tables grow on demand past this.
+TABLE_MONTHS = 12 * 100
+
+_PRECISION = 40
+_SCALE = Decimal(money.SCALE)
+
+_geometric_factors = [money.SCALE]
+_nominal_factors = [money.SCALE]
+_tables_lock = threading.Lock()
+
+
+@rates.on_change
+def _reset_tables():
+    # Rebinds rather than clears, so a lookup already holding the old
+    # table finishes on it. No lock: the first schedule load can happen
+    # inside _extend(), which holds it.
+    global _geometric_factors, _nominal_factors
+    _geometric_factors = [money.SCALE]
+    _nominal_factors = [money.SCALE]
+
+
+def get_effective_date(date_obj):
+    """
+    Forces any date before the start of the rate schedule (Jan 1, 2026)
+    to be that date.
+    """
+    if isinstance(date_obj, datetime):
+        d = date_obj.date()
+    else:
+        d = date_obj
+
+    start = rates.get().start
+    if d < start:
+        return start
+    return d
+
+
+def get_base_price_for_purchase_year(year):
+    """
+    Entry Price (Base Value) for a specific year, from the rate schedule.
+    2026: 100.00
+    2027: 108.00  (100 + 8%)
+    ...
+    """
+    return rates.get().price(year)
+
+
+def base_price_fixed(year):
+    """``get_base_price_for_purchase_year`` as an exact fixed-point price."""
+    return rates.get().price_fixed(year)
+
+
+def membership_rate(month_offset):
+    """
+    Yearly growth rate (in %) applied to the given month of membership
+    (1-based): months 1-12 earn the schedule's first rate (8%), months
+    13-24 the second (9%), ...
+    """
+    return rates.get().rate((month_offset - 1) // 12 + 1)
+
+
+def _extend(table, months, monthly_step):
+    with _tables_lock, localcontext() as ctx:
+        ctx.prec = _PRECISION
+        year_start = Decimal(1)
+        for year in range(months // 12 + 1):
+            step = monthly_step(membership_rate(year * 12 + 1))
+            first = year * 12
+            if first + 12 > len(table):
+                value = year_start
+                for m in range(first, min(first + 12, months + 1)):
+                    if m == len(table):
+                        table.append(int((value * _SCALE).to_integral_value(ROUND_HALF_UP)))
+                    value *= step
+            year_start *= step ** 12
+
+
+def _geometric_step(rate):
+    # Monthly compounding that reproduces the yearly rate exactly.
+    return (1 + Decimal(rate) / 100) ** (Decimal(1) / 12)
+
+
+def _nominal_step(rate):
+    # Simple monthly split of the yearly rate (rate / 12).
+    return 1 + Decimal(rate) / 1200
+
+
+def geometric_factor(months):
+    """
+    Fixed-point cumulative growth of 1 PV after ``months`` months held,
+    compounding the yearly rate monthly (``calculate_pv_value_at_date``
+    logic).
+    """
+    table = _geometric_factors
+    if months >= len(table):
+        _extend(table, max(months, TABLE_MONTHS), _geometric_step)
+    return table[months]
+
+
+def nominal_factor(months):
+    """
+    Fixed-point cumulative growth of 1 PV after ``months`` months held,
+    applying rate / 12 per month (``calculate_current_value`` logic).
+    """
+    table = _nominal_factors
+    if months >= len(table):
+        _extend(table, max(months, TABLE_MONTHS), _nominal_step)
+    return table[months]
+
+
+def month_index(year, month):
+    return (year * 12) + month
+
+
+def value_at_date(pv_units, purchase_date, target_year, target_month):
+    """
+    Table-backed, fixed-point equivalent of
+    ``views.calculate_pv_value_at_date``. Returns None when the target
+    month is before the (effective) purchase.
+    """
+    p_date = get_effective_date(purchase_date)
+    months_diff = month_index(target_year, target_month) - month_index(p_date.year, p_date.month)
+
+    if months_diff < 0:
+        return None
+
+    start_value = pv_units * base_price_fixed(p_date.year)
+    if months_diff == 0:
+        return start_value
+    return money.mul(start_value, geometric_factor(months_diff))
+
+
+def current_value(pv_units, purchase_date, today=None):
+    """
+    Table-backed, fixed-point equivalent of ``views.calculate_current_value``.
+    """
+    if today is None:
+        today = timezone.now().date()
+    p_date = purchase_date.date() if isinstance(purchase_date, datetime) else purchase_date
+
+    start_value = pv_units * base_price_fixed(p_date.year)
+    if p_date > today:
+        return start_value
+
+    total_months_diff = (today.year - p_date.year) * 12 + (today.month - p_date.month)
+    if total_months_diff <= 0:
+        return start_value
+    return money.mul(start_value, nominal_factor(total_months_diff))
+
+
+def warm_tables(months=TABLE_MONTHS):
+    """Builds both factor tables up front (called from AppConfig.ready)."""
+    rates.get()  # loading the schedule resets the tables, so load it first
+    geometric_factor(months)
+    nominal_factor(months)
+
+
+def effective_purchases(join_date, transactions):
+    """
+    ``(pv_units, effective_date)`` pairs for a member's transactions, as
+    member_pv_overview values them: dates are clamped to the project start
+    and never earlier than the member's (effective) join date.
+    """
+    effective_join = get_effective_date(join_date)
+    purchases = []
+    for pv_units, purchase_date in transactions:
+        tx_date = get_effective_date(purchase_date)
+        if tx_date < effective_join:
+            tx_date = effective_join
+        purchases.append((pv_units, tx_date))
+    return purchases
+
+
+def monthly_holdings(purchases, first_month, last_month):
+    """
+    Month-by-month holdings for one member between two month indexes
+    (inclusive, see ``month_index``).
+
+    ``purchases`` is an iterable of ``(pv_units, effective_date)`` pairs.
+    Returns one entry per month, each ``(pv, value)`` (value fixed-point)
+    or None for months before the first purchase. Purchases are bucketed by start month and
+    swept in order, so the cost is one multiply per bucket per month
+    regardless of how many transactions fall in the same month.
+    """
+    buckets = {}
+    for pv_units, p_date in purchases:
+        start = month_index(p_date.year, p_date.month)
+        units, start_value = buckets.get(start, (0, 0))
+        buckets[start] = (units + pv_units, start_value + pv_units * base_price_fixed(p_date.year))
+
+    ordered = sorted(buckets.items())
+    holdings = []
+    active = 0
+    running_pv = 0
+    for target in range(first_month, last_month + 1):
+        while active < len(ordered) and ordered[active][0] <= target:
+            running_pv += ordered[active][1][0]
+            active += 1
+
+        if active == 0:
+            holdings.append(None)
+            continue
+
+        value = 0
+        for start, (_, start_value) in ordered[:active]:
+            value += start_value * geometric_factor(target - start)
+        holdings.append((running_pv, money.unscale(value)))
+    return holdings
+
+
+def year_grid(purchases, year):
+    """The 12 ``monthly_holdings`` entries for one calendar year."""
+    return monthly_holdings(purchases, month_index(year, 1), month_index(year, 12))
@@ -1,54 +1,37 @@
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
+import asyncio
+import csv
+import hashlib
+import io
 import math
-import json
 from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db import IntegrityError
-from django.db.models import Q, Sum  # Ensure Sum is imported here
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 
 # Assuming your models are named Member, PVTransaction, and Dividend
-from .models import Member, PVTransaction, Dividend
+from .models import Member, PVTransaction, Dividend, DividendRun
+from . import bulk_import, caching, certificates, distributions, exports, instrumentation, money, pagination, pdf, projections, rates, search, snapshots, valuation
+from .batch_valuation import TransactionColumns, get_engine, growth_curve
+from .concurrent_db import in_thread
+from .valuation import get_effective_date, get_base_price_for_purchase_year
 
 
 # ---------------------------------------------------------
 #   LOGIC ENGINE: PV CALCULATION
 # ---------------------------------------------------------
-
-def get_effective_date(date_obj):
-    """
-    Forces any date before Jan 1, 2026 to be Jan 1, 2026.
-    """
-    project_start = date(2026, 1, 1)
-    if isinstance(date_obj, datetime):
-        d = date_obj.date()
-    else:
-        d = date_obj
-        
-    if d < project_start:
-        return project_start
-    return d
-
-def get_base_price_for_purchase_year(year):
-    """
-    Calculates the Entry Price (Base Value) for a specific year.
-    2026: 100.00
-    2027: 108.00  (100 + 8%)
-    ...
-    """
-    if year < 2026: return 100.00
-    if year == 2026: return 100.00
-    
-    price = 100.00
-    for y in range(2026, year):
-        rate = 8 + (y - 2026)
-        if rate > 14: rate = 14
-        price *= (1 + rate / 100.0)
-        
-    return price
+# The month-by-month loops below are the reference definitions of the
+# growth rules, taking each year's rate from the schedule in rates.py.
+# Views value through the precomputed fixed-point tables in valuation.py,
+# which are checked against these in tests.py to the paisa.
 
 def calculate_pv_value_at_date(pv_units, purchase_date, target_year, target_month):
     p_date = get_effective_date(purchase_date)
@@ -67,10 +50,10 @@ def calculate_pv_value_at_date(pv_units, purchase_date, target_year, target_mont
     if months_diff == 0:
         return current_value
 
+    schedule = rates.get()
     for m in range(1, months_diff + 1):
         membership_year = ((m - 1) // 12) + 1
-        rate = 8 + (membership_year - 1)
-        if rate > 14: rate = 14
+        rate = schedule.rate(membership_year)
         
         monthly_rate = math.pow(1 + (rate / 100.0), 1/12.0) - 1
         current_value *= (1 + monthly_rate)
@@ -97,10 +80,10 @@ def calculate_current_value(pv_units, purchase_date):
     if total_months_diff <= 0:
         return current_val
 
+    schedule = rates.get()
     for m in range(1, total_months_diff + 1):
         year_of_membership = (m - 1) // 12 
-        rate = 8 + year_of_membership
-        if rate > 14: rate = 14
+        rate = schedule.rate(year_of_membership + 1)
         
         monthly_rate = (rate / 100.0) / 12
         current_val = current_val * (1 + monthly_rate)
@@ -108,31 +91,18 @@ def calculate_current_value(pv_units, purchase_date):
     return current_val
 
 def calculate_pv_rate(target_year):
-    base_year = 2026
-    current_value = 100.00 
-
-    if target_year <= base_year:
-        return current_value
-
-    for year in range(base_year + 1, target_year + 1):
-        if year == 2027: percent = 0.08
-        elif year == 2028: percent = 0.09
-        elif year == 2029: percent = 0.10
-        elif year == 2030: percent = 0.11
-        elif year == 2031: percent = 0.12
-        elif year == 2032: percent = 0.13
-        else: percent = 0.14
-        
-        current_value = current_value + (current_value * percent)
-
-    return round(current_value, 2)
+    """Price of 1 PV in ``target_year``, to the paisa (what Buy PV charges)."""
+    return rates.get().price_decimal(target_year)
 
 
 # ---------------------------------------------------------
 #   VIEWS
 # ---------------------------------------------------------
 
-def member_pv_overview(request):
+OVERVIEW_PAGE_SIZE = 50
+OVERVIEW_ORDERING = ("join_date", "id")
+
+def _overview_params(request):
     today = timezone.now().date()
     current_real_year = today.year
     start_year = 2026
@@ -144,64 +114,45 @@ def member_pv_overview(request):
     available_years = list(range(start_year, selected_year + 5))
 
     search_query = request.GET.get("search", "").strip()
-    members_qs = Member.objects.all().order_by("join_date")
-    if search_query:
-        members_qs = members_qs.filter(Q(member_code__icontains=search_query) | Q(full_name__icontains=search_query))
+    members_qs = search.filter_members(Member.objects.all(), search_query).order_by(*OVERVIEW_ORDERING)
+    return selected_year, available_years, search_query, members_qs
 
-    paginator = Paginator(members_qs, 5)
-    page_obj = paginator.get_page(request.GET.get("page", 1))
+
+def _overview_rows(page_members, selected_year):
+    # Grids are cached per member version; only misses are valued.
+    by_id = {m.id: m for m in page_members}
+    grids = caching.get_many_or_set(
+        {m.id: caching.member_key("pv-grid", m.id, m.data_version, selected_year) for m in page_members},
+        lambda ids: snapshots.grids_for([by_id[pk] for pk in ids], selected_year),
+    )
 
     member_rows = []
 
-    for member in page_obj:
+    for member in page_members:
         raw_date = member.join_date.date() if hasattr(member.join_date, "date") else member.join_date
         effective_join = get_effective_date(raw_date)
         join_month_score = (effective_join.year * 12) + effective_join.month
-        
-        tx_qs = PVTransaction.objects.filter(member=member)
-        total_pv = tx_qs.aggregate(Sum("pv_units"))["pv_units__sum"] or 0
+
+        grid = grids[member.id]
 
         months_data = []
         year_end_pv = 0
-        year_end_val = 0.0
+        year_end_val = 0
 
-        for m_idx in range(1, 13):
+        for m_idx, cell in enumerate(grid, start=1):
             current_month_score = (selected_year * 12) + m_idx
-            
-            if current_month_score < join_month_score:
+
+            if current_month_score < join_month_score or cell is None:
                 months_data.append({"pv": "-", "value": "-", "is_join": False, "is_anniversary": False})
                 continue
 
-            is_join_month = (current_month_score == join_month_score)
-            is_anniversary = (selected_year > effective_join.year and m_idx == effective_join.month)
-
-            m_pv = 0
-            m_val = 0.0
-            has_valid_data = False
-
-            for tx in tx_qs:
-                tx_date = get_effective_date(tx.purchase_date)
-                if tx_date < effective_join:
-                    tx_date = effective_join
-                
-                tx_month_score = (tx_date.year * 12) + tx_date.month
-                
-                if current_month_score >= tx_month_score:
-                    val = calculate_pv_value_at_date(tx.pv_units, tx_date, selected_year, m_idx)
-                    if val is not None:
-                        m_pv += tx.pv_units
-                        m_val += val
-                        has_valid_data = True
-
-            if not has_valid_data:
-                months_data.append({"pv": "-", "value": "-", "is_join": False, "is_anniversary": False})
-            else:
-                months_data.append({
-                    "pv": m_pv,
-                    "value": f"{m_val:,.2f}",
-                    "is_join": is_join_month,
-                    "is_anniversary": is_anniversary
-                })
+            m_pv, m_val = cell
+            months_data.append({
+                "pv": m_pv,
+                "value": money.to_text(m_val),
+                "is_join": current_month_score == join_month_score,
+                "is_anniversary": selected_year > effective_join.year and m_idx == effective_join.month
+            })
 
             if m_idx == 12:
                 year_end_pv = m_pv
@@ -210,16 +161,19 @@ def member_pv_overview(request):
         member_rows.append({
             "member": member,
             "join_date": effective_join,
-            "total_pv": total_pv,
+            "total_pv": member.total_pv_units,
             "months": months_data,
             "year_end_pv": year_end_pv,
-            "year_end_val": f"{year_end_val:,.2f}" if year_end_pv != 0 else "-"
+            "year_end_val": money.to_text(year_end_val) if year_end_pv != 0 else "-"
         })
+    return member_rows
 
-    try: base_display = f"{get_base_price_for_purchase_year(selected_year):.2f}"
+
+def _overview_context(page_obj, member_rows, selected_year, available_years, search_query):
+    try: base_display = str(rates.get().price_decimal(selected_year))
     except: base_display = "100.00"
 
-    context = {
+    return {
         "page_obj": page_obj,
         "member_rows": member_rows,
         "selected_year": selected_year,
@@ -228,11 +182,46 @@ def member_pv_overview(request):
         "search_query": search_query,
         "base_price_this_year": base_display
     }
+
+
+def member_pv_overview(request):
+    selected_year, available_years, search_query, members_qs = _overview_params(request)
+
+    # ?format=csv|xlsx exports the grid for every matching member.
+    export_format = request.GET.get("format", "")
+    if export_format == "csv":
+        return exports.csv_response(members_qs, selected_year)
+    if export_format == "xlsx":
+        if exports.Workbook is None:
+            messages.error(request, "XLSX export needs openpyxl installed; use CSV instead.")
+            return redirect(f"{request.path}?{urlencode({'year': selected_year, 'search': search_query})}")
+        return exports.xlsx_response(members_qs, selected_year)
+
+    page_obj = pagination.paginate(request, members_qs, OVERVIEW_ORDERING, OVERVIEW_PAGE_SIZE)
+    member_rows = _overview_rows(list(page_obj.object_list), selected_year)
+    context = _overview_context(page_obj, member_rows, selected_year, available_years, search_query)
     return render(request, "member_pv_overview.html", context)
 
 
+def _projection_context(request, sync_url=False):
+    # The what-if calculator (_projection_calculator.html) starts from the
+    # query string; a bad one shows the default with the error.
+    try:
+        args, error = projections.parse(request.GET), None
+    except ValueError as e:
+        args, error = projections.parse({}), str(e)
+    first_year, last_year = projections.year_range()
+    return {
+        "projection": projections.project(*args),
+        "projection_error": error,
+        "projection_first_year": first_year,
+        "projection_last_year": last_year,
+        "projection_max_years": projections.MAX_YEARS,
+        "calculator_sync_url": sync_url,
+    }
+
 def index(request):
-    return render(request, "index.html")
+    return render(request, "index.html", _projection_context(request))
 
 def adminlogin(request):
     if request.method == "POST":
@@ -250,30 +239,24 @@ def logout_admin(request):
     return redirect("adminlogin")
 
 def admin_dashboard(request):
-    return render(request, "admin_dashboard.html")
+    # Request metrics are only for a logged-in admin.
+    if not request.session.get("admin_user"):
+        return render(request, "admin_dashboard.html")
+    if request.method == "POST" and request.POST.get("action") == "reset_metrics":
+        instrumentation.registry.reset()
+        messages.success(request, "Request metrics reset.")
+        return redirect("admin_dashboard")
+    return render(request, "admin_dashboard.html", {"request_stats": instrumentation.summary()})
+
+PROJECT_VALUE_YEARS = 15
 
 def project_value_view(request):
-    base_amt = 1000
-    rows = []
-    curr = base_amt
-    for i in range(1, 11):
-        real_year = 2026 + i - 1
-        if real_year <= 2027: rate = 8
-        else: rate = 9 + (real_year - 2028)
-        if rate > 14: rate = 14
-        
-        interest = curr * (rate / 100.0)
-        end_val = curr + interest
-        
-        rows.append({
-            "year": f"Year {i} ({real_year})", 
-            "rate": f"{rate}%",
-            "start_amt": round(curr),
-            "return": round(interest),
-            "end_amt": round(end_val)
-        })
-        curr = end_val
-    return render(request, "project_value.html", {"logic_rows": rows, "base_example": base_amt})
+    schedule = rates.get()
+    return render(request, "project_value.html", {
+        "schedule": schedule,
+        "price_rows": schedule.price_rows(PROJECT_VALUE_YEARS),
+        **_projection_context(request, sync_url=True),
+    })
 
 # --- MEMBER CRUD ---
 def add_member(request):
@@ -296,10 +279,8 @@ def add_member(request):
 
 def list_members(request):
     q = request.GET.get("search", "")
-    qs = Member.objects.all().order_by("-join_date")
-    if q: qs = qs.filter(Q(full_name__icontains=q) | Q(member_code__icontains=q))
-    paginator = Paginator(qs, 10)
-    page_obj = paginator.get_page(request.GET.get("page", 1))
+    qs = search.filter_members(Member.objects.all(), q)
+    page_obj = pagination.paginate(request, qs, ("-join_date", "-id"), 10)
     return render(request, "list_members.html", {"page_obj": page_obj, "search": q})
 
 def edit_member(request, pk):
@@ -309,12 +290,13 @@ def edit_member(request, pk):
         m.email = request.POST.get("email")
         m.phone_number = request.POST.get("phone_number")
         m.address = request.POST.get("address")
-        m.save()
+        m.save(update_fields=["full_name", "email", "phone_number", "address"])
         messages.success(request, "Member updated.")
         return redirect("list_members")
     return render(request, "add_member.html", {"mode": "edit", "member": m, 
                   "full_name": m.full_name, "email": m.email, "phone_number": m.phone_number, "address": m.address})
 
+@transaction.atomic
 def delete_member(request, pk):
     m = get_object_or_404(Member, pk=pk)
     if request.method == "POST": m.delete()
@@ -324,13 +306,9 @@ def delete_member(request, pk):
 
 def buy_pv_list(request):
     q = request.GET.get("q", "")
-    qs = PVTransaction.objects.select_related("member").order_by("-purchase_date")
-    
-    if q: 
-        qs = qs.filter(Q(member__full_name__icontains=q) | Q(member__member_code__icontains=q))
+    qs = search.filter_members(PVTransaction.objects.select_related("member"), q, member_field="member")
     
-    paginator = Paginator(qs, 10)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj = pagination.paginate(request, qs, ("-purchase_date", "-id"), 10)
     
     return render(request, "buy_pv_list.html", {"page_obj": page_obj, "query": q})
 
@@ -343,7 +321,8 @@ def buy_pv_add(request):
         try:
             m = Member.objects.get(pk=request.POST.get("member_id"))
             units = int(request.POST.get("pv_units"))
-            PVTransaction.objects.create(member=m, pv_units=units)
+            with transaction.atomic():
+                PVTransaction.objects.create(member=m, pv_units=units)
             messages.success(request, f"Transaction added at rate {current_rate}.")
             return redirect("buy_pv_list")
         except Exception as e:
@@ -356,6 +335,7 @@ def buy_pv_add(request):
         "current_year": current_year
     })
 
+@transaction.atomic
 def buy_pv_edit(request, pk):
     tx = get_object_or_404(PVTransaction, pk=pk)
     members = Member.objects.all()
@@ -376,6 +356,7 @@ def buy_pv_edit(request, pk):
         "pv_rate": historical_rate 
     })
 
+@transaction.atomic
 def buy_pv_delete(request, pk):
     tx = get_object_or_404(PVTransaction, pk=pk)
     if request.method == "POST": 
@@ -383,6 +364,30 @@ def buy_pv_delete(request, pk):
     return redirect("buy_pv_list")
 
 
+# --- BULK IMPORT ---
+
+def import_csv_upload(request):
+    if not request.session.get("admin_user"):
+        return redirect("adminlogin")
+
+    kind = request.POST.get("kind", "members")
+    result = None
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if kind not in bulk_import.IMPORTERS or upload is None:
+            messages.error(request, "Choose what to import and a CSV file.")
+        else:
+            lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            try:
+                result = bulk_import.import_csv(kind, lines)
+            except (UnicodeDecodeError, csv.Error) as e:
+                messages.error(request, f"Could not read CSV: {e}")
+            else:
+                messages.success(request, f"Imported {result.created} {kind} ({result.rejected} rejected).")
+
+    return render(request, "bulk_import.html", {"kind": kind, "result": result})
+
+
 # --- MEMBER PORTAL & DIVIDENDS ---
 
 def memberlogin(request):
@@ -398,62 +403,151 @@ def memberlogin(request):
         messages.error(request, "Invalid credentials")
     return render(request, "memberlogin.html")
 
-def member_dashboard(request):
-    mid = request.session.get("member_id")
-    if not mid: 
-        return redirect("memberlogin")
-    
-    member = get_object_or_404(Member, pk=mid)
-    
-    # 1. Transactions Logic
-    txs = PVTransaction.objects.filter(member=member).order_by('-purchase_date')
+def _dashboard_rows(member):
+    txs = list(PVTransaction.objects.filter(member=member).order_by('-purchase_date'))
+    cols = TransactionColumns(
+        [tx.id for tx in txs], [tx.pv_units for tx in txs], [tx.purchase_date for tx in txs]
+    )
+    engine = get_engine()
+    current_values = engine.current_values(cols)
+    projections = engine.projections(cols)
+
+    # Charts are drawn client-side from member_growth_curves as they scroll
+    # into view; only the figures shown as text are rendered here.
+    # Values are fixed-point until here, where they become Decimals for the
+    # template and the API; the total is rounded from the exact sum.
     dashboard_data = []
     overall_total_value = 0 
     
-    for tx in txs:
-        purchase_year = tx.purchase_date.year
-        start_price = get_base_price_for_purchase_year(purchase_year)
-        buy_value = float(tx.pv_units) * float(start_price)
-        curr_val = calculate_current_value(tx.pv_units, tx.purchase_date)
-        
-        graph_labels = []
-        graph_data = []
-        graph_labels.append(str(purchase_year))
-        graph_data.append(round(buy_value, 2))
-        
-        running_val = buy_value
-        for i in range(1, 11): 
-            future_year = purchase_year + i
-            growth_rate = 8 + (i - 1) 
-            if growth_rate > 14: growth_rate = 14
-            running_val = running_val * (1 + growth_rate / 100.0)
-            graph_labels.append(str(future_year))
-            graph_data.append(round(running_val, 2))
-
+    for tx, buy_value, curr_val, projection in zip(txs, cols.buy_value, current_values, projections):
         dashboard_data.append({
             "id": tx.id,
             "date": tx.purchase_date,
+            "purchase_year": tx.purchase_date.year,
             "pv_units": tx.pv_units,
-            "buy_value": buy_value,
-            "current_value": Decimal(curr_val).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
-            "graph_labels": json.dumps(graph_labels),
-            "graph_data": json.dumps(graph_data)
+            "buy_value": money.to_decimal(buy_value),
+            "current_value": money.to_decimal(curr_val),
+            "projected_value": money.to_decimal(projection[-1]),
         })
         overall_total_value += curr_val
         
+    overall_total_value = money.to_decimal(overall_total_value)
+    return dashboard_data, overall_total_value
+
+
+def member_dashboard(request):
+    mid = request.session.get("member_id")
+    if not mid: 
+        return redirect("memberlogin")
+    
+    member = get_object_or_404(Member, pk=mid)
+    
+    # 1. Transactions Logic (cached per member version and valuation month)
+    dashboard_data, overall_total_value = caching.get_or_set(
+        caching.member_key("dashboard", member.pk, member.data_version),
+        lambda: _dashboard_rows(member),
+    )
+
     # 2. Dividend Logic
     dividend_qs = Dividend.objects.filter(member=member).order_by('-id')
-    total_dividends = dividend_qs.aggregate(Sum('amount'))['amount__sum'] or 0
 
-    context = {
+    context = _dashboard_context(member, dashboard_data, overall_total_value, dividend_qs)
+    return render(request, "member_dashboard.html", context)
+
+
+def _dashboard_context(member, dashboard_data, overall_total_value, dividends):
+    return {
         "member": member, 
         "dashboard_data": dashboard_data, 
-        "overall_total_value": Decimal(overall_total_value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
-        "dividends": dividend_qs,
-        "total_dividends": total_dividends
+        "overall_total_value": overall_total_value,
+        "dividends": dividends,
+        "total_dividends": member.total_dividends
     }
-    
-    return render(request, "member_dashboard.html", context)
+
+
+def member_growth_curves(request):
+    """
+    One normalized 10-year growth curve (value of 1 PV) per purchase year
+    the logged-in member holds. The dashboard scales them by units.
+    """
+    mid = request.session.get("member_id")
+    if not mid:
+        return JsonResponse({"error": "Not logged in."}, status=401)
+
+    version = Member.objects.filter(pk=mid).values_list("data_version", flat=True).first()
+    if version is None:
+        return JsonResponse({"error": "Member not found."}, status=404)
+
+    def curves():
+        years = (
+            PVTransaction.objects.filter(member_id=mid)
+            .values_list("purchase_date__year", flat=True).distinct().order_by()
+        )
+        return {
+            "version": version,
+            "curves": {
+                # Chart points, not amounts: unrounded floats.
+                str(year): {"start_year": year, "values": [v / money.SCALE for v in growth_curve(year)]}
+                for year in sorted(years)
+            },
+        }
+
+    # The URL is the same for every version, so the browser must check its
+    # copy each time: a purchase in a new year adds a curve. The tag comes
+    # from the cache key (member version, valuation month, schedule).
+    key = caching.member_key("growth-curves", mid, version)
+    etag = quote_etag(hashlib.sha1(key.encode()).hexdigest()[:20])
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(caching.get_or_set(key, curves))
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# ---------------------------------------------------------
+#   ASYNC MEMBER PAGES (ASGI)
+# ---------------------------------------------------------
+# Async versions of member_dashboard and member_pv_overview, routed in
+# place of the sync ones when PV_ASYNC_VIEWS is set (clubpro/asgi.py sets
+# it). Under an ASGI server one worker then serves many members at once.
+# Independent queries are started together through in_thread(), which also
+# keeps valuation, cache access and template rendering off the event loop.
+# The page logic is shared with the sync views, so both render the same
+# HTML.
+
+async def member_dashboard_async(request):
+    mid = await request.session.aget("member_id")
+    if not mid:
+        return redirect("memberlogin")
+
+    # The member row and its dividends do not depend on each other.
+    member, dividends = await asyncio.gather(
+        in_thread(Member.objects.filter(pk=mid).first),
+        in_thread(lambda: list(Dividend.objects.filter(member_id=mid).order_by("-id"))),
+    )
+    if member is None:
+        raise Http404("No Member matches the given query.")
+
+    dashboard_data, overall_total_value = await in_thread(
+        caching.get_or_set,
+        caching.member_key("dashboard", member.pk, member.data_version),
+        lambda: _dashboard_rows(member),
+    )
+    context = _dashboard_context(member, dashboard_data, overall_total_value, dividends)
+    return await in_thread(render, request, "member_dashboard.html", context)
+
+
+async def member_pv_overview_async(request):
+    # Exports stream from a sync iterator; leave them to the sync view.
+    if request.GET.get("format"):
+        return await sync_to_async(member_pv_overview)(request)
+
+    selected_year, available_years, search_query, members_qs = await in_thread(_overview_params, request)
+    page_obj = await pagination.apaginate(request, members_qs, OVERVIEW_ORDERING, OVERVIEW_PAGE_SIZE)
+    member_rows = await in_thread(_overview_rows, list(page_obj.object_list), selected_year)
+    context = _overview_context(page_obj, member_rows, selected_year, available_years, search_query)
+    return await in_thread(render, request, "member_pv_overview.html", context)
 
 
 def member_certificate(request, pk):
@@ -461,19 +555,42 @@ def member_certificate(request, pk):
     if not mid:
         return redirect("memberlogin")
     
-    tx = get_object_or_404(PVTransaction, pk=pk, member_id=mid)
-    start_price = get_base_price_for_purchase_year(tx.purchase_date.year)
-    buy_value = float(tx.pv_units) * float(start_price)
-    
-    context = {
-        "member": tx.member,
-        "transaction": tx,
-        "buy_pv_value": f"{buy_value:,.2f}",
-        "purchase_year": tx.purchase_date.year,
-        "base_price_at_purchase": start_price,
-        "today": timezone.now().date()
-    }
-    return render(request, "member_certificate.html", context)
+    tx = get_object_or_404(PVTransaction.objects.select_related("member"), pk=pk, member_id=mid)
+    today = timezone.now().date()
+
+    def certificate():
+        start_price = valuation.base_price_fixed(tx.purchase_date.year)
+        context = {
+            "member": tx.member,
+            "transaction": tx,
+            "buy_pv_value": money.to_text(tx.pv_units * start_price),
+            "purchase_year": tx.purchase_date.year,
+            "base_price_at_purchase": money.to_decimal(start_price),
+            "today": today
+        }
+        return render_to_string("member_certificate.html", context, request)
+
+    # The page shows the issue date, so it is cached per day as well.
+    key = caching.member_key("certificate", mid, tx.member.data_version, tx.pk, today.isoformat())
+    return HttpResponse(caching.get_or_set(key, certificate))
+
+def member_certificate_pdf(request, pk):
+    mid = request.session.get("member_id")
+    if not mid:
+        return redirect("memberlogin")
+
+    tx = get_object_or_404(PVTransaction.objects.select_related("member"), pk=pk, member_id=mid)
+    try:
+        path = certificates.certificate_for(tx)
+    except pdf.UnsupportedText:
+        # A name or address outside the PDF fonts: the page prints it.
+        return redirect("member_certificate", pk=tx.pk)
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename=f"certificate-{tx.member.member_code}-{tx.pk}.pdf",
+        content_type="application/pdf",
+    )
 
 # --- THIS WAS LIKELY MISSING IN YOUR FILE ---
 def member_logout(request):
@@ -485,22 +602,16 @@ def member_logout(request):
 
 def dividend_list(request):
     q = request.GET.get("q", "")
-    qs = Dividend.objects.select_related("member").order_by("-id")
+    qs = search.filter_members(Dividend.objects.select_related("member"), q, member_field="member")
 
-    if q:
-        qs = qs.filter(
-            Q(member__full_name__icontains=q) |
-            Q(member__member_code__icontains=q)
-        )
-
-    paginator = Paginator(qs, 10)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj = pagination.paginate(request, qs, ("-id",), 10)
 
     return render(request, "dividend_list.html", {
         "page_obj": page_obj,
         "query": q
     })
 
+@transaction.atomic
 def dividend_add(request):
     members = Member.objects.all().order_by("member_code")
 
@@ -518,6 +629,7 @@ def dividend_add(request):
         "mode": "add"
     })
 
+@transaction.atomic
 def dividend_edit(request, pk):
     div = get_object_or_404(Dividend, pk=pk)
     members = Member.objects.all()
@@ -536,8 +648,80 @@ def dividend_edit(request, pk):
         "mode": "edit"
     })
 
+@transaction.atomic
 def dividend_delete(request, pk):
     div = get_object_or_404(Dividend, pk=pk)
     if request.method == "POST":
         div.delete()
-    return redirect("dividend_list")
\ No newline at end of file
+    return redirect("dividend_list")
+
+
+# --- DIVIDEND DISTRIBUTION RUNS ---
+
+def dividend_runs(request):
+    if not request.session.get("admin_user"):
+        return redirect("adminlogin")
+
+    today = timezone.localdate()
+    form = {"pool": "", "record_date": today.isoformat(), "basis": DividendRun.BASIS_UNITS, "note": ""}
+    if request.method == "POST":
+        form = {key: request.POST.get(key, "").strip() for key in form}
+        try:
+            pool = Decimal(form["pool"]).quantize(Decimal("0.01"))
+            record_date = date.fromisoformat(form["record_date"])
+        except (ArithmeticError, ValueError):
+            messages.error(request, "Enter a payout pool and a record date.")
+        else:
+            if pool <= 0:
+                messages.error(request, "The payout pool must be positive.")
+            elif record_date > today:
+                messages.error(request, "The record date cannot be in the future.")
+            elif form["basis"] not in dict(DividendRun.BASIS_CHOICES):
+                messages.error(request, "Choose how to share the pool.")
+            else:
+                run = DividendRun.objects.create(
+                    pool=pool, record_date=record_date, basis=form["basis"], note=form["note"][:255]
+                )
+                return redirect("dividend_run_detail", pk=run.pk)
+
+    return render(request, "dividend_runs.html", {
+        "runs": DividendRun.objects.order_by("-id")[:50],
+        "form": form,
+        "basis_choices": DividendRun.BASIS_CHOICES,
+        "today": today,
+    })
+
+
+def dividend_run_detail(request, pk):
+    if not request.session.get("admin_user"):
+        return redirect("adminlogin")
+
+    run = get_object_or_404(DividendRun, pk=pk)
+    if request.method == "POST":
+        action = request.POST.get("action")
+        try:
+            if action == "commit":
+                distributions.commit(run)
+                messages.success(request, f"Run #{run.pk} paid ₹ {run.distributed} to {run.member_count} members.")
+            elif action == "rollback":
+                distributions.rollback(run)
+                messages.success(request, f"Run #{run.pk} rolled back.")
+            elif action == "discard" and run.status == DividendRun.PREVIEW:
+                run.delete()
+                messages.success(request, "Preview discarded.")
+                return redirect("dividend_runs")
+        except distributions.DistributionError as exc:
+            messages.error(request, str(exc))
+        return redirect("dividend_run_detail", pk=run.pk)
+
+    summary = None
+    if run.status == DividendRun.PREVIEW:
+        summary = distributions.preview(run)
+        members = Member.objects.in_bulk([member_id for member_id, _ in summary["top"]])
+        top_rows = [(members[member_id], amount) for member_id, amount in summary["top"]]
+    else:
+        top_rows = [
+            (d.member, d.amount)
+            for d in run.dividends.select_related("member").order_by("-amount", "member_id")[:distributions.PREVIEW_ROWS]
+        ]
+    return render(request, "dividend_run_detail.html", {"run": run, "summary": summary, "top_rows": top_rows})
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'clubpro.settings')
+# Serve the member pages with their async views (clubapp/views.py).
+os.environ.setdefault('PV_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'clubapp.instrumentation.RequestMetricsMiddleware',
+    'clubapp.db_routing.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +57,8 @@ ROOT_URLCONF = 'clubpro.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing (clubapp/instrumentation.py).
+        'BACKEND': 'clubapp.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,9 +81,58 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent connections; pragmas are set once per connection
+        # (PV_SQLITE_PRAGMAS below).
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so concurrent
+            # writers wait on the timeout instead of failing mid-transaction.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Read replica for reporting pages (clubapp/db_routing.py). Point
+# PV_REPLICA_DATABASE at a replica of db.sqlite3, or at any path and keep
+# it fresh with `manage.py refresh_replica`. In tests it mirrors default.
+if os.environ.get('PV_REPLICA_DATABASE'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['PV_REPLICA_DATABASE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['clubapp.db_routing.ReplicaRouter']
+PV_REPLICA_ALIAS = 'replica'
+# URL names (fnmatch patterns) whose GET requests read from the replica.
+PV_REPLICA_VIEWS = [
+    'member_pv_overview',
+    'list_members',
+    'buy_pv_list',
+    'dividend_list',
+    'dividend_runs',
+    'admin:*_changelist',
+]
+# Apps whose models those requests read from the replica.
+PV_REPLICA_APPS = ['clubapp']
+# After a form post, that browser reads from the primary for this long.
+PV_REPLICA_PIN_SECONDS = 15
+
+# Applied to every new SQLite connection. WAL mode is stored in the
+# database file, so it is not set here; turn it on once per deployment
+# with `manage.py enable_wal`.
+PV_SQLITE_PRAGMAS = {
+    'cache_size': -32000,  # KiB
+    'temp_store': 'MEMORY',
+}
+# Applied as well, only to connections whose database is in WAL mode:
+# synchronous=NORMAL is crash-safe with WAL but not with a rollback journal.
+PV_SQLITE_WAL_PRAGMAS = {
+    'synchronous': 'NORMAL',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -119,4 +171,59 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR,'static')]
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR,'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR,'media')
+
+# The PV rate schedule (clubapp/rates.py): price of 1 PV in the start
+# year, then the yearly growth rates in %, the last one holding for every
+# later year. Every price and valuation reads it. After changing it, run
+# build_pv_snapshots and repair_member_totals to rewrite stored values.
+PV_RATE_SCHEDULE = {
+    'start_year': 2026,
+    'base_price': 100.0,
+    'rates': [8, 9, 10, 11, 12, 13, 14],
+}
+
+# PV valuation backend used for batch valuations ("python" or "numpy").
+# "numpy" needs NumPy installed and falls back to "python" without it.
+PV_VALUATION_ENGINE = os.environ.get('PV_VALUATION_ENGINE', 'python')
+
+# PVMonthlySnapshot rows are kept through December of this many years
+# after the current year; later months are computed live.
+PV_SNAPSHOT_YEARS_AHEAD = 5
+
+# Cache for computed views (clubapp/caching.py). Local memory by default;
+# set PV_CACHE_DIR to share a file-based cache between worker processes.
+if os.environ.get('PV_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['PV_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'clubapp',
+        }
+    }
+
+# Rendered PDF certificates, stored by content hash (clubapp/certificates.py).
+PV_CERTIFICATE_DIR = os.path.join(MEDIA_ROOT, 'certificates')
+
+# Year-end statements, one folder per year (clubapp/statements.py).
+PV_STATEMENT_DIR = os.path.join(MEDIA_ROOT, 'statements')
+
+# How long browsers and proxies may reuse a what-if projection
+# (clubapp/api.py). Answers only change with PV_RATE_SCHEDULE.
+PV_PROJECTION_CACHE_SECONDS = 600
+
+# Per-view request metrics shown on the admin dashboard
+# (clubapp/instrumentation.py).
+PV_METRICS_ENABLED = True
+PV_METRICS_FLUSH_SECONDS = 60
+PV_SLOW_QUERY_MS = 200
+
+# Route member_dashboard and member_pv_overview to their async versions;
+# clubpro/asgi.py turns this on when serving under ASGI.
+PV_ASYNC_VIEWS = os.environ.get('PV_ASYNC_VIEWS', '') == '1'